@@ -76,6 +76,8 @@ from Biblelator.Dialogs.BiblelatorDialogs import SelectResourceBoxDialog, GetNew
                                 BookNameDialog, NumberButtonDialog, \
                                 DownloadResourcesDialog, ChooseResourcesDialog
 from Biblelator.Helpers.BiblelatorHelpers import mapReferencesVerseKey, createEmptyUSFMBooks, parseEnteredBooknameField
+from Biblelator.Helpers.AutocompleteFunctions import AutocompleteVocabularies, closeAutocompletePool
+from Biblelator.Helpers.BookTextCache import getBookTextCache
 from Biblelator.Settings.Settings import ApplicationSettings, BiblelatorProjectSettings, uWProjectSettings
 from Biblelator.Settings.BiblelatorSettingsFunctions import parseAndApplySettings, writeSettingsFile, \
         saveNewWindowSetup, deleteExistingWindowSetup, applyGivenWindowsSettings, viewSettings, \
@@ -197,6 +199,7 @@ class Application( Frame ):
 
         self.childWindows = ChildWindows( self )
         self.internalBibles = [] # Contains 2-tuples being (internalBibleObject,list of window objects displaying that Bible)
+        self.autocompleteVocabularies = AutocompleteVocabularies() # Shared by edit windows using the same autocomplete words
 
         self.createStatusBar()
         if BibleOrgSysGlobals.debugFlag: # Create a scrolling debug box
@@ -4167,6 +4170,9 @@ class Application( Frame ):
 
         writeSettingsFile()
         if self.doCloseMyChildWindows():
+            self.autocompleteVocabularies.closedown()
+            closeAutocompletePool()
+            vPrint( 'Normal', debuggingThisModule, getBookTextCache() ) # Shows the hit and miss counts
             self.rootWindow.destroy()
         if self.internetAccessEnabled and self.sendUsageStatisticsEnabled:
             try: doSendUsageStatistics( self )
@@ -62,6 +62,7 @@ DATA_SUBFOLDER_NAME = f'{APP_NAME}Data/'
 LOGGING_SUBFOLDER_NAME = f'{APP_NAME}Logs/'
 SETTINGS_SUBFOLDER_NAME = f'{APP_NAME}Settings/'
 PROJECTS_SUBFOLDER_NAME = f'{APP_NAME}Projects/'
+CACHE_SUBFOLDER_NAME = f'{APP_NAME}Cache/' # Derived data that can be safely deleted
 
 
 ##########################################################################################################
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# AutocompleteBenchmarks.py
+#
+# Timing tests for the autocomplete code (without needing the GUI)
+#
+# Copyright (C) 2020 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org+Biblelator@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Benchmarks for the slower parts of the autocomplete code.
+
+These can be run from the command line (with an optional folder
+    containing the USFM files of a complete Bible), e.g.,
+        python3 -m Biblelator.Helpers.AutocompleteBenchmarks ~/Paratext/MyProject/
+
+benchmarkWordCounting compares the current word counting code
+    with the original (marker by marker) version which is kept here for reference,
+    and also checks that both give exactly the same counts.
+
+benchmarkAutocompleteLatency loads a vocabulary (from a Bible folder,
+    a Hunspell dictionary, or an ILEX dictionary) using the same gather functions
+    as the edit windows, and then replays typed text (recorded in a file,
+    or else taken from the Bible or some sample lines) one keystroke at a time,
+    doing the same autocomplete lookups as the edit windows (but without tkinter).
+    It reports the load time, the memory used, and the 50th, 95th, and 99th
+    percentile lookup times per keystroke, e.g.,
+        python3 -m Biblelator.Helpers.AutocompleteBenchmarks --hunspell /usr/share/hunspell/en_AU.dic --keystrokes typed.txt
+"""
+import os
+import time
+import tracemalloc
+from collections import defaultdict
+
+# BibleOrgSys imports
+from BibleOrgSys import BibleOrgSysGlobals
+from BibleOrgSys.BibleOrgSysGlobals import fnPrint, vPrint, dPrint
+from BibleOrgSys.Reference.USFM3Markers import USFM_PRINTABLE_MARKERS
+
+# Biblelator imports
+if __name__ == '__main__':
+    import sys
+    aboveAboveFolderpath = os.path.dirname( os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+    if aboveAboveFolderpath not in sys.path:
+        sys.path.insert( 0, aboveAboveFolderpath )
+from Biblelator.Helpers.AutocompleteFunctions import END_CHARS_TO_REMOVE, getInternalMarkers, \
+                                        makeInternalMarkersRegex, countLineWords, buildAutocompleteIndex, \
+                                        gatherBibleAutocompleteWords, gatherHunspellAutocompleteWords, gatherILEXAutocompleteWords
+from Biblelator.Windows.TextBoxes import TRAILING_SPACE_SUBSTITUTE, MULTIPLE_SPACE_SUBSTITUTE
+from Biblelator.Windows.TextEditWindow import MAX_AUTOCOMPLETE_POPUP_WORDS
+
+
+LAST_MODIFIED_DATE = '2020-06-12' # by RJH
+SHORT_PROGRAM_NAME = "AutocompleteBenchmarks"
+PROGRAM_NAME = "Biblelator Autocomplete Benchmarks"
+PROGRAM_VERSION = '0.46'
+programNameVersion = f'{PROGRAM_NAME} v{PROGRAM_VERSION}'
+
+debuggingThisModule = False
+
+
+USFM_FILENAME_ENDINGS = ( '.sfm', '.usfm', '.ptx', )
+DEFAULT_WORD_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_' # As set in TextEditWindowAddon
+LATENCY_PERCENTILES = ( 50, 95, 99, )
+MAX_REPLAY_KEYSTROKES = 100_000
+SAMPLE_TEXT_LINES = ( # Used if we don't have a real Bible
+    'In the beginning God created the heavens and the earth.',
+    'God said, “Let there be light,” and there was light.',
+    'The \\add LORD\\add* God formed the man—from the dust of the ground.',
+    'So Abram went, as the \\nd Lord\\nd* had told him;\\f + \\fr 12:4 \\ft Or \\fq went\\f* and Lot went with him.',
+    'Then Jesus said to them, \\wj “Come, follow me—and I will make you fishers of people.”\\wj*',
+    'These are the names of the sons of Israel who went to Egypt with Jacob – each with his family.',
+    )
+
+
+
+def countLineWordsReference( textLine:str, wordCounts:dict, internalMarkers:list ) -> None:
+    """
+    The original word counting code (from countBookWords in AutocompleteFunctions)
+        which is only kept here so that we can compare the speed and the results
+        of the current code.
+
+    Note: Punctuation etc. is NOT removed.
+    """
+    if '\\' in textLine: # we have internal markers to remove
+        for iMarker in internalMarkers:
+            textLine = textLine.replace( iMarker+' ',' ' ).replace( iMarker+'*',' ' )
+            if not '\\' in textLine: break
+    words = textLine.replace('—','— ').replace('–','– ').split() # Treat em-dash and en-dash as word break characters
+
+    # Now look for (and count) single and some multiple word sequences
+    for wx,word in enumerate( words ):
+        if not word: continue
+        if 'XXX' in word: continue # This is used in the Matigsalug project to mark errors
+        singleWord = word
+        while singleWord and singleWord[-1] in END_CHARS_TO_REMOVE:
+            singleWord = singleWord[:-1] # Remove certain final punctuation
+        if len(singleWord) > 2: wordCounts[singleWord] += 1
+
+        if wx < len(words)-1: # it's not the last word in the line
+            doubleWord = word+' '+words[wx+1]
+            adjustedDoubleWord = doubleWord[:-1] if doubleWord[-1] in END_CHARS_TO_REMOVE else doubleWord
+            if '. ' not in adjustedDoubleWord: # don't go across sentence boundaries
+                wordCounts[adjustedDoubleWord] += 1
+            if wx < len(words)-2: # there's still two words after this one
+                tripleWord = doubleWord+' '+words[wx+2]
+                adjustedTripleWord = tripleWord[:-1] if tripleWord[-1] in END_CHARS_TO_REMOVE else tripleWord
+                if '. ' not in adjustedTripleWord: # don't go across sentence boundaries
+                    wordCounts[adjustedTripleWord] += 1
+                if wx < len(words)-3: # there's still three words after this one
+                    quadWord = tripleWord+' '+words[wx+3]
+                    adjustedQuadWord = quadWord[:-1] if quadWord[-1] in END_CHARS_TO_REMOVE else quadWord
+                    if '. ' not in adjustedQuadWord: # don't go across sentence boundaries
+                        wordCounts[adjustedQuadWord] += 1
+                    if wx < len(words)-4: # there's still four words after this one
+                        quinWord = quadWord+' '+words[wx+4]
+                        adjustedQuinWord = quinWord[:-1] if quinWord[-1] in END_CHARS_TO_REMOVE else quinWord
+                        if '. ' not in adjustedQuinWord: # don't go across sentence boundaries
+                            wordCounts[adjustedQuinWord] += 1
+# end of AutocompleteBenchmarks.countLineWordsReference
+
+
+def loadUSFMTextLines( sourceFolder, encoding='utf-8' ) -> list:
+    """
+    Load the text (after the initial marker) of the printable lines
+        from all of the USFM files in the folder.
+
+    This is only approximately what countBookWords does,
+        but it gives both word counters exactly the same input.
+    """
+    fnPrint( debuggingThisModule, "loadUSFMTextLines( {}, {} )".format( sourceFolder, encoding ) )
+
+    textLines = []
+    for filename in sorted( os.listdir( sourceFolder ) ):
+        if not filename.lower().endswith( USFM_FILENAME_ENDINGS ): continue
+        with open( os.path.join( sourceFolder, filename ), 'rt', encoding=encoding ) as bookFile:
+            for line in bookFile:
+                line = line.rstrip( '\n' ).lstrip( '\ufeff' ) # Remove any Unicode Byte Order Marker (BOM)
+                if not line.startswith( '\\' ):
+                    if line: textLines.append( line ) # continuation line
+                    continue
+                try: marker, text = line[1:].split( ' ', 1 )
+                except ValueError: continue # no text
+                if marker not in USFM_PRINTABLE_MARKERS: continue
+                if marker == 'v':
+                    try: text = text.split( None, 1 )[1]
+                    except IndexError: continue
+                textLines.append( text )
+    return textLines
+# end of AutocompleteBenchmarks.loadUSFMTextLines
+
+
+def benchmarkWordCounting( textLines, repeats:int=3 ) -> dict:
+    """
+    Time the original and the current word counting code on the given lines of text,
+        and check that they give the same results.
+
+    Returns a dictionary with the best times (in seconds).
+    """
+    fnPrint( debuggingThisModule, "benchmarkWordCounting( {:,}, {} )".format( len(textLines), repeats ) )
+
+    internalMarkers = getInternalMarkers()
+    results = {}
+
+    bestTime = None
+    for _repeat in range( repeats ):
+        referenceCounts = defaultdict( int )
+        startTime = time.perf_counter()
+        for textLine in textLines:
+            countLineWordsReference( textLine, referenceCounts, internalMarkers )
+        elapsedTime = time.perf_counter() - startTime
+        if bestTime is None or elapsedTime < bestTime: bestTime = elapsedTime
+    results['Reference'] = bestTime
+
+    bestTime = None
+    for _repeat in range( repeats ):
+        currentCounts = defaultdict( int )
+        startTime = time.perf_counter()
+        internalMarkersRegex = makeInternalMarkersRegex( internalMarkers ) # Done once per book in countBookWords
+        for textLine in textLines:
+            countLineWords( textLine, currentCounts, internalMarkersRegex )
+        elapsedTime = time.perf_counter() - startTime
+        if bestTime is None or elapsedTime < bestTime: bestTime = elapsedTime
+    results['Current'] = bestTime
+
+    results['SameCounts'] = currentCounts == referenceCounts
+    if not results['SameCounts']:
+        differences = [word for word in referenceCounts.keys() | currentCounts.keys()
+                            if referenceCounts.get( word ) != currentCounts.get( word )]
+        vPrint( 'Quiet', debuggingThisModule, "  {:,} counts differ, e.g., {}".format( len(differences), differences[:10] ) )
+
+    vPrint( 'Quiet', debuggingThisModule, "Word counting for {:,} lines ({:,} different words and sequences):" \
+                                            .format( len(textLines), len(currentCounts) ) )
+    vPrint( 'Quiet', debuggingThisModule, "  Reference {:.3f}s  Current {:.3f}s  ({:.1f} times faster){}" \
+                                            .format( results['Reference'], results['Current'],
+                                                results['Reference']/results['Current'] if results['Current'] else 0,
+                                                '' if results['SameCounts'] else '  BUT COUNTS DIFFER!' ) )
+    return results
+# end of AutocompleteBenchmarks.benchmarkWordCounting
+
+
+
+def loadAutocompleteVocabulary( gatherFunction, gatherArgs, minLength:int=3 ) -> dict:
+    """
+    Load the words with one of the gather…AutocompleteWords functions
+        and build the autocomplete index (as done by the AutocompleteLoaderThread),
+        tracing the memory that's used.
+
+    Returns a dictionary containing the Index (and its windowAttributes),
+        the LoadSeconds (which are slowed down somewhat by the memory tracing),
+        the PeakMemory used during loading, and the IndexMemory still used afterwards (both in bytes).
+    """
+    fnPrint( debuggingThisModule, "loadAutocompleteVocabulary( {}, {}, {} )".format( gatherFunction.__name__, gatherArgs, minLength ) )
+
+    tracemalloc.start()
+    startTime = time.perf_counter()
+    wordList, windowAttributes = gatherFunction( *gatherArgs )
+    autocompleteIndex = buildAutocompleteIndex( wordList, max( minLength, windowAttributes.get( 'autocompleteMinLength', 0 ) ) )
+    elapsedTime = time.perf_counter() - startTime
+    del wordList
+    currentMemory, peakMemory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return { 'Index':autocompleteIndex, 'Attributes':windowAttributes,
+            'LoadSeconds':elapsedTime, 'PeakMemory':peakMemory, 'IndexMemory':currentMemory }
+# end of AutocompleteBenchmarks.loadAutocompleteVocabulary
+
+
+def getLookupTexts( previousText:str, wordChars:str ):
+    """
+    Given the text before the cursor, returns the same two strings as
+        getWordCharactersBeforeCursor and getCharactersAndWordBeforeCursor
+        (from AutocompleteFunctions) would find in an edit window.
+    """
+    wordText = ''
+    for previousChar in reversed( previousText ):
+        if previousChar in wordChars: wordText = previousChar + wordText
+        else: break
+
+    delimiterChars = BibleOrgSysGlobals.TRAILING_WORD_END_CHARS + MULTIPLE_SPACE_SUBSTITUTE + TRAILING_SPACE_SUBSTITUTE
+    delimiterCount = 0
+    stuffText = ''
+    for previousChar in reversed( previousText ):
+        if previousChar in wordChars:
+            stuffText = previousChar + stuffText
+        elif previousChar in delimiterChars:
+            if delimiterCount > 0: break
+            stuffText = previousChar + stuffText
+            delimiterCount += 1
+    return wordText, stuffText
+# end of AutocompleteBenchmarks.getLookupTexts
+
+
+def replayKeystrokes( autocompleteIndex, typedText:str, windowAttributes:dict, minLength:int=3, maxLength:int=15 ) -> list:
+    """
+    Type the text into the autocomplete index one character at a time
+        doing the same lookups as TextEditWindowAddon.doAutocompleteLookup
+        (and adding the typed words if the windowAttributes say so).
+
+    Returns a list of the time (in seconds) taken for each keystroke.
+    """
+    fnPrint( debuggingThisModule, "replayKeystrokes( {}, {:,}, {}, {} )".format( autocompleteIndex, len(typedText), minLength, maxLength ) )
+
+    minLength = max( minLength, windowAttributes.get( 'autocompleteMinLength', 0 ) )
+    addAllNewWords = windowAttributes.get( 'addAllNewWords', False )
+    wordChars = DEFAULT_WORD_CHARS + ''.join( autocompleteIndex.getCharacters().difference( DEFAULT_WORD_CHARS, ' .' ) )
+    wordEndChars = BibleOrgSysGlobals.TRAILING_WORD_END_CHARS
+
+    keystrokeTimes = []
+    previousText = lastWordText = ''
+    perf_counter = time.perf_counter
+    for char in typedText:
+        startTime = perf_counter()
+        previousText = (previousText + char)[-maxLength:]
+        wordText, stuffText = getLookupTexts( previousText, wordChars )
+        if wordText != lastWordText:
+            lastWordText = wordText
+            possibleWords = None
+            if len(wordText) >= minLength:
+                possibleWords = autocompleteIndex.getCompletions( wordText, MAX_AUTOCOMPLETE_POPUP_WORDS )
+            if not possibleWords:
+                possibleWords = autocompleteIndex.getCompletions( stuffText, MAX_AUTOCOMPLETE_POPUP_WORDS )
+        if addAllNewWords and char in wordEndChars:
+            newWord = getLookupTexts( previousText[:-1], wordChars )[0].rstrip( END_CHARS_TO_REMOVE )
+            if len(newWord) >= minLength: autocompleteIndex.promoteWord( newWord )
+        keystrokeTimes.append( perf_counter() - startTime )
+    return keystrokeTimes
+# end of AutocompleteBenchmarks.replayKeystrokes
+
+
+def getPercentiles( values:list, percentiles=LATENCY_PERCENTILES ) -> dict:
+    """
+    Returns a dictionary (indexed by percentile) of the (nearest rank) percentile values.
+    """
+    if not values: return {}
+    sortedValues = sorted( values )
+    numValues = len( sortedValues )
+    return { percentile:sortedValues[min( numValues-1, max( 0, -(-numValues*percentile//100) - 1 ) )]
+                for percentile in percentiles }
+# end of AutocompleteBenchmarks.getPercentiles
+
+
+def benchmarkAutocompleteLatency( name:str, gatherFunction, gatherArgs, typedText:str ) -> dict:
+    """
+    Load the vocabulary and then replay the typed text against it.
+
+    Returns a dictionary with the load results (without the Index itself),
+        the number of Keystrokes, and the Percentiles of the keystroke times (in seconds).
+    """
+    fnPrint( debuggingThisModule, "benchmarkAutocompleteLatency( {}, {}, {}, {:,} )".format( name, gatherFunction.__name__, gatherArgs, len(typedText) ) )
+
+    results = loadAutocompleteVocabulary( gatherFunction, gatherArgs )
+    autocompleteIndex = results.pop( 'Index' )
+    typedText = typedText[:MAX_REPLAY_KEYSTROKES]
+    keystrokeTimes = replayKeystrokes( autocompleteIndex, typedText, results['Attributes'] )
+    results['Keystrokes'] = len( keystrokeTimes )
+    results['Percentiles'] = getPercentiles( keystrokeTimes )
+    results['MaxSeconds'] = max( keystrokeTimes, default=0 )
+
+    vPrint( 'Quiet', debuggingThisModule, "{} autocomplete: {:,} words loaded in {:.2f}s (peak memory {:,.1f}MB, index {:,.1f}MB)" \
+                                            .format( name, len(autocompleteIndex), results['LoadSeconds'],
+                                                results['PeakMemory']/1_000_000, results['IndexMemory']/1_000_000 ) )
+    vPrint( 'Quiet', debuggingThisModule, "  {:,} keystrokes: {}  max {:.3f}ms" \
+                                            .format( results['Keystrokes'],
+                                                '  '.join( 'p{} {:.3f}ms'.format( percentile, seconds*1000 )
+                                                            for percentile,seconds in results['Percentiles'].items() ),
+                                                results['MaxSeconds']*1000 ) )
+    return results
+# end of AutocompleteBenchmarks.benchmarkAutocompleteLatency
+
+
+def loadTypedText( keystrokesFilepath=None, textLines=None ) -> str:
+    """
+    Returns the text to be replayed as keystrokes,
+        either recorded in a (UTF-8) file, or else made from the given text lines
+        (or the sample lines).
+    """
+    if keystrokesFilepath:
+        with open( keystrokesFilepath, 'rt', encoding='utf-8' ) as keystrokesFile:
+            return keystrokesFile.read().replace( '\n', ' ' )
+    return ' '.join( textLines if textLines else SAMPLE_TEXT_LINES * 100 )
+# end of AutocompleteBenchmarks.loadTypedText
+
+
+
+def briefDemo() -> None:
+    """
+    Demo program to handle command line parameters and then run what they want.
+    """
+    BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
+    vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
+
+    benchmarkWordCounting( SAMPLE_TEXT_LINES * 1000 )
+    sampleWords = ' '.join( SAMPLE_TEXT_LINES ).split()
+    benchmarkAutocompleteLatency( 'Sample', lambda words: (words,{}), (sampleWords,), loadTypedText() )
+# end of AutocompleteBenchmarks.briefDemo
+
+def fullDemo() -> None:
+    """
+    Full demo to check class is working
+    """
+    BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
+    vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
+
+    commandLineArguments = BibleOrgSysGlobals.commandLineArguments
+    USFMFolder = commandLineArguments.USFMFolder
+    textLines = None
+    if USFMFolder:
+        vPrint( 'Quiet', debuggingThisModule, "Loading USFM text lines from {}…".format( USFMFolder ) )
+        textLines = loadUSFMTextLines( USFMFolder, commandLineArguments.encoding )
+        benchmarkWordCounting( textLines )
+    else: benchmarkWordCounting( SAMPLE_TEXT_LINES * 10_000 )
+
+    typedText = loadTypedText( commandLineArguments.keystrokes, textLines[:1000] if textLines else None )
+    if USFMFolder:
+        from BibleOrgSys.Formats.USFMBible import USFMBible
+        internalBible = USFMBible( USFMFolder, encoding=commandLineArguments.encoding )
+        benchmarkAutocompleteLatency( 'Bible', gatherBibleAutocompleteWords, (internalBible,'GEN'), typedText )
+    if commandLineArguments.hunspell:
+        benchmarkAutocompleteLatency( 'Hunspell', gatherHunspellAutocompleteWords, (commandLineArguments.hunspell,), typedText )
+    if commandLineArguments.ILEX:
+        lgCodes = tuple( commandLineArguments.lgCodes.split( ',' ) ) if commandLineArguments.lgCodes else None
+        benchmarkAutocompleteLatency( 'ILEX', gatherILEXAutocompleteWords, (commandLineArguments.ILEX,lgCodes), typedText )
+# end of AutocompleteBenchmarks.fullDemo
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( SHORT_PROGRAM_NAME, PROGRAM_VERSION, LAST_MODIFIED_DATE )
+    parser.add_argument( 'USFMFolder', nargs='?', help="folder containing the USFM files of a Bible" )
+    parser.add_argument( '-e', '--encoding', type=str, default='utf-8', dest='encoding', help="encoding of the USFM files" )
+    parser.add_argument( '--hunspell', type=str, dest='hunspell', help="path of a Hunspell .dic file to benchmark" )
+    parser.add_argument( '--ilex', type=str, dest='ILEX', help="path of an ILEX dictionary to benchmark" )
+    parser.add_argument( '--lgCodes', type=str, dest='lgCodes', help="comma separated ILEX language codes, e.g., ENG,BRI" )
+    parser.add_argument( '-k', '--keystrokes', type=str, dest='keystrokes', help="file containing recorded typing to replay" )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    fullDemo()
+
+    BibleOrgSysGlobals.closedown( PROGRAM_NAME, PROGRAM_VERSION )
+# end of AutocompleteBenchmarks.py
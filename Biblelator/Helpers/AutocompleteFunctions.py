@@ -33,9 +33,15 @@ This module contains most of the helper functions for loading the autocomplete
 from gettext import gettext as _
 import sys
 import os
+import re
 import logging
 import multiprocessing
+import threading
+import queue
 import time
+import pickle
+import hashlib
+from typing import Optional
 from collections import defaultdict
 
 import tkinter as tk
@@ -45,7 +51,12 @@ if __name__ == '__main__':
     aboveAboveFolderpath = os.path.dirname( os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
     if aboveAboveFolderpath not in sys.path:
         sys.path.insert( 0, aboveAboveFolderpath )
+from Biblelator import BiblelatorGlobals
+from Biblelator.BiblelatorGlobals import DATA_SUBFOLDER_NAME, CACHE_SUBFOLDER_NAME
 from Biblelator.Windows.TextBoxes import TRAILING_SPACE_SUBSTITUTE, MULTIPLE_SPACE_SUBSTITUTE
+from Biblelator.Helpers.AutocompleteIndex import AutocompleteIndex
+from Biblelator.Helpers.FileStamps import getFileStamp
+from Biblelator.Helpers.HunspellAutocompleteIndex import loadHunspellDictionary
 
 # BibleOrgSys imports
 from BibleOrgSys import BibleOrgSysGlobals
@@ -54,7 +65,7 @@ from BibleOrgSys.BibleOrgSysGlobals import fnPrint, vPrint, dPrint
 from BibleOrgSys.Reference.USFM3Markers import USFM_PRINTABLE_MARKERS
 
 
-LAST_MODIFIED_DATE = '2020-04-30' # by RJH
+LAST_MODIFIED_DATE = '2020-06-20' # by RJH
 SHORT_PROGRAM_NAME = "AutocompleteFunctions"
 PROGRAM_NAME = "Biblelator Autocomplete Functions"
 PROGRAM_VERSION = '0.46'
@@ -66,9 +77,94 @@ debuggingThisModule = False
 AVOID_BOOKS = ( 'FRT', 'BAK', 'GLS', 'XXA','XXB','XXC','XXD','XXE','XXF','XXG', 'NDX', 'UNK', )
 END_CHARS_TO_REMOVE = ',—.–!?”:;' # NOTE: This intentionally doesn't include close parenthesis and similar
 HUNSPELL_DICTIONARY_FOLDERS = ( '/usr/share/hunspell/', )
+CURRENT_BOOK_COUNT_MULTIPLIER = 3 # Each word in current book counts higher so appears higher in the list
+BIBLE_MIN_MULTIWORD_COUNT = 10 # Less common multi-word sequences aren't offered
+BIBLE_BOOK_MIN_MULTIWORD_COUNT = 5
+DICTIONARY_AUTOCOMPLETE_MIN_LENGTH = 4 # Dictionaries have so many words that it's not worth showing them any sooner
+AUTOCOMPLETE_LOADER_POLL_TIME = 200 # msecs between checks to see if the background autocomplete loader has finished
+WORD_COUNT_CACHE_VERSION = 1 # Increment this if countBookWords changes what it counts
+ILEX_CACHE_VERSION = 1 # Increment this if iterateILEXWords changes what it yields
 
 
 
+def filterAutocompleteWords( wordList, minLength:int ) -> dict:
+    """
+    Given a word list (or a dict of word counts),
+        return a dict of the words which are at least minLength long
+        (with the counts or with None values).
+
+    Any duplicate words are removed but the original order is kept.
+    """
+    if isinstance( wordList, dict ): # of word counts
+        return { word:count for word,count in wordList.items() if len(word) >= minLength }
+    # else dict.fromkeys removes any duplicates but keeps the original order
+    return dict.fromkeys( word for word in wordList if len(word) >= minLength )
+# end of AutocompleteFunctions.filterAutocompleteWords
+
+
+def buildAutocompleteIndex( wordList, minLength:int ) -> AutocompleteIndex:
+    """
+    Given a word list (in order with the most likely words first)
+        or a dict of word counts, make a new autocomplete index
+        (ignoring words shorter than minLength).
+
+    This doesn't use tkinter so can be run in a background thread.
+    """
+    fnPrint( debuggingThisModule, "buildAutocompleteIndex( {:,}, {} )".format( len(wordList), minLength ) )
+
+    if isinstance( wordList, AutocompleteIndex ): return wordList # already built (e.g., a HunspellAutocompleteIndex)
+    acceptedWords = filterAutocompleteWords( wordList, minLength )
+    #if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        #dPrint( 'Quiet', debuggingThisModule, "    buildAutocompleteIndex discarded {:,} words".format( len(wordList)-len(acceptedWords) ) )
+    autocompleteIndex = AutocompleteIndex()
+    if isinstance( wordList, dict ): autocompleteIndex.setWordCounts( acceptedWords )
+    else: autocompleteIndex.setWords( list( acceptedWords ) )
+    return autocompleteIndex
+# end of AutocompleteFunctions.buildAutocompleteIndex
+
+
+def applyAutocompleteAttributes( editWindowObject, windowAttributes:dict ) -> None:
+    """
+    Set the attributes returned by one of the gather…AutocompleteWords functions
+        onto the edit window.
+    """
+    for attributeName,value in windowAttributes.items():
+        if attributeName == 'autocompleteMinLength': # can only be lengthened
+            if editWindowObject.autocompleteMinLength < value:
+                vPrint( 'Quiet', debuggingThisModule, "NOTE: Lengthened autocompleteMinLength from {} to {}".format( editWindowObject.autocompleteMinLength, value ) )
+                editWindowObject.autocompleteMinLength = value # Show the window after this many characters have been typed
+        else: setattr( editWindowObject, attributeName, value )
+# end of AutocompleteFunctions.applyAutocompleteAttributes
+
+
+def installAutocompleteWords( editWindowObject, wordList, windowAttributes:dict ) -> None:
+    """
+    Given the results from one of the gather…AutocompleteWords functions,
+        set the edit window attributes
+        and then set the words (or already built AutocompleteIndex) into the edit window.
+    """
+    fnPrint( debuggingThisModule, "installAutocompleteWords( {:,}, {} )".format( len(wordList), list( windowAttributes ) ) )
+
+    applyAutocompleteAttributes( editWindowObject, windowAttributes )
+    setAutocompleteWords( editWindowObject, wordList )
+# end of AutocompleteFunctions.installAutocompleteWords
+
+
+def addAutocompleteWordChars( editWindowObject, words ) -> None:
+    """
+    Update the autocomplete word characters for the edit window
+        from the set of all characters used in the given words.
+    """
+    newWordChars = set( ''.join( words ) )
+    newWordChars.difference_update( editWindowObject.autocompleteWordChars, ' .' )
+    if newWordChars:
+        if BibleOrgSysGlobals.debugFlag: assert '\n' not in newWordChars and '\r' not in newWordChars
+        editWindowObject.autocompleteWordChars += ''.join( sorted( newWordChars ) )
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            vPrint( 'Quiet', debuggingThisModule, "    addAutocompleteWordChars added {!r} as new wordChars".format( ''.join( sorted( newWordChars ) ) ) )
+# end of AutocompleteFunctions.addAutocompleteWordChars
+
+
 def setAutocompleteWords( editWindowObject, wordList, append=False ):
     """
     Given a word list, set the entries into the autocomplete words
@@ -76,6 +172,13 @@ def setAutocompleteWords( editWindowObject, wordList, append=False ):
 
     Note that the original word order is preserved (if the supplied wordList has an order)
         so that more common/likely words can appear at the top of the list if desired.
+
+    The wordList can also be a dict containing word counts,
+        in which case the counts are used to rank the words
+        (and in append mode, are added to the counts of any existing words),
+        or an already built AutocompleteIndex.
+
+    The words are stored in an AutocompleteIndex (in editWindowObject.autocompleteWords).
     """
     logging.info( "AutocompleteFunctions.setAutocompleteWords( …, {}, {} )".format( len(wordList), append ) )
     if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
@@ -84,60 +187,41 @@ def setAutocompleteWords( editWindowObject, wordList, append=False ):
         BiblelatorGlobals.theApp.setDebugText( "setAutocompleteWords…" )
 
     BiblelatorGlobals.theApp.setWaitStatus( _("Setting autocomplete words…") )
-    if not append: editWindowObject.autocompleteWords = {}
-
-    for word in wordList:
-        #if "'" not in word and '1' not in word:
-            #if '(' in word and ')' not in word: # perhaps something like we(excl
-                #word = word + ')' # append a matching/final parenthesis
-        if len(word) >= editWindowObject.autocompleteMinLength:
-            firstLetter, remainder = word[0], word[1:]
-            if firstLetter not in editWindowObject.autocompleteWords: editWindowObject.autocompleteWords[firstLetter] = []
-            if remainder in editWindowObject.autocompleteWords[firstLetter]:
-                if 0 and BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-                    vPrint( 'Quiet', debuggingThisModule, "    setAutocompleteWords discarded {!r} duplicate".format( word ) )
-            else: # not already in the list
-                editWindowObject.autocompleteWords[firstLetter].append( remainder )
-                for char in word:
-                    if char not in editWindowObject.autocompleteWordChars:
-                        if BibleOrgSysGlobals.debugFlag: assert char not in '\n\r'
-                        if char not in ' .':
-                            editWindowObject.autocompleteWordChars += char
-                            if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-                                vPrint( 'Quiet', debuggingThisModule, "    setAutocompleteWords added {!r} as new wordChar".format( char ) )
-        #elif BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-            #dPrint( 'Quiet', debuggingThisModule, "    setAutocompleteWords discarded {!r} as too short".format( word ) )
-        #elif BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-            #if "'" not in word:
-                #dPrint( 'Quiet', debuggingThisModule, "    setAutocompleteWords discarded {!r} as unwanted".format( word ) )
+
+    if isinstance( wordList, AutocompleteIndex ): # already built (e.g., by a background thread)
+        editWindowObject.autocompleteWords = wordList
+        addAutocompleteWordChars( editWindowObject, wordList.getCharacters() )
+    elif append: # merge the new words into the existing index
+        acceptedWords = filterAutocompleteWords( wordList, editWindowObject.autocompleteMinLength )
+        addAutocompleteWordChars( editWindowObject, acceptedWords )
+        if isinstance( wordList, dict ): editWindowObject.autocompleteWords.addWordCounts( acceptedWords )
+        else: editWindowObject.autocompleteWords.appendWords( list( acceptedWords ) )
+    else:
+        editWindowObject.autocompleteWords = buildAutocompleteIndex( wordList, editWindowObject.autocompleteMinLength )
+        addAutocompleteWordChars( editWindowObject, editWindowObject.autocompleteWords.getCharacters() )
 
     if BibleOrgSysGlobals.debugFlag and debuggingThisModule: # write wordlist
         vPrint( 'Quiet', debuggingThisModule, "  setAutocompleteWords: Writing autocomplete words to file…" )
-        sortedKeys = sorted( editWindowObject.autocompleteWords.keys() )
         with open( 'autocompleteWordList.txt', 'wt', encoding='utf-8' ) as wordFile:
             wordCount = 0
-            for firstLetter in sortedKeys:
-                for remainder in sorted( editWindowObject.autocompleteWords[firstLetter] ):
-                    wordFile.write( firstLetter+remainder )
-                    wordCount += 1
-                    if wordCount == 8: wordFile.write( '\n' ); wordCount = 0
-                    else: wordFile.write( ' ' )
+            for word in editWindowObject.autocompleteWords: # in sorted order
+                wordFile.write( word )
+                wordCount += 1
+                if wordCount == 8: wordFile.write( '\n' ); wordCount = 0
+                else: wordFile.write( ' ' )
 
     if BibleOrgSysGlobals.debugFlag: # print detailed stats
-        sortedKeys = sorted( editWindowObject.autocompleteWords.keys() )
-        vPrint( 'Never', debuggingThisModule, "  autocomplete first letters", len(editWindowObject.autocompleteWords), sortedKeys )
-        grandtotal = 0
-        wordNumTotals = defaultdict( int )
-        for firstLetter in sortedKeys:
-            total = len(editWindowObject.autocompleteWords[firstLetter])
-            for wordRemainder in editWindowObject.autocompleteWords[firstLetter]:
-                wordNumTotals[wordRemainder.count(' ')] += 1
-            if debuggingThisModule:
-                vPrint( 'Quiet', debuggingThisModule, "    {!r} {:,}{}" \
-                    .format( firstLetter, total, '' if total>19 else ' '+str(editWindowObject.autocompleteWords[firstLetter]) ) )
-            grandtotal += total
+        firstLetterTotals, wordNumTotals = defaultdict( int ), defaultdict( int )
+        for word in editWindowObject.autocompleteWords:
+            firstLetterTotals[word[0]] += 1
+            wordNumTotals[word.count(' ')] += 1
+        sortedKeys = sorted( firstLetterTotals.keys() )
+        vPrint( 'Never', debuggingThisModule, "  autocomplete first letters", len(firstLetterTotals), sortedKeys )
+        if debuggingThisModule:
+            for firstLetter in sortedKeys:
+                vPrint( 'Quiet', debuggingThisModule, "    {!r} {:,}".format( firstLetter, firstLetterTotals[firstLetter] ) )
         #if BibleOrgSysGlobals.debugFlag or BibleOrgSysGlobals.verbosityLevel > 1:
-        vPrint( 'Quiet', debuggingThisModule, "  autocomplete total words loaded = {:,}".format( grandtotal ) )
+        vPrint( 'Quiet', debuggingThisModule, "  autocomplete total words loaded = {:,}".format( len(editWindowObject.autocompleteWords) ) )
         if debuggingThisModule:
             for spaceCount in wordNumTotals:
                 vPrint( 'Quiet', debuggingThisModule, "    {} words: {}".format( spaceCount+1, wordNumTotals[spaceCount] ) )
@@ -149,174 +233,280 @@ def setAutocompleteWords( editWindowObject, wordList, append=False ):
 
 internalMarkers = None
 DUMMY_VALUE = 999999 # Some number bigger than the number of characters in a line
+MAX_SEQUENCE_WORDS = 5 # Longest multiple word sequences that are counted
+
+def getInternalMarkers() -> list:
+    """
+    Get our list of internal (character and note) markers (with backslashes)
+        loading it the first time that it's needed.
+    """
+    global internalMarkers
+    if internalMarkers is None: # Get our list of markers -- note that the more common note markers are first
+        internalMarkers = BibleOrgSysGlobals.loadedUSFMMarkers.getNoteMarkersList() \
+            + BibleOrgSysGlobals.loadedUSFMMarkers.getCharacterMarkersList( includeBackslash=False, includeEndMarkers=False, includeNestedMarkers=True, expandNumberableMarkers=True )
+        internalMarkers = ['\\'+marker for marker in internalMarkers]
+    return internalMarkers
+# end of AutocompleteFunctions.getInternalMarkers
+
+
+def makeInternalMarkersRegex( internalMarkers:list ):
+    """
+    Given the list of internal markers (with backslashes),
+        return a compiled regex which finds any of them
+        followed by a space or an asterisk (i.e., opening or closing markers).
+    """
+    return re.compile( '\\\\(?:{})[ *]'.format( '|'.join( re.escape( marker[1:] ) for marker in internalMarkers ) ) )
+# end of AutocompleteFunctions.makeInternalMarkersRegex
+
 
-def countBookWords( BBB, internalBible, filename, isCurrentBook, internalMarkers ):
+def countLineWords( textLine:str, wordCounts:dict, internalMarkersRegex ) -> None:
+    """
+    Count the words, and the multiple word sequences (up to MAX_SEQUENCE_WORDS long)
+        in a line of USFM text, adding them into the wordCounts dict.
+
+    Internal markers are removed (using the regex from makeInternalMarkersRegex)
+        and em-dash and en-dash are treated as word break characters.
+
+    Note: Punctuation etc. is NOT removed
+        except for END_CHARS_TO_REMOVE at the end of single words and word sequences.
+
+    This is called for every line of every book, so the markers are all removed
+        with one (precompiled) regex, and the words are only scanned once:
+        each word sequence is built by extending the previous one
+        and stops as soon as a word ends a sentence.
+    """
+    #dPrint( 'Quiet', debuggingThisModule, "countLineWords( {!r} )".format( textLine ) )
+    if '\\' in textLine: # we have internal markers to remove
+        textLine = internalMarkersRegex.sub( ' ', textLine )
+    words = textLine.replace('—','— ').replace('–','– ').split() # Treat em-dash and en-dash as word break characters
+
+    # Now look for (and count) single and some multiple word sequences
+    for wx,word in enumerate( words ):
+        if 'XXX' in word: continue # This is used in the Matigsalug project to mark errors
+        singleWord = word.rstrip( END_CHARS_TO_REMOVE ) # Remove certain final punctuation
+        if len(singleWord) > 2: wordCounts[singleWord] += 1
+
+        sequence = word
+        for nextWord in words[wx+1:wx+MAX_SEQUENCE_WORDS]:
+            if sequence[-1] == '.': break # don't go across sentence boundaries
+            sequence += ' ' + nextWord
+            #dPrint( 'Quiet', debuggingThisModule, 'sequence', repr(sequence) )
+            wordCounts[sequence[:-1] if sequence[-1] in END_CHARS_TO_REMOVE else sequence] += 1
+# end of AutocompleteFunctions.countLineWords
+
+
+def countBookWords( sourceFolder, filename, encoding, internalMarkers ):
     """
     Find all the words in the Bible book and their usage counts.
 
     Note that this function doesn't use the internalBible books
-        but rather loads the USFM (text) files directly.
+        but rather loads the USFM (text) files directly,
+        so only the (small) folder, filename, and encoding parameters are needed
+        (which are cheap to pass to another process).
 
     Note also that the internalMarkersList has to be passed as a paramter,
         because multi-processing on Windows can't access global variables.
 
     Returns a dictionary containing the results for the book.
     """
-    logging.debug( "countBookWords( {}, {}, {} )".format( BBB, internalBible, filename ) )
+    logging.debug( "countBookWords( {}, {}, {} )".format( sourceFolder, filename, encoding ) )
     if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-        vPrint( 'Quiet', debuggingThisModule, "countBookWords( {}, {}, {} )".format( BBB, internalBible, filename ) )
-    if BBB in AVOID_BOOKS:
-        #dPrint( 'Quiet', debuggingThisModule, "Didn't load autocomplete words from {} {}".format( internalBible.getAName(), BBB ) )
-        return # Sometimes these books contain words from other languages, etc.
-
-    countIncrement = 3 if isCurrentBook else 1 # Each word in current book counts higher so appears higher in the list
-    # NOTE: This idea fails as soon as they change books in the edit window
-    #       as the word lists are only loaded once at startup. (A reasonable compromise I think.)
+        vPrint( 'Quiet', debuggingThisModule, "countBookWords( {}, {}, {} )".format( sourceFolder, filename, encoding ) )
 
-    encoding = None
     if encoding is None: encoding = 'utf-8'
+    USFMFilepath = os.path.join( sourceFolder, filename )
+    with open( USFMFilepath, 'rt', encoding=encoding ) as bookFile:
+        return countBookLinesWords( bookFile, internalMarkers, USFMFilepath )
+# end of AutocompleteFunctions.countBookWords
+
+
+def countBookLinesWords( bookLines, internalMarkers, sourceName:str ):
+    """
+    Find all the words (and their usage counts) in the lines of a USFM Bible book,
+        e.g., from an open book file, or from the split text of a book that's being saved.
+
+    sourceName is only used for log messages.
+
+    Returns a dictionary containing the results for the book.
+    """
     lastLine, lineCount, lineDuples, lastMarker = '', 0, [], None
     wordCounts = defaultdict( int )
 
-    def countWords( textLine ):
-        """
-        Note: Punctuation etc. is NOT removed.
-        """
-        #dPrint( 'Quiet', debuggingThisModule, "countWords( {!r} )".format( textLine ) )
-        if '\\' in textLine: # we have internal markers to remove
-            #dPrint( 'Quiet', debuggingThisModule, "  INT", marker, textLine )
-            for iMarker in internalMarkers:
-                #dPrint( 'Quiet', debuggingThisModule, "   GOT", repr(iMarker) )
-                textLine = textLine.replace( iMarker+' ',' ' ).replace( iMarker+'*',' ' )
-                if not '\\' in textLine: break
-            #dPrint( 'Quiet', debuggingThisModule, "  NOW", marker, textLine )
-        words = textLine.replace('—','— ').replace('–','– ').split() # Treat em-dash and en-dash as word break characters
-
-        # Now look for (and count) single and some multiple word sequences
-        for wx,word in enumerate( words ):
-            if not word: continue
-            if 'XXX' in word: continue # This is used in the Matigsalug project to mark errors
-            singleWord = word
-            while singleWord and singleWord[-1] in END_CHARS_TO_REMOVE:
-                singleWord = singleWord[:-1] # Remove certain final punctuation
-            if len(singleWord) > 2: wordCounts[singleWord] += countIncrement
-
-            #if word[-1] not in '—.–':
-            if wx < len(words)-1: # it's not the last word in the line
-                doubleWord = word+' '+words[wx+1]
-                #dPrint( 'Quiet', debuggingThisModule, 'doubleWord', repr(doubleWord) )
-                adjustedDoubleWord = doubleWord[:-1] if doubleWord[-1] in END_CHARS_TO_REMOVE else doubleWord
-                if '. ' not in adjustedDoubleWord: # don't go across sentence boundaries
-                    wordCounts[adjustedDoubleWord] += countIncrement
-                if wx < len(words)-2: # there's still two words after this one
-                    tripleWord = doubleWord+' '+words[wx+2]
-                    #dPrint( 'Quiet', debuggingThisModule, 'tripleWord', repr(tripleWord) )
-                    adjustedTripleWord = tripleWord[:-1] if tripleWord[-1] in END_CHARS_TO_REMOVE else tripleWord
-                    if '. ' not in adjustedTripleWord: # don't go across sentence boundaries
-                        wordCounts[adjustedTripleWord] += countIncrement
-                    if wx < len(words)-3: # there's still three words after this one
-                        quadWord = tripleWord+' '+words[wx+3]
-                        #dPrint( 'Quiet', debuggingThisModule, 'quadWord', repr(quadWord) )
-                        adjustedQuadWord = quadWord[:-1] if quadWord[-1] in END_CHARS_TO_REMOVE else quadWord
-                        if '. ' not in adjustedQuadWord: # don't go across sentence boundaries
-                            wordCounts[adjustedQuadWord] += countIncrement
-                        if wx < len(words)-4: # there's still four words after this one
-                            quinWord = quadWord+' '+words[wx+4]
-                            #dPrint( 'Quiet', debuggingThisModule, 'quinWord', repr(quinWord) )
-                            adjustedQuinWord = quinWord[:-1] if quinWord[-1] in END_CHARS_TO_REMOVE else quinWord
-                            if '. ' not in adjustedQuinWord: # don't go across sentence boundaries
-                                wordCounts[adjustedQuinWord] += countIncrement
-    # end of countWords
-
-    # main code for countBookWords
-    USFMFilepath = os.path.join( internalBible.sourceFolder, filename )
-    with open( USFMFilepath, 'rt', encoding=internalBible.encoding ) as bookFile:
-        try:
-            for line in bookFile:
-                lineCount += 1
-                if lineCount==1 and encoding.lower()=='utf-8' and line[0]==chr(65279): #U+FEFF
-                    logging.info( "countBookWords: Detected Unicode Byte Order Marker (BOM) in {}".format( USFMFilepath ) )
-                    line = line[1:] # Remove the Unicode Byte Order Marker (BOM)
-                if line and line[-1]=='\n': line=line[:-1] # Removing trailing newline character
-                if not line: continue # Just discard blank lines
-                lastLine = line
-                #dPrint( 'Quiet', debuggingThisModule, 'USFM file line is {!r}'.format( line ) )
-                #if line[0:2]=='\\_': continue # Just discard Toolbox header lines
-                if line[0]=='#': continue # Just discard comment lines
-
-                if line[0]!='\\': # Not a SFM line
-                    if lastMarker is None: # We don't have any SFM data lines yet
-                        logging.error( "countBookWords: Non-USFM line in {} -- line ignored at #{}".format( USFMFilepath, lineCount) )
-                        #dPrint( 'Quiet', debuggingThisModule, "SFMFile.py: XXZXResult is", lineDuples, len(line) )
-                        #for x in range(0, min(6,len(line))):
-                            #dPrint( 'Quiet', debuggingThisModule, x, "'" + str(ord(line[x])) + "'" )
-                        #raise IOError('Oops: Line break on last line ??? not handled here "' + line + '"')
-                    else: # Append this continuation line
-                        if lastMarker in USFM_PRINTABLE_MARKERS:
-                            #oldmarker, oldtext = lineDuples.pop()
-                            #dPrint( 'Quiet', debuggingThisModule, "Popped",oldmarker,oldtext)
-                            #dPrint( 'Quiet', debuggingThisModule, "Adding", line, "to", oldmarker, oldtext)
-                            #lineDuples.append( (oldmarker, oldtext+' '+line) )
-                            countWords( line )
-                        continue
-
-                lineAfterBackslash = line[1:]
-                si1 = lineAfterBackslash.find( ' ' )
-                si2 = lineAfterBackslash.find( '*' )
-                si3 = lineAfterBackslash.find( '\\' )
-                if si1==-1: si1 = DUMMY_VALUE
-                if si2==-1: si2 = DUMMY_VALUE
-                if si3==-1: si3 = DUMMY_VALUE
-                si = min( si1, si2, si3 )
-
-                if si != DUMMY_VALUE:
-                    if si == si3: # Marker stops before a backslash
-                        marker = lineAfterBackslash[:si3]
-                        text = lineAfterBackslash[si3:]
-                    elif si == si2: # Marker stops at an asterisk
-                        marker = lineAfterBackslash[:si2+1]
-                        text = lineAfterBackslash[si2+1:]
-                    elif si == si1: # Marker stops before a space
-                        marker = lineAfterBackslash[:si1]
-                        text = lineAfterBackslash[si1+1:] # We drop the space completely
-                else: # The line is only the marker
-                    marker = lineAfterBackslash
-                    text = ''
-
-                #dPrint( 'Quiet', debuggingThisModule, " ", repr(marker), repr(text) )
-                #if marker not in ignoreSFMs:
-                if marker in USFM_PRINTABLE_MARKERS and text:
-                    #dPrint( 'Quiet', debuggingThisModule, "   1", marker, text )
-                    if marker == 'v' and text[0].isdigit():
-                        try: text = text.split( None, 1 )[1]
-                        except IndexError: text = ''
-                    #dPrint( 'Quiet', debuggingThisModule, "   2", marker, text )
-                    countWords( text )
-                    #if not lineDuples: # Just for detection of start of real USFM
-                        #lineDuples.append( (marker, text) )
-                lastMarker = marker
-
-        except UnicodeError as err:
-            vPrint( 'Quiet', debuggingThisModule, "Unicode error:", sys.exc_info()[0], err )
-            logging.critical( "countBookWords: Invalid line in {} -- line ignored at #{}".format( USFMFilepath, lineCount) )
-            if lineCount > 1: vPrint( 'Quiet', debuggingThisModule, 'Previous line was: ', lastLine )
-            #dPrint( 'Quiet', debuggingThisModule, line )
-            #raise
+    internalMarkersRegex = makeInternalMarkersRegex( internalMarkers )
+
+    try:
+        for line in bookLines:
+            lineCount += 1
+            if lineCount==1 and line and line[0]==chr(65279): #U+FEFF
+                logging.info( "countBookLinesWords: Detected Unicode Byte Order Marker (BOM) in {}".format( sourceName ) )
+                line = line[1:] # Remove the Unicode Byte Order Marker (BOM)
+            if line and line[-1]=='\n': line=line[:-1] # Removing trailing newline character
+            if not line: continue # Just discard blank lines
+            lastLine = line
+            #dPrint( 'Quiet', debuggingThisModule, 'USFM file line is {!r}'.format( line ) )
+            #if line[0:2]=='\\_': continue # Just discard Toolbox header lines
+            if line[0]=='#': continue # Just discard comment lines
+
+            if line[0]!='\\': # Not a SFM line
+                if lastMarker is None: # We don't have any SFM data lines yet
+                    logging.error( "countBookLinesWords: Non-USFM line in {} -- line ignored at #{}".format( sourceName, lineCount) )
+                    #dPrint( 'Quiet', debuggingThisModule, "SFMFile.py: XXZXResult is", lineDuples, len(line) )
+                    #for x in range(0, min(6,len(line))):
+                        #dPrint( 'Quiet', debuggingThisModule, x, "'" + str(ord(line[x])) + "'" )
+                    #raise IOError('Oops: Line break on last line ??? not handled here "' + line + '"')
+                else: # Append this continuation line
+                    if lastMarker in USFM_PRINTABLE_MARKERS:
+                        #oldmarker, oldtext = lineDuples.pop()
+                        #dPrint( 'Quiet', debuggingThisModule, "Popped",oldmarker,oldtext)
+                        #dPrint( 'Quiet', debuggingThisModule, "Adding", line, "to", oldmarker, oldtext)
+                        #lineDuples.append( (oldmarker, oldtext+' '+line) )
+                        countLineWords( line, wordCounts, internalMarkersRegex )
+                    continue
+
+            lineAfterBackslash = line[1:]
+            si1 = lineAfterBackslash.find( ' ' )
+            si2 = lineAfterBackslash.find( '*' )
+            si3 = lineAfterBackslash.find( '\\' )
+            if si1==-1: si1 = DUMMY_VALUE
+            if si2==-1: si2 = DUMMY_VALUE
+            if si3==-1: si3 = DUMMY_VALUE
+            si = min( si1, si2, si3 )
+
+            if si != DUMMY_VALUE:
+                if si == si3: # Marker stops before a backslash
+                    marker = lineAfterBackslash[:si3]
+                    text = lineAfterBackslash[si3:]
+                elif si == si2: # Marker stops at an asterisk
+                    marker = lineAfterBackslash[:si2+1]
+                    text = lineAfterBackslash[si2+1:]
+                elif si == si1: # Marker stops before a space
+                    marker = lineAfterBackslash[:si1]
+                    text = lineAfterBackslash[si1+1:] # We drop the space completely
+            else: # The line is only the marker
+                marker = lineAfterBackslash
+                text = ''
+
+            #dPrint( 'Quiet', debuggingThisModule, " ", repr(marker), repr(text) )
+            #if marker not in ignoreSFMs:
+            if marker in USFM_PRINTABLE_MARKERS and text:
+                #dPrint( 'Quiet', debuggingThisModule, "   1", marker, text )
+                if marker == 'v' and text[0].isdigit():
+                    try: text = text.split( None, 1 )[1]
+                    except IndexError: text = ''
+                #dPrint( 'Quiet', debuggingThisModule, "   2", marker, text )
+                countLineWords( text, wordCounts, internalMarkersRegex )
+                #if not lineDuples: # Just for detection of start of real USFM
+                    #lineDuples.append( (marker, text) )
+            lastMarker = marker
+
+    except UnicodeError as err:
+        vPrint( 'Quiet', debuggingThisModule, "Unicode error:", sys.exc_info()[0], err )
+        logging.critical( "countBookLinesWords: Invalid line in {} -- line ignored at #{}".format( sourceName, lineCount) )
+        if lineCount > 1: vPrint( 'Quiet', debuggingThisModule, 'Previous line was: ', lastLine )
+        #dPrint( 'Quiet', debuggingThisModule, line )
+        #raise
 
     return wordCounts
-# end of AutocompleteFunctions.countBookWords
+# end of AutocompleteFunctions.countBookLinesWords
+
+
+def initialiseAutocompleteWorker( workerInternalMarkers:list ) -> None:
+    """
+    Called once in each new process of the shared autocomplete pool.
+
+    The internal markers are passed here once (rather than with every book),
+        because multi-processing on Windows can't access global variables.
+    """
+    global internalMarkers
+    internalMarkers = workerInternalMarkers
+    BibleOrgSysGlobals.alreadyMultiprocessing = True
+# end of AutocompleteFunctions.initialiseAutocompleteWorker
 
 
 def countBookWordsHelper( parameters ):
     """
-    Parameter parameters is a 4-tuple containing the BBB, folder, filename, currentBook flag, and internalMarkersList
+    Parameter parameters is a 3-tuple containing the folder, filename, and encoding.
 
-    The internalMarkers have to be passed, because multi-processing on Windows can't access global variables.
+    This is run in one of the shared autocomplete pool processes
+        which already have the internalMarkers list.
     """
-    return countBookWords( *parameters )
+    return countBookWords( *parameters, internalMarkers )
 # end of AutocompleteFunctions.countBookWordsHelper
 
 
+autocompletePool = None
+autocompletePoolLock = threading.Lock()
+
+def getAutocompletePool():
+    """
+    Returns the multiprocessing pool used for counting Bible book words.
+
+    The pool is created the first time that it's needed,
+        and then kept for the life of the program and shared by all edit windows
+        (because starting the processes takes longer than counting the words in a small project).
+    """
+    global autocompletePool
+    with autocompletePoolLock: # in case two background threads want it at the same time
+        if autocompletePool is None:
+            vPrint( 'Normal', debuggingThisModule, "Autocomplete: starting {} word counting processes…".format( BibleOrgSysGlobals.maxProcesses ) )
+            autocompletePool = multiprocessing.Pool( processes=BibleOrgSysGlobals.maxProcesses,
+                                        initializer=initialiseAutocompleteWorker, initargs=(getInternalMarkers(),) )
+        return autocompletePool
+# end of AutocompleteFunctions.getAutocompletePool
+
+
+def closeAutocompletePool() -> None:
+    """
+    Stop the shared autocomplete processes (if they were ever started).
+
+    Called as the program closes.
+    """
+    global autocompletePool
+    with autocompletePoolLock:
+        if autocompletePool is not None:
+            autocompletePool.terminate()
+            autocompletePool = None
+# end of AutocompleteFunctions.closeAutocompletePool
+
+
+def gatherBibleBookAutocompleteWords( internalBible, currentBBB, progressFunction=None ):
+    """
+    Find all the existing words in a USFM or Paratext Bible book
+        to fill the autocomplete mechanism.
+
+    This doesn't use tkinter so can be run in a background thread.
+
+    Returns the word counts, and a dictionary of attributes to be set on the edit window.
+    """
+    fnPrint( debuggingThisModule, "gatherBibleBookAutocompleteWords( {}, {} )".format( internalBible, currentBBB ) )
+
+    if not internalBible.preloadDone: internalBible.preload()
+    foundFilename = None
+    for BBB2,filename in internalBible.maximumPossibleFilenameTuples:
+        if BBB2 == currentBBB: foundFilename = filename; break
+    if progressFunction is not None: progressFunction( 0 )
+
+    if currentBBB in AVOID_BOOKS or foundFilename is None: # Sometimes these books contain words from other languages, etc.
+        wordCountResults = None
+    else: wordCountResults = countBookWords( internalBible.sourceFolder, foundFilename, internalBible.encoding, getInternalMarkers() )
+    #dPrint( 'Quiet', debuggingThisModule, 'wordCountResults', len(wordCountResults) )
+
+    # The word counts are used by the autocomplete index to put the most common words first
+    autocompleteCounts = {}
+    if wordCountResults:
+        for word,count in wordCountResults.items():
+            if ' ' not in word or count >= BIBLE_BOOK_MIN_MULTIWORD_COUNT:
+                autocompleteCounts[word] = count
+            #else: vPrint( 'Quiet', debuggingThisModule, 'loadBibleBookAutocompleteWords discarding', repr(word) )
+    else:
+        vPrint( 'Quiet', debuggingThisModule, "Why did {} have no words???".format( currentBBB ) )
+    #dPrint( 'Quiet', debuggingThisModule, 'autocompleteCounts', len(autocompleteCounts) )
+    # Remember the counts so that the index can be updated when the book is saved
+    return autocompleteCounts, { 'autocompleteBookWordCounts':{ currentBBB:dict( wordCountResults ) if wordCountResults else {} },
+                                 'autocompleteWeightedBBB':None, 'addAllNewWords':True }
+# end of AutocompleteFunctions.gatherBibleBookAutocompleteWords
+
+
 def loadBibleBookAutocompleteWords( editWindowObject ):
     """
     Load all the existing words in a USFM or Paratext Bible book
@@ -336,125 +526,541 @@ def loadBibleBookAutocompleteWords( editWindowObject ):
     #dPrint( 'Quiet', debuggingThisModule, "  got BBB", repr(BBB) )
     if currentBBB == 'UNK': return # UNKnown book -- no use here
 
-    if not editWindowObject.internalBible.preloadDone: editWindowObject.internalBible.preload()
-    foundFilename = None
-    for BBB2,filename in editWindowObject.internalBible.maximumPossibleFilenameTuples:
-        if BBB2 == currentBBB: foundFilename = filename; break
+    installAutocompleteWords( editWindowObject, *gatherBibleBookAutocompleteWords( editWindowObject.internalBible, currentBBB ) )
+# end of AutocompleteFunctions.loadBibleBookAutocompleteWords
 
-    wordCountResults = countBookWords( currentBBB, editWindowObject.internalBible, foundFilename, False )
-    #dPrint( 'Quiet', debuggingThisModule, 'wordCountResults', len(wordCountResults) )
 
-    # Would be nice to load current book first, but we don't know it yet
-    autocompleteWords = []
-    #if BibleOrgSysGlobals.debugFlag:
-        #autocompleteWords = [ 'Lord God', 'Lord your(pl) God', '(is)', '(are)', '(were)', '(one who)', ]
+
+def getWordCountCacheFilepath( internalBible ):
+    """
+    Returns the path of the file used to save the word counts for each book
+        of the given Bible (so that unchanged books don't have to be recounted
+        each time that an edit window is opened).
+
+    The cache files are kept in the Biblelator data folder (rather than the
+        project folder, which might belong to another program like Paratext).
+
+    Returns None if there's no application (e.g., when running the benchmarks).
+    """
+    if BiblelatorGlobals.theApp is None: return None
+    sourceFolder = os.path.abspath( internalBible.sourceFolder )
+    folderHash = hashlib.md5( sourceFolder.encode( 'utf-8' ) ).hexdigest()[:12]
+    cacheFilename = '{}_{}.wordCounts.pickle'.format( internalBible.abbreviation if internalBible.abbreviation else 'Bible', folderHash )
+    return BiblelatorGlobals.theApp.homeFolderpath.joinpath( DATA_SUBFOLDER_NAME, CACHE_SUBFOLDER_NAME, cacheFilename )
+# end of AutocompleteFunctions.getWordCountCacheFilepath
+
+
+def loadWordCountCache( cacheFilepath ) -> dict:
+    """
+    Load the cached word counts for the books of a Bible.
+
+    Returns a dictionary indexed by book filename
+        containing 3-tuples being (mtime, filesize, wordCounts),
+        or an empty dictionary if there's no usable cache file.
+    """
+    fnPrint( debuggingThisModule, "loadWordCountCache( {} )".format( cacheFilepath ) )
+
     try:
-        # Sort the word-list for the book to put the most common words first
-        #dPrint( 'Quiet', debuggingThisModule, 'wordCountResults', currentBBB, discoveryResults )
-        #dPrint( 'Quiet', debuggingThisModule, currentBBB, 'mTWC', discoveryResults['mainTextWordCounts'] )
-        #qqq = sorted( discoveryResults['mainTextWordCounts'].items(), key=lambda c: -c[1] )
-        #dPrint( 'Quiet', debuggingThisModule, 'qqq', qqq )
-        for word,count in sorted( wordCountResults.items(),
-                                key=lambda duple: -duple[1] ):
-            if len(word) >= editWindowObject.autocompleteMinLength \
-            and word not in autocompleteWords: # just in case we had some (common) words in there already
-                if ' ' not in word or count > 4:
-                    autocompleteWords.append( word )
-                #else: vPrint( 'Quiet', debuggingThisModule, 'loadBibleBookAutocompleteWords discarding', repr(word) )
-    except KeyError:
-        vPrint( 'Quiet', debuggingThisModule, "Why did {} have no words???".format( currentBBB ) )
-        #pass # Nothing for this book
-    #dPrint( 'Quiet', debuggingThisModule, 'autocompleteWords', len(autocompleteWords) )
-    setAutocompleteWords( editWindowObject, autocompleteWords )
-    editWindowObject.addAllNewWords = True
-# end of AutocompleteFunctions.loadBibleBookAutocompleteWords
+        with open( cacheFilepath, 'rb' ) as cacheFile:
+            cacheData = pickle.load( cacheFile )
+    except FileNotFoundError: return {}
+    except Exception as err: # e.g., a corrupted or incompatible file
+        logging.warning( "loadWordCountCache: Unable to load {}: {}".format( cacheFilepath, err ) )
+        return {}
+    if not isinstance( cacheData, dict ) or cacheData.get( 'version' ) != WORD_COUNT_CACHE_VERSION:
+        return {}
+    return cacheData['books']
+# end of AutocompleteFunctions.loadWordCountCache
+
+
+def saveWordCountCache( cacheFilepath, bookCacheDict:dict ) -> None:
+    """
+    Save the word counts for the books of a Bible
+        (in the format returned by loadWordCountCache).
+
+    The file is written to a temporary file first and then renamed
+        so that an interrupted save can't leave a partial cache file.
+    """
+    fnPrint( debuggingThisModule, "saveWordCountCache( {}, {} )".format( cacheFilepath, len(bookCacheDict) ) )
 
+    try:
+        os.makedirs( os.path.dirname( cacheFilepath ), exist_ok=True )
+        tempFilepath = '{}.tmp'.format( cacheFilepath )
+        with open( tempFilepath, 'wb' ) as cacheFile:
+            pickle.dump( { 'version':WORD_COUNT_CACHE_VERSION, 'books':bookCacheDict }, cacheFile, pickle.HIGHEST_PROTOCOL )
+        os.replace( tempFilepath, cacheFilepath )
+    except OSError as err:
+        logging.error( "saveWordCountCache: Unable to save {}: {}".format( cacheFilepath, err ) )
+# end of AutocompleteFunctions.saveWordCountCache
 
 
-def loadBibleAutocompleteWords( editWindowObject ):
+def gatherBibleAutocompleteWords( internalBible, currentBBB, progressFunction=None ):
     """
-    Load all the existing words in a USFM or Paratext Bible Project
+    Find all the existing words in a USFM or Paratext Bible Project
         to fill the autocomplete mechanism.
 
-    This is rather slow because of course, the entire Bible has to be read and processed first.
+    This is rather slow because of course, the entire Bible has to be read and processed first
+        (except for any books whose word counts are still in the cache).
 
-    editWindowObject here is a USFM or ESFM edit window.
+    This doesn't use tkinter so can be run in a background thread.
 
-    NOTE: This list should theoretically be updated as the user enters new words!
+    Returns the word counts, and a dictionary of attributes to be set on the edit window.
     """
-    startTime = time.time()
-    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-        vPrint( 'Quiet', debuggingThisModule, "AutocompleteFunctions.loadBibleAutocompleteWords()" )
-        BiblelatorGlobals.theApp.setDebugText( "loadBibleAutocompleteWords…" )
+    fnPrint( debuggingThisModule, "gatherBibleAutocompleteWords( {}, {} )".format( internalBible, currentBBB ) )
 
-    global internalMarkers
-    if internalMarkers is None: # Get our list of markers -- note that the more common note markers are first
-        internalMarkers = BibleOrgSysGlobals.loadedUSFMMarkers.getNoteMarkersList() \
-            + BibleOrgSysGlobals.loadedUSFMMarkers.getCharacterMarkersList( includeBackslash=False, includeEndMarkers=False, includeNestedMarkers=True, expandNumberableMarkers=True )
-        internalMarkers = ['\\'+marker for marker in internalMarkers]
+    internalMarkers = getInternalMarkers()
+    if progressFunction is not None: progressFunction( 0 )
 
-    BiblelatorGlobals.theApp.setWaitStatus( _("Loading {} Bible words…").format( editWindowObject.projectName ) )
-    currentBBB = editWindowObject.currentVerseKey.getBBB()
-    vPrint( 'Never', debuggingThisModule, "  got current BBB", repr(currentBBB) )
-
-    if not editWindowObject.internalBible.preloadDone: editWindowObject.internalBible.preload()
+    if not internalBible.preloadDone: internalBible.preload()
+    sourceFolder = internalBible.sourceFolder
     bookWordCounts = {}
-    if editWindowObject.internalBible.maximumPossibleFilenameTuples:
-        if BibleOrgSysGlobals.maxProcesses > 1: # Load all the books as quickly as possible
-            parameters = [(BBB,editWindowObject.internalBible,filename,BBB==currentBBB,internalMarkers) for BBB,filename in editWindowObject.internalBible.maximumPossibleFilenameTuples] # Can only pass a single parameter to map
-            vPrint( 'Normal', debuggingThisModule, "Autocomplete: loading up to {} USFM books using {} processes…".format( len(editWindowObject.internalBible.maximumPossibleFilenameTuples), BibleOrgSysGlobals.maxProcesses ) )
+    if internalBible.maximumPossibleFilenameTuples:
+        # See which books have changed since their words were last counted
+        cacheFilepath = getWordCountCacheFilepath( internalBible )
+        oldBookCache = loadWordCountCache( cacheFilepath ) if cacheFilepath is not None else {}
+        newBookCache, booksToCount = {}, []
+        for BBB,filename in internalBible.maximumPossibleFilenameTuples:
+            if BBB in AVOID_BOOKS: continue # Sometimes these books contain words from other languages, etc.
+            fileStamp = getFileStamp( os.path.join( sourceFolder, filename ) )
+            try: cachedMTime, cachedSize, cachedCounts = oldBookCache[filename]
+            except KeyError: cachedMTime = cachedSize = None
+            if fileStamp == (cachedMTime, cachedSize):
+                bookWordCounts[BBB] = cachedCounts
+                newBookCache[filename] = oldBookCache[filename]
+            else: booksToCount.append( (BBB,filename,fileStamp) )
+        vPrint( 'Info', debuggingThisModule, "Autocomplete: using cached word counts for {} books; counting {} books".format( len(bookWordCounts), len(booksToCount) ) )
+
+        # Note: current book counts are multiplied below (so that the cached counts don't depend on the current book)
+        results = []
+        encoding = internalBible.encoding
+        if BibleOrgSysGlobals.maxProcesses > 1 and len(booksToCount) > 1: # Load all the books as quickly as possible
+            parameters = [(sourceFolder,filename,encoding) for _BBB,filename,_fileStamp in booksToCount] # Can only pass a single parameter to map
+            vPrint( 'Normal', debuggingThisModule, "Autocomplete: loading up to {} USFM books using {} processes…".format( len(booksToCount), BibleOrgSysGlobals.maxProcesses ) )
             vPrint( 'Normal', debuggingThisModule, "  NOTE: Outputs (including error & warning messages) from loading words from BibleOrgSys.Bible books may be interspersed." )
-            BibleOrgSysGlobals.alreadyMultiprocessing = True
-            with multiprocessing.Pool( processes=BibleOrgSysGlobals.maxProcesses ) as pool: # start worker processes
-                results = pool.map( countBookWordsHelper, parameters ) # have the pool do our loads
-                assert len(results) == len(editWindowObject.internalBible.maximumPossibleFilenameTuples)
-                for (BBB,filename),counts in zip( editWindowObject.internalBible.maximumPossibleFilenameTuples, results ):
-                    #dPrint( 'Quiet', debuggingThisModule, "XX", BBB, filename, len(counts) if counts else counts )
-                    bookWordCounts[BBB] = counts
-                BibleOrgSysGlobals.alreadyMultiprocessing = False
+            for counts in getAutocompletePool().imap( countBookWordsHelper, parameters ): # have the pool do our loads
+                results.append( counts )
+                if progressFunction is not None: progressFunction( 100 * len(results) // len(booksToCount) )
+            assert len(results) == len(booksToCount)
         else: # Just single threaded
             # Load the books one by one -- assuming that they have regular Paratext style filenames
-            for BBB,filename in editWindowObject.internalBible.maximumPossibleFilenameTuples:
-                #if BibleOrgSysGlobals.verbosityLevel>1 or BibleOrgSysGlobals.debugFlag:
-                    #dPrint( 'Quiet', debuggingThisModule, _("  USFMBible: Loading {} from {} from {}…").format( BBB, editWindowObject.internalBible.getAName(), editWindowObject.internalBible.sourceFolder ) )
-                bookWordCounts[BBB] = countBookWords( BBB, editWindowObject.internalBible, filename, BBB==currentBBB ) # also saves it
+            for _BBB,filename,_fileStamp in booksToCount:
+                results.append( countBookWords( sourceFolder, filename, encoding, internalMarkers ) )
+                if progressFunction is not None: progressFunction( 100 * len(results) // len(booksToCount) )
+        for (BBB,filename,fileStamp),counts in zip( booksToCount, results ):
+            #dPrint( 'Quiet', debuggingThisModule, "XX", BBB, filename, len(counts) if counts else counts )
+            counts = dict( counts ) if counts else {}
+            bookWordCounts[BBB] = counts
+            if fileStamp is not None:
+                newBookCache[filename] = (fileStamp[0], fileStamp[1], counts)
+
+        if cacheFilepath is not None and (booksToCount or len(newBookCache) != len(oldBookCache)):
+            saveWordCountCache( cacheFilepath, newBookCache )
     else:
-        logging.critical( "Autocomplete: " + _("No books to load in folder '{}'!").format( editWindowObject.internalBible.sourceFolder ) )
+        logging.critical( "Autocomplete: " + _("No books to load in folder '{}'!").format( sourceFolder ) )
 
     # Now combine the books
-    autocompleteCounts = {}
+    autocompleteCounts = defaultdict( int )
     for BBB,counts in bookWordCounts.items(): # combine word counts for all books
         #dPrint( 'Quiet', debuggingThisModule, "here", BBB, len(counts) )
-        if counts:
-            for word, count in counts.items():
-                #dPrint( 'Quiet', debuggingThisModule, "  ", word, count )
-                if len(word) >= editWindowObject.autocompleteMinLength:
-                    if word in autocompleteCounts: autocompleteCounts[word] += count
-                    else: autocompleteCounts[word] = count
+        countMultiplier = CURRENT_BOOK_COUNT_MULTIPLIER if BBB==currentBBB else 1
+        # NOTE: This idea fails as soon as they change books in the edit window
+        #       as the word lists are only loaded once at startup. (A reasonable compromise I think.)
+        for word, count in counts.items():
+            #dPrint( 'Quiet', debuggingThisModule, "  ", word, count )
+            autocompleteCounts[word] += count * countMultiplier
     #dPrint( 'Quiet', debuggingThisModule, "there", len(autocompleteCounts) )
 
-    # Now make our list sorted with most common words first
-    autocompleteWords = []
-    #if BibleOrgSysGlobals.debugFlag: # add some multi-word entries just for testing
-        #autocompleteWords = [ 'Lord God', 'Lord your(pl) God', '(is)', '(are)', '(were)', '(one who)', ]
-    for word,count in sorted( autocompleteCounts.items(), key=lambda duple: -duple[1] ):
-        if ' ' not in word or count > 9:
-            autocompleteWords.append( word )
-        #else:
-            #dPrint( 'Quiet', debuggingThisModule, 'loadBibleAutocompleteWords discarding', repr(word) )
-            #if ' ' not in word: halt
-    #dPrint( 'Never', debuggingThisModule, 'acW', autocompleteWords )
+    # Now discard the less common multi-word sequences
+    #   (The word counts are used by the autocomplete index to put the most common words first)
+    autocompleteCounts = { word:count for word,count in autocompleteCounts.items()
+                                        if ' ' not in word or count >= BIBLE_MIN_MULTIWORD_COUNT }
+    #dPrint( 'Quiet', debuggingThisModule, 'autocompleteCounts', len(autocompleteCounts) )
+
+    # Remember the counts so that the index can be updated when a book is saved
+    return autocompleteCounts, { 'autocompleteBookWordCounts':bookWordCounts,
+                                 'autocompleteWeightedBBB':currentBBB, 'addAllNewWords':True }
+# end of AutocompleteFunctions.gatherBibleAutocompleteWords
+
+
+def loadBibleAutocompleteWords( editWindowObject ):
+    """
+    Load all the existing words in a USFM or Paratext Bible Project
+        to fill the autocomplete mechanism.
 
-    #dPrint( 'Quiet', debuggingThisModule, 'autocompleteWords', len(autocompleteWords) )
-    setAutocompleteWords( editWindowObject, autocompleteWords )
+    This is rather slow because of course, the entire Bible has to be read and processed first.
+
+    editWindowObject here is a USFM or ESFM edit window.
+
+    NOTE: This list should theoretically be updated as the user enters new words!
+    """
+    startTime = time.time()
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        vPrint( 'Quiet', debuggingThisModule, "AutocompleteFunctions.loadBibleAutocompleteWords()" )
+        BiblelatorGlobals.theApp.setDebugText( "loadBibleAutocompleteWords…" )
+
+    BiblelatorGlobals.theApp.setWaitStatus( _("Loading {} Bible words…").format( editWindowObject.projectName ) )
+    currentBBB = editWindowObject.currentVerseKey.getBBB()
+    vPrint( 'Never', debuggingThisModule, "  got current BBB", repr(currentBBB) )
+
+    installAutocompleteWords( editWindowObject, *gatherBibleAutocompleteWords( editWindowObject.internalBible, currentBBB ) )
     if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
         vPrint( 'Quiet', debuggingThisModule, "loadBibleAutocompleteWords took", time.time()-startTime )
-    editWindowObject.addAllNewWords = True
 # end of AutocompleteFunctions.loadBibleAutocompleteWords
 
 
 
-def loadHunspellAutocompleteWords( editWindowObject, dictionaryFilepath, encoding='utf-8' ):
+class AutocompleteLoadCancelled( Exception ):
+    """
+    Raised (inside the background thread) to abandon loading autocomplete words.
+    """
+    pass
+# end of class AutocompleteLoadCancelled
+
+
+class AutocompleteLoaderThread( threading.Thread ):
+    """
+    Runs one of the gather…AutocompleteWords functions
+        and then builds the AutocompleteIndex in a background thread
+        so that the user can keep typing while the words are loaded.
+
+    No tkinter calls are made from this thread:
+        the edit window must call getResults() periodically (using after())
+        and install the index itself once it's ready.
+    """
+    def __init__( self, gatherFunction, gatherArgs, minLength:int ):
+        """
+        The gatherFunction is called with the gatherArgs
+            plus a progressFunction keyword argument.
+        """
+        fnPrint( debuggingThisModule, "AutocompleteLoaderThread.__init__( {}, {}, {} )".format( gatherFunction.__name__, gatherArgs, minLength ) )
+        threading.Thread.__init__( self, name='AutocompleteLoader', daemon=True ) # daemon so it doesn't stop the program from exiting
+        self.gatherFunction, self.gatherArgs, self.minLength = gatherFunction, gatherArgs, minLength
+        self.resultsQueue = queue.Queue()
+        self.cancelEvent = threading.Event()
+    # end of AutocompleteLoaderThread.__init__
+
+
+    def reportProgress( self, percentage ) -> None:
+        """
+        Called from the gather function (inside our thread) to report progress
+            (and to give us a chance to abandon the work if we've been cancelled).
+
+        percentage may be None if the amount of work is unknown.
+        """
+        if self.cancelEvent.is_set(): raise AutocompleteLoadCancelled
+        self.resultsQueue.put( ('Progress', percentage) )
+    # end of AutocompleteLoaderThread.reportProgress
+
+
+    def run( self ) -> None:
+        """
+        The code that's executed in the background thread.
+        """
+        try:
+            wordList, windowAttributes = self.gatherFunction( *self.gatherArgs, progressFunction=self.reportProgress )
+            self.reportProgress( 100 )
+            minLength = max( self.minLength, windowAttributes.get( 'autocompleteMinLength', 0 ) )
+            autocompleteIndex = buildAutocompleteIndex( wordList, minLength )
+            if self.cancelEvent.is_set(): raise AutocompleteLoadCancelled
+            self.resultsQueue.put( ('Done', (autocompleteIndex, windowAttributes)) )
+        except AutocompleteLoadCancelled:
+            vPrint( 'Info', debuggingThisModule, "AutocompleteLoaderThread cancelled" )
+        except Exception as err:
+            logging.error( "AutocompleteLoaderThread: {} failed: {}".format( self.gatherFunction.__name__, err ) )
+            self.resultsQueue.put( ('Error', err) )
+    # end of AutocompleteLoaderThread.run
+
+
+    def cancel( self ) -> None:
+        """
+        Ask the background thread to stop as soon as it can.
+
+        Any results are discarded.
+        """
+        fnPrint( debuggingThisModule, "AutocompleteLoaderThread.cancel()" )
+        self.cancelEvent.set()
+    # end of AutocompleteLoaderThread.cancel
+
+
+    def getResults( self ) -> list:
+        """
+        Called from the main (tkinter) thread.
+
+        Returns a list of any 2-tuples (resultType, data) that the thread has posted
+            where resultType is 'Progress', 'Done', or 'Error'.
+        """
+        results = []
+        try:
+            while True: results.append( self.resultsQueue.get( block=False ) )
+        except queue.Empty: pass
+        return results
+    # end of AutocompleteLoaderThread.getResults
+# end of class AutocompleteLoaderThread
+
+
+
+class AutocompleteVocabularies:
+    """
+    The application keeps one of these so that edit windows which use
+        the same source of autocomplete words (e.g., the same Bible project and mode,
+        or the same dictionary) can share one AutocompleteIndex
+        rather than each loading and storing their own copy.
+
+    Each vocabulary is indexed by a key (a tuple) which identifies its source
+        and keeps a list of the windows using it (i.e., a reference count)
+        so that it can be freed when the last of those windows is closed.
+
+    The words are loaded by an AutocompleteLoaderThread
+        which is polled (using after()) from the main tkinter thread.
+    """
+    def __init__( self ):
+        """
+        Create an empty registry.
+        """
+        fnPrint( debuggingThisModule, "AutocompleteVocabularies.__init__()" )
+        self.vocabularies = {} # Indexed by key, contains dicts with Windows, Loader, Index, and Attributes entries
+        self.windowKeys = {} # Indexed by window object, contains the key of the vocabulary that it's using
+        self.pollAfterID = None
+    # end of AutocompleteVocabularies.__init__
+
+
+    def __str__( self ) -> str:
+        return "AutocompleteVocabularies object with {} vocabularies used by {} windows" \
+                    .format( len(self.vocabularies), len(self.windowKeys) )
+    # end of AutocompleteVocabularies.__str__
+
+
+    def requestVocabulary( self, editWindowObject, key:tuple, gatherFunction, gatherArgs ) -> None:
+        """
+        Give the edit window the vocabulary for the key,
+            starting to load it (with the gather function and arguments) if necessary.
+
+        If it's already loaded, the words are installed in the window immediately,
+            otherwise they're installed when the background loading finishes.
+        """
+        fnPrint( debuggingThisModule, "AutocompleteVocabularies.requestVocabulary( {}, {}, {} )".format( editWindowObject, key, gatherFunction.__name__ ) )
+
+        if self.windowKeys.get( editWindowObject ) == key: return # Already using (or loading) it
+        self.releaseVocabulary( editWindowObject ) # in case it was using a different one
+
+        try: vocabulary = self.vocabularies[key]
+        except KeyError: # We need to load this one
+            loader = AutocompleteLoaderThread( gatherFunction, gatherArgs, editWindowObject.autocompleteMinLength )
+            vocabulary = { 'Windows':[], 'Loader':loader, 'Index':None, 'Attributes':None }
+            self.vocabularies[key] = vocabulary
+            loader.start()
+            if self.pollAfterID is None:
+                self.pollAfterID = BiblelatorGlobals.theApp.after( AUTOCOMPLETE_LOADER_POLL_TIME, self.checkLoaders )
+        vocabulary['Windows'].append( editWindowObject )
+        self.windowKeys[editWindowObject] = key
+
+        if vocabulary['Index'] is None:
+            editWindowObject.setStatus( _("Preparing autocomplete words…") )
+        else: # it's already loaded (by another window)
+            installAutocompleteWords( editWindowObject, vocabulary['Index'], vocabulary['Attributes'] )
+            editWindowObject.setStatus( _("Autocomplete ready with {:,} words").format( len(vocabulary['Index']) ) )
+    # end of AutocompleteVocabularies.requestVocabulary
+
+
+    def releaseVocabulary( self, editWindowObject ) -> None:
+        """
+        Called when the edit window no longer needs its vocabulary (e.g., it's closing).
+
+        The vocabulary (and any background loading) is discarded
+            once no windows are using it.
+        """
+        fnPrint( debuggingThisModule, "AutocompleteVocabularies.releaseVocabulary( {} )".format( editWindowObject ) )
+
+        try: key = self.windowKeys.pop( editWindowObject )
+        except KeyError: return # It wasn't using one
+        vocabulary = self.vocabularies[key]
+        vocabulary['Windows'].remove( editWindowObject )
+        if not vocabulary['Windows']: # that was the last window using it
+            if vocabulary['Loader'] is not None: vocabulary['Loader'].cancel()
+            del self.vocabularies[key]
+            vPrint( 'Info', debuggingThisModule, "AutocompleteVocabularies freed {}".format( key ) )
+    # end of AutocompleteVocabularies.releaseVocabulary
+
+
+    def getSharingWindows( self, editWindowObject ) -> list:
+        """
+        Returns a list of all the windows which use the same vocabulary as the given window
+            (including the given window itself).
+        """
+        try: return list( self.vocabularies[self.windowKeys[editWindowObject]]['Windows'] )
+        except KeyError: return [editWindowObject]
+    # end of AutocompleteVocabularies.getSharingWindows
+
+
+    def checkLoaders( self ) -> None:
+        """
+        Called regularly (using after()) while any vocabularies are being loaded
+            in the background in order to show the progress
+            and to install the words (in this main thread) once they're ready.
+        """
+        vPrint( 'Never', debuggingThisModule, "AutocompleteVocabularies.checkLoaders()" )
+        self.pollAfterID = None
+
+        stillLoading = False
+        for key,vocabulary in list( self.vocabularies.items() ):
+            loader = vocabulary['Loader']
+            if loader is None: continue # already loaded
+            for resultType,data in loader.getResults():
+                if resultType == 'Progress':
+                    for editWindowObject in vocabulary['Windows']:
+                        editWindowObject.setStatus( _("Preparing autocomplete words… {}%").format( data ) if data is not None
+                                                        else _("Preparing autocomplete words…") )
+                elif resultType == 'Done':
+                    vocabulary['Loader'] = None
+                    vocabulary['Index'], vocabulary['Attributes'] = data
+                    for editWindowObject in vocabulary['Windows']:
+                        installAutocompleteWords( editWindowObject, vocabulary['Index'], vocabulary['Attributes'] )
+                        editWindowObject.setStatus( _("Autocomplete ready with {:,} words").format( len(vocabulary['Index']) ) )
+                    break
+                elif resultType == 'Error':
+                    for editWindowObject in vocabulary['Windows']:
+                        editWindowObject.setErrorStatus( _("Unable to prepare autocomplete words: {}").format( data ) )
+                        del self.windowKeys[editWindowObject]
+                    del self.vocabularies[key] # so that it can be tried again
+                    break
+            else: stillLoading = True
+        if stillLoading:
+            self.pollAfterID = BiblelatorGlobals.theApp.after( AUTOCOMPLETE_LOADER_POLL_TIME, self.checkLoaders )
+    # end of AutocompleteVocabularies.checkLoaders
+
+
+    def closedown( self ) -> None:
+        """
+        Stop any background loading and free all the vocabularies
+            (called when the application is closing).
+        """
+        fnPrint( debuggingThisModule, "AutocompleteVocabularies.closedown()" )
+        if self.pollAfterID is not None:
+            BiblelatorGlobals.theApp.after_cancel( self.pollAfterID )
+            self.pollAfterID = None
+        for vocabulary in self.vocabularies.values():
+            if vocabulary['Loader'] is not None: vocabulary['Loader'].cancel()
+        self.vocabularies, self.windowKeys = {}, {}
+    # end of AutocompleteVocabularies.closedown
+# end of class AutocompleteVocabularies
+
+
+
+def needsBibleBookAutocompleteUpdate( editWindowObject, BBB ) -> bool:
+    """
+    Returns True if the autocomplete words for the edit window
+        include the words from the given Bible book
+        (so they need updating after the book is saved).
+
+    editWindowObject here is a USFM or ESFM edit window.
+    """
+    if editWindowObject.autocompleteMode not in ('Bible','BibleBook'): return False # Only Bible words can change
+    try: bookWordCounts = editWindowObject.autocompleteBookWordCounts
+    except AttributeError: return False # Autocomplete words haven't been loaded yet
+    if editWindowObject.autocompleteMode == 'BibleBook' and BBB not in bookWordCounts:
+        return False # The index only contains words from a different book
+    return BBB not in AVOID_BOOKS
+# end of AutocompleteFunctions.needsBibleBookAutocompleteUpdate
+
+
+def getWordCountChanges( oldCounts:dict, newCounts:dict, minLength:int ) -> dict:
+    """
+    Returns a dict containing the differences (which are usually few) between the word counts
+        (only for words which are at least minLength characters long).
+    """
+    wordChanges = {}
+    for word in newCounts.keys() | oldCounts.keys():
+        delta = newCounts.get( word, 0 ) - oldCounts.get( word, 0 )
+        if delta and len(word) >= minLength: wordChanges[word] = delta
+    return wordChanges
+# end of AutocompleteFunctions.getWordCountChanges
+
+
+def countChangedBookWords( bookText:str, oldCounts:Optional[dict], internalMarkers:list, minLength:int ):
+    """
+    Called (in the background thread) after a Bible book has been saved
+        to count the words in the saved text (so the file doesn't have to be read again)
+        and to find the differences from the old counts for the book.
+
+    Note that this doesn't touch the edit window or its autocomplete index.
+
+    Returns a 2-tuple with the new counts dict and the dict of changes
+        to be given to updateBibleBookAutocompleteWords (in the GUI thread).
+    """
+    fnPrint( debuggingThisModule, "countChangedBookWords( {:,} chars, {}, …, {} )".format( len(bookText), None if oldCounts is None else len(oldCounts), minLength ) )
+
+    newCounts = dict( countBookLinesWords( bookText.split( '\n' ), internalMarkers, _("saved book text") ) )
+    return newCounts, getWordCountChanges( oldCounts or {}, newCounts, minLength )
+# end of AutocompleteFunctions.countChangedBookWords
+
+
+def updateBibleBookAutocompleteWords( editWindowObject, BBB, oldCounts:Optional[dict], newCounts:dict, wordChanges:dict ) -> None:
+    """
+    Called after a Bible book has been saved (in Bible or BibleBook autocomplete mode)
+        with the new word counts for just that book
+        and the changes from oldCounts (both from countChangedBookWords in the background thread)
+        to apply the changes to the autocomplete index
+        (so that deleted words drop out and the rankings stay accurate
+         without having to reload the words from the entire Bible).
+
+    editWindowObject here is a USFM or ESFM edit window.
+
+    NOTE: Less common multi-word sequences that weren't already in the index
+        are only added if this book alone now uses them often enough.
+    """
+    fnPrint( debuggingThisModule, "updateBibleBookAutocompleteWords( {}, {:,} words, {:,} changes )".format( BBB, len(newCounts), len(wordChanges) ) )
+
+    if not needsBibleBookAutocompleteUpdate( editWindowObject, BBB ): return
+    minMultiwordCount = BIBLE_MIN_MULTIWORD_COUNT if editWindowObject.autocompleteMode == 'Bible' \
+                            else BIBLE_BOOK_MIN_MULTIWORD_COUNT
+    bookWordCounts = editWindowObject.autocompleteBookWordCounts
+
+    startTime = time.time()
+    if bookWordCounts.get( BBB ) is not oldCounts: # The counts have been changed since the save started (e.g., by another save)
+        wordChanges = getWordCountChanges( bookWordCounts.get( BBB, {} ), newCounts, editWindowObject.autocompleteMinLength )
+    countMultiplier = CURRENT_BOOK_COUNT_MULTIPLIER if BBB==editWindowObject.autocompleteWeightedBBB else 1
+
+    autocompleteIndex = editWindowObject.autocompleteWords
+    wordDeltas = {}
+    for word,delta in wordChanges.items():
+        delta *= countMultiplier
+        if ' ' in word and word not in autocompleteIndex and delta < minMultiwordCount:
+            continue # Not common enough to be offered
+        wordDeltas[word] = delta
+    bookWordCounts[BBB] = newCounts
+
+    if wordDeltas:
+        addedWords = autocompleteIndex.adjustWordCounts( wordDeltas )
+        for windowObject in BiblelatorGlobals.theApp.autocompleteVocabularies.getSharingWindows( editWindowObject ):
+            addAutocompleteWordChars( windowObject, addedWords )
+    vPrint( 'Info', debuggingThisModule, "updateBibleBookAutocompleteWords applied {:,} changes for {} in {:.3f}s" \
+                                        .format( len(wordDeltas), BBB, time.time()-startTime ) )
+# end of AutocompleteFunctions.updateBibleBookAutocompleteWords
+
+
+
+def gatherHunspellAutocompleteWords( dictionaryFilepath, encoding=None, progressFunction=None ):
+    """
+    Load the stems from a Hunspell-type dictionary (and the affix rules from the matching .aff file)
+        to fill the autocomplete mechanism.
+
+    The other word forms are only generated (by the HunspellAutocompleteIndex)
+        when the user types something that might match them.
+
+    If the encoding isn't given, the one from the .aff file is used.
+
+    This doesn't use tkinter so can be run in a background thread.
+
+    Returns the HunspellAutocompleteIndex, and a dictionary of attributes to be set on the edit window.
+    """
+    logging.info( "gatherHunspellAutocompleteWords( {}, {} )".format( dictionaryFilepath, encoding ) )
+
+    autocompleteIndex = loadHunspellDictionary( dictionaryFilepath, encoding, progressFunction )
+    return autocompleteIndex, { 'autocompleteMinLength':DICTIONARY_AUTOCOMPLETE_MIN_LENGTH, 'addAllNewWords':False }
+# end of AutocompleteFunctions.gatherHunspellAutocompleteWords
+
+
+def loadHunspellAutocompleteWords( editWindowObject, dictionaryFilepath, encoding=None ):
     """
     Load all the existing words in a Hunspell-type dictionary
         to fill the autocomplete mechanism
@@ -470,242 +1076,162 @@ def loadHunspellAutocompleteWords( editWindowObject, dictionaryFilepath, encodin
         BiblelatorGlobals.theApp.setDebugText( "loadHunspellAutocompleteWords…" )
 
     BiblelatorGlobals.theApp.setWaitStatus( _("Loading dictionary…") )
-    internalCount = None
-    autocompleteWords = []
-    lineCount = 0
-    with open( dictionaryFilepath, 'rt', encoding=encoding ) as dictionaryFile:
-        for line in dictionaryFile:
-            lineCount += 1
-            if lineCount==1 and encoding.lower()=='utf-8' and line[0]==chr(65279): #U+FEFF or \ufeff
-                logging.info( "loadHunspellAutocompleteWords: Detected Unicode Byte Order Marker (BOM) in {}".format( dictionaryFilepath ) )
-                line = line[1:] # Remove the Unicode Byte Order Marker (BOM)
-            if line and line[-1]=='\n': line=line[:-1] # Remove trailing newline character
-            if not line: continue # Just discard blank lines
-            #dPrint( 'Quiet', debuggingThisModule, "line", lineCount, repr(line) )
-
-            if lineCount==1 and line.isdigit(): # first line seems to be a count
-                internalCount = int( line )
-                continue
-
-            try: word, codes = line.split( '/', 1 )
-            except ValueError: word, codes = line, ''
-            if word in ('3GPP','AA','ACAS',): continue # Throw out rubbish
-            #dPrint( 'Quiet', debuggingThisModule, "word", repr(word), repr(codes) )
-            autocompleteWords.append( word )
-
-            wordDeleteA = word[:-1] if word[-1]=='a' else word
-            wordDeleteE = word[:-1] if word[-1]=='e' else word
-            wordDeleteEY = word[:-1] if word[-1] in ('e','y',) else word
-            wordDeleteEChangeY = wordDeleteE[:-1]+'i' if wordDeleteE[-1]=='y' else wordDeleteE
-            wordAddEAfterSY = word+'e' if word[-1]=='s' else word
-            wordAddEAfterSY = wordAddEAfterSY[:-1]+'ie' if wordAddEAfterSY[-1]=='y' else wordAddEAfterSY
-            wordYtoI = word[:-1]+'i' if word[-1]=='y' else word
-
-            generatedWords = []
-            """
-            B -able, -ability, last syllable of stem stressed, -ate words &gt; 2 syllables
-            b -ible, very basic rules, only dropped e
-            D -ed, regular verb past tenses, last syllable of stem stressed
-            d -ed, -ing, regular verb past tenses and adverbial form, last syllable NOT stressed
-            E dis- Prefix for negation
-            e out- Prefix
-            h -edly, adverbial, simplified rules
-            I in- im- il- ir- Prefix, opposite of.
-            i -edness, degree, simplified rules
-            j -fully, suffix
-            K pre-, prefix
-            k -ingly, adverbial form, simplified rules
-            L -ment, -ments, -ment's, suffix, both generated
-            l -ably, simplified rules
-            N -ion, noun from verb, stress on last syllable of stem
-            n -ion, -ions, noun from verb, stress NOT on last syllable of stem
-            q -isation, -isations, -ization, -izations, all generated
-            S -s, noun plurals, verb conjugation
-            s -iser, -isers, -izer, -izers, -iser's, -izer's, all generated
-            T -er, -est, adjectival comparatives, both generated
-            t -isable, -isability, -izable, -izability, all generated
-            u -iveness, ending for verbs
-            V -ive, ending for verbs (simplified rules)
-            v -ively, ending for verbs
-            W -ic, adjectival ending, simplified rules
-            w -ical, adjectival ending, simplified rules
-            X -ions, noun plural, stress on last syllable of stem, simplified rules
-            x -ional, -ionally, simplified rules, both endings formed
-            Y -ly, adverb endings for adjectives
-            y -ry, adjectival and noun forms, simplified rules.
-            0 -al, noun from verb, simplified rules
-            1 -ically, adverbial double suffix, simplified rules
-            2 -iness, y+ness ending, simplified rules
-            3 -ist, -ists, -ists's, professions
-            5 -woman, -women, -woman's suffixes, all generated
-            7 -able, last syllable NOT stressed, -ate words <= 2 syllables
-            """
-            for code in codes:
-                #dPrint( 'Quiet', debuggingThisModule, "  code", code, "for", repr(word) )
-                if code == 'A': generatedWords.append( 're' + word )
-                elif code == 'a': generatedWords.append( 'mis' + word )
-                elif code == 'B': generatedWords.append( word+'able' ); generatedWords.append( word+'ability' )
-                elif code == 'b': generatedWords.append( wordDeleteE + 'ible' ); generatedWords.append( wordDeleteE + 'ibility' )
-                elif code == 'C': generatedWords.append( 'de' + word )
-                elif code == 'c': generatedWords.append( 'over' + word )
-                elif code == 'D': generatedWords.append( wordDeleteE + 'ed' ) # last syllable of stem stressed
-                elif code == 'd': generatedWords.append( word+'ed' ); generatedWords.append( word+'ing' )
-                elif code == 'E': generatedWords.append( 'dis' + word )
-                elif code == 'e': generatedWords.append( 'out' + word )
-                elif code == 'F': # e.g., ment -> prefix
-                    if word[0] in ( 'm','b','p',): generatedWords.append( 'com' + word )
-                    #elif word[0] == 'l': generatedWords.append( 'il' + word )
-                    #elif word[0] == 'r': generatedWords.append( 'ir' + word )
-                    else: generatedWords.append( 'con' + word )
-                elif code == 'f': generatedWords.append( 'under' + word )
-                elif code == 'G': # e.g., XXX -> ending for verbs, stress on last syllable of stem
-                    generatedWords.append( wordDeleteE + 'ing' )
-                elif code == 'g': # e.g., palate -> last syllable NOT stressed
-                    generatedWords.append( wordDeleteE + 'ability' )
-                elif code == 'H': # e.g., eighty-four -> number specific suffixes, both generated
-                    generatedWords.append( word + 'th' ); generatedWords.append( word + 'fold' )
-                elif code == 'h': # e.g., abash -> adverbial, simplified rules
-                    generatedWords.append( wordDeleteE + 'edly' )
-                elif code == 'I':
-                    if word[0] in ( 'm','b','p',): generatedWords.append( 'im' + word )
-                    elif word[0] == 'l': generatedWords.append( 'il' + word )
-                    elif word[0] == 'r': generatedWords.append( 'ir' + word )
-                    else: generatedWords.append( 'in' + word )
-                elif code == 'i': generatedWords.append( wordDeleteEY + 'edness' )
-                elif code == 'J': # e.g., band -> plural noun version of verb ing ending, simplified rules
-                    generatedWords.append( word + 'ings' )
-                elif code == 'j': # e.g., bliss, wonder -> suffix
-                    generatedWords.append( word + 'fully' )
-                elif code == 'K': generatedWords.append( 'pre' + word )
-                elif code == 'k': generatedWords.append( wordDeleteE + 'ingly' )
-                elif code == 'L': generatedWords.append( word+'ment' ); generatedWords.append( word+'ments' ); generatedWords.append( word+"ment's" )
-                elif code == 'l': # e.g., avoid
-                    generatedWords.append( word + 'ably' )
-                elif code == 'M': # e.g., abalone -> possessive form
-                    generatedWords.append( word + "'s" ) # What about other apostrophe types
-                elif code == 'm': # e.g., artillery -> suffixes, all generated
-                    generatedWords.append( word+'man' ); generatedWords.append( word+"man's" ); generatedWords.append( word+'men' ); generatedWords.append( word+"men's" )
-                elif code == 'N': # e.g., assume
-                    generatedWords.append( wordDeleteE + 'ion' )
-                elif code == 'n': generatedWords.append( wordDeleteE+'ion' ); generatedWords.append( wordDeleteE+'ions' )
-                elif code == 'O': # e.g., fiction -> prefix
-                    generatedWords.append( 'non' + word )
-                elif code == 'o': # e.g., apocrypha -> adverb from verb, simplified rules
-                    generatedWords.append( wordDeleteA + 'ally' )
-                elif code == 'P': # e.g., absolute -> adjective degree of comparison
-                    generatedWords.append( wordYtoI+'ness' ); generatedWords.append( wordYtoI+"ness's" )
-                elif code == 'p': # e.g., body -> comparative suffix
-                    generatedWords.append( word+'less' )
-                elif code == 'Q': # e.g., pre -> all generated
-                    generatedWords.append( wordDeleteE+'ise' ); generatedWords.append( wordDeleteE+'ised' ); generatedWords.append( wordDeleteE+'ises' ); generatedWords.append( wordDeleteE+'ising' )
-                    generatedWords.append( wordDeleteE+'ize' ); generatedWords.append( wordDeleteE+'ized' ); generatedWords.append( wordDeleteE+'izes' ); generatedWords.append( wordDeleteE+'izing' )
-                elif code == 'R': # e.g., abjure -> doer, last syllable stressed, both forms generated
-                    generatedWords.append( wordDeleteE+'er' ); generatedWords.append( wordDeleteE+'ers' ); generatedWords.append( wordDeleteE+"er's" )
-                elif code == 'r': # e.g., backslid -> doer, last syllable NOT stressed, both forms generated
-                    generatedWords.append( word+'er' ); generatedWords.append( word+'ers' ); generatedWords.append( word+"er's" )
-                elif code == 'S': generatedWords.append( wordAddEAfterSY + 's' )
-                elif code == 'T': generatedWords.append( wordDeleteEY+'er' ); generatedWords.append( wordDeleteEY+'est' )
-                elif code == 'U': generatedWords.append( 'un' + word )
-                elif code == 'u': generatedWords.append( wordDeleteEY + 'iveness' )
-                elif code == 'V': generatedWords.append( wordDeleteEY + 'ive' )
-                elif code == 'v': generatedWords.append( wordDeleteEY + 'ively' )
-                elif code == 'W': generatedWords.append( wordDeleteEY + 'ic' )
-                elif code == 'w': generatedWords.append( wordDeleteEY + 'ical' )
-                elif code == 'X': # e.g., assume
-                    generatedWords.append( wordDeleteEY + 'ions' )
-                elif code == 'x': generatedWords.append( wordDeleteEY + 'ional' ); generatedWords.append( word + 'ionally' )
-                elif code == 'Y': generatedWords.append( wordYtoI + 'ly' )
-                elif code == 'y': generatedWords.append( word + 'ry' )
-                elif code == 'Z': # e.g., academe -> diminutive and adjectival form, simplified rules
-                    generatedWords.append( wordDeleteE + 'y' )
-                elif code == 'z': # e.g., cage -> adverbial ending where adjective adds y
-                    generatedWords.append( wordDeleteEY + 'ily' )
-                elif code == '1': vPrint( 'Quiet', debuggingThisModule, ' 1 on', repr(word), 'ignored' )
-                elif code == '2': # e.g., bone -> y+ness ending, simplified rules
-                    generatedWords.append( wordDeleteEY + 'iness' )
-                elif code == '3': generatedWords.append( wordDeleteEY+'ist' ); generatedWords.append( wordDeleteE+'ists' ); generatedWords.append( wordDeleteE+"ist's" )
-                elif code == '5': # e.g., chair
-                    generatedWords.append( word+'woman' ); generatedWords.append( word+"woman's" ); generatedWords.append( word+'women' ); generatedWords.append( word+"women's" )
-                elif code == '4': generatedWords.append( 'trans' + word )
-                elif code == '6': # e.g., bliss, wonder -> suffix
-                    generatedWords.append( word + 'ful' )
-                elif code == '7': generatedWords.append( word + 'able' )
-                elif BibleOrgSysGlobals.debugFlag:
-                    vPrint( 'Quiet', debuggingThisModule, lineCount, "code", code, "for", repr(word), repr(codes) )
-                    halt
-            vPrint( 'Quiet', debuggingThisModule, "  generated", generatedWords, 'from', repr(word), repr(codes) )
-            autocompleteWords.extend( generatedWords )
-
-            #lastLine = line
-            #if lineCount > 60: break
-    #dPrint( 'Quiet', debuggingThisModule, 'acW', len(autocompleteWords), autocompleteWords )
-
-    if editWindowObject.autocompleteMinLength < 4:
-        vPrint( 'Quiet', debuggingThisModule, "NOTE: Lengthened autocompleteMinLength from {} to {}".format( editWindowObject.autocompleteMinLength, 4 ) )
-        editWindowObject.autocompleteMinLength = 4 # Show the window after this many characters have been typed
-    setAutocompleteWords( editWindowObject, autocompleteWords )
-    editWindowObject.addAllNewWords = False
+    installAutocompleteWords( editWindowObject, *gatherHunspellAutocompleteWords( dictionaryFilepath, encoding ) )
 # end of AutocompleteFunctions.loadHunspellAutocompleteWords
 
 
 
-def loadILEXAutocompleteWords( editWindowObject, dictionaryFilepath, lgCodes=None ):
+def iterateILEXWords( dictionaryFilepath, lgCodes=None, progressFunction=None ):
     """
-    Load all the existing words in an ILEX dictionary
-        to fill the autocomplete mechanism
+    A generator which reads an ILEX dictionary one line at a time
+        and yields the words for the given language codes (or all languages if lgCodes is None).
 
-    editWindowObject here is a text edit window or derivation.
+    Abbreviations are skipped, and words may be yielded more than once.
 
-    NOTE: This list maybe should be updated as the user enters new words
-        or else have an additional user dictionary.
+    If progressFunction is given, it's called occasionally with a percentage (or None).
     """
-    logging.info( "loadILEXAutocompleteWords( {}, {} )".format( dictionaryFilepath, lgCodes ) )
-    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-        vPrint( 'Quiet', debuggingThisModule, "loadILEXAutocompleteWords( {}, {} )".format( dictionaryFilepath, lgCodes ) )
-        BiblelatorGlobals.theApp.setDebugText( "loadILEXAutocompleteWords…" )
+    fnPrint( debuggingThisModule, "iterateILEXWords( {}, {} )".format( dictionaryFilepath, lgCodes ) )
 
-    BiblelatorGlobals.theApp.setWaitStatus( _("Loading dictionary…") )
-    autocompleteWords = []
+    if lgCodes is not None: lgCodes = frozenset( lgCodes )
+    word = lgCode = None
     lineCount = 0
+    if progressFunction is not None:
+        fileSize, charCount = os.path.getsize( dictionaryFilepath ), 0
     with open( dictionaryFilepath, 'rt', encoding='utf-8' ) as dictionaryFile:
         for line in dictionaryFile:
             lineCount += 1
+            if progressFunction is not None:
+                charCount += len( line ) # Only approximately matches the number of bytes
+                if lineCount % 10000 == 0: progressFunction( min( 99, 100 * charCount // fileSize ) if fileSize else None )
             if lineCount==1:
-                if line[0]==chr(65279): #U+FEFF
-                    logging.info( "loadILEXAutocompleteWords1: Detected Unicode Byte Order Marker (BOM) in {}".format( dictionaryFilepath ) )
+                if line[:1]==chr(65279): #U+FEFF
+                    logging.info( "iterateILEXWords1: Detected Unicode Byte Order Marker (BOM) in {}".format( dictionaryFilepath ) )
                     line = line[1:] # Remove the UTF-16 Unicode Byte Order Marker (BOM)
                 elif line[:3] == 'ï»¿': # 0xEF,0xBB,0xBF
-                    logging.info( "loadILEXAutocompleteWords2: Detected Unicode Byte Order Marker (BOM) in {}".format( dictionaryFilepath ) )
+                    logging.info( "iterateILEXWords2: Detected Unicode Byte Order Marker (BOM) in {}".format( dictionaryFilepath ) )
                     line = line[3:] # Remove the UTF-8 Unicode Byte Order Marker (BOM)
-            if line and line[-1]=='\n': line=line[:-1] # Remove trailing newline character
-            if not line: continue # Just discard blank lines
+            if not line.startswith( '\\' ): continue # Only interested in the marker lines
+            if line[-1]=='\n': line=line[:-1] # Remove trailing newline character
             #dPrint( 'Quiet', debuggingThisModule, "line", lineCount, repr(line) )
 
             # wd, lg, ps, and sc are the four compulsory fields in each record
-            if line.startswith( '\\wd ' ):
+            marker = line[1:3]
+            if marker == 'wd':
                 word = line[4:]
                 if '*' in word and word[-2] == '*' and word[-1].isdigit(): # It has a subscript
                     word = word[:-2]
-            elif line.startswith( '\\lg ' ):
+            elif marker == 'lg':
                 lgCode = line[4:]
-                assert len(lgCode) == 3
-            elif line.startswith( '\\ps ' ):
-                POS = line[4:]
+                if BibleOrgSysGlobals.debugFlag: assert len(lgCode) == 3
+            elif marker == 'ps':
+                if line[4:] != 'x' and word and (lgCodes is None or lgCode in lgCodes): # x is for abbreviations like AFAIK
+                    yield word
+# end of AutocompleteFunctions.iterateILEXWords
+
+
+def getILEXCacheFilepath( dictionaryFilepath, lgCodes=None ) -> str:
+    """
+    Returns the path of the file (next to the ILEX dictionary)
+        used to save the words for the given language codes.
+    """
+    return '{}.{}.autocompleteWords.pickle'.format( dictionaryFilepath, '_'.join( sorted( lgCodes ) ) if lgCodes else 'All' )
+# end of AutocompleteFunctions.getILEXCacheFilepath
 
-                if lgCodes is None or lgCode in lgCodes:
-                    if POS != 'x': # abbreviations like AFAIK
-                        if word not in autocompleteWords:
-                            autocompleteWords.append( word )
 
-            #lastLine = line
-            #if lineCount > 600: break
+def loadILEXWordCache( cacheFilepath, sourceStamp ) -> list:
+    """
+    Load the cached word list for an ILEX dictionary.
+
+    Returns None if there's no usable cache file,
+        or if it wasn't made from a dictionary with the given (mtime, size) stamp.
+    """
+    fnPrint( debuggingThisModule, "loadILEXWordCache( {}, {} )".format( cacheFilepath, sourceStamp ) )
+
+    try:
+        with open( cacheFilepath, 'rb' ) as cacheFile:
+            cacheData = pickle.load( cacheFile )
+    except FileNotFoundError: return None
+    except Exception as err: # e.g., a corrupted or incompatible file
+        logging.warning( "loadILEXWordCache: Unable to load {}: {}".format( cacheFilepath, err ) )
+        return None
+    if not isinstance( cacheData, dict ) or cacheData.get( 'version' ) != ILEX_CACHE_VERSION \
+    or cacheData.get( 'stamp' ) != sourceStamp:
+        return None
+    return cacheData['words']
+# end of AutocompleteFunctions.loadILEXWordCache
+
+
+def saveILEXWordCache( cacheFilepath, sourceStamp, wordList:list ) -> None:
+    """
+    Save the word list from an ILEX dictionary
+        along with the (mtime, size) stamp of the dictionary file.
+
+    The file is written to a temporary file first and then renamed
+        so that an interrupted save can't leave a partial cache file.
+    """
+    fnPrint( debuggingThisModule, "saveILEXWordCache( {}, {}, {:,} )".format( cacheFilepath, sourceStamp, len(wordList) ) )
+
+    tempFilepath = '{}.tmp'.format( cacheFilepath )
+    try:
+        with open( tempFilepath, 'wb' ) as cacheFile:
+            pickle.dump( { 'version':ILEX_CACHE_VERSION, 'stamp':sourceStamp, 'words':wordList }, cacheFile, pickle.HIGHEST_PROTOCOL )
+        os.replace( tempFilepath, cacheFilepath )
+    except OSError as err: # e.g., the dictionary is in a read-only folder
+        logging.warning( "saveILEXWordCache: Unable to save {}: {}".format( cacheFilepath, err ) )
+# end of AutocompleteFunctions.saveILEXWordCache
+
+
+def gatherILEXAutocompleteWords( dictionaryFilepath, lgCodes=None, progressFunction=None ):
+    """
+    Find all the existing words in an ILEX dictionary
+        to fill the autocomplete mechanism.
+
+    The words are cached in a file next to the dictionary
+        which is used next time (if the dictionary hasn't been changed since).
+
+    This doesn't use tkinter so can be run in a background thread.
+
+    Returns the word list, and a dictionary of attributes to be set on the edit window.
+    """
+    logging.info( "gatherILEXAutocompleteWords( {}, {} )".format( dictionaryFilepath, lgCodes ) )
+
+    windowAttributes = { 'autocompleteMinLength':DICTIONARY_AUTOCOMPLETE_MIN_LENGTH, 'addAllNewWords':False }
+    sourceStamp = getFileStamp( dictionaryFilepath )
+    cacheFilepath = getILEXCacheFilepath( dictionaryFilepath, lgCodes )
+    autocompleteWords = loadILEXWordCache( cacheFilepath, sourceStamp )
+    if autocompleteWords is not None:
+        vPrint( 'Info', debuggingThisModule, "gatherILEXAutocompleteWords loaded {:,} words from {}".format( len(autocompleteWords), cacheFilepath ) )
+        return autocompleteWords, windowAttributes
+
+    autocompleteWords, foundWords = [], set()
+    for word in iterateILEXWords( dictionaryFilepath, lgCodes, progressFunction ):
+        if word not in foundWords:
+            foundWords.add( word )
+            autocompleteWords.append( word )
     #dPrint( 'Quiet', debuggingThisModule, 'acW', len(autocompleteWords), autocompleteWords )
 
-    if editWindowObject.autocompleteMinLength < 4:
-        vPrint( 'Quiet', debuggingThisModule, "NOTE: Lengthened autocompleteMinLength from {} to {}".format( editWindowObject.autocompleteMinLength, 4 ) )
-        editWindowObject.autocompleteMinLength = 4 # Show the window after this many characters have been typed
-    setAutocompleteWords( editWindowObject, autocompleteWords )
-    editWindowObject.addAllNewWords = False
+    if sourceStamp is not None: saveILEXWordCache( cacheFilepath, sourceStamp, autocompleteWords )
+    return autocompleteWords, windowAttributes
+# end of AutocompleteFunctions.gatherILEXAutocompleteWords
+
+
+def loadILEXAutocompleteWords( editWindowObject, dictionaryFilepath, lgCodes=None ):
+    """
+    Load all the existing words in an ILEX dictionary
+        to fill the autocomplete mechanism
+
+    editWindowObject here is a text edit window or derivation.
+
+    NOTE: This list maybe should be updated as the user enters new words
+        or else have an additional user dictionary.
+    """
+    logging.info( "loadILEXAutocompleteWords( {}, {} )".format( dictionaryFilepath, lgCodes ) )
+    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+        vPrint( 'Quiet', debuggingThisModule, "loadILEXAutocompleteWords( {}, {} )".format( dictionaryFilepath, lgCodes ) )
+        BiblelatorGlobals.theApp.setDebugText( "loadILEXAutocompleteWords…" )
+
+    BiblelatorGlobals.theApp.setWaitStatus( _("Loading dictionary…") )
+    installAutocompleteWords( editWindowObject, *gatherILEXAutocompleteWords( dictionaryFilepath, lgCodes ) )
 # end of AutocompleteFunctions.loadILEXAutocompleteWords
 
 
@@ -837,11 +1363,6 @@ def acceptAutocompleteSelection( self, includeTrailingSpace=False ):
 
     #dPrint( 'Quiet', debuggingThisModule, "acceptAutocompleteSelection for {!r}".format( currentWord ) )
     addNewAutocompleteWord( self, currentWord )
-
-    ## Put this word at the beginning of the list so it comes up on top next time
-    #firstLetter, remainder = currentWord[0], currentWord[1:]
-    #self.autocompleteWords[firstLetter].remove( remainder )
-    #self.autocompleteWords[firstLetter].insert( 0, remainder )
 # end of AutocompleteFunctions.acceptAutocompleteSelection
 
 
@@ -872,18 +1393,64 @@ def addNewAutocompleteWord( self, possibleNewWord ):
 
     if len( possibleNewWord ) > self.autocompleteMinLength:
         #dPrint( 'Quiet', debuggingThisModule, "Adding new autocomplete word: {!r}".format( possibleNewWord ) )
-        # Put this word at the beginning of the list so it comes up on top next time
-        firstLetter, remainder = possibleNewWord[0], possibleNewWord[1:]
-        try: self.autocompleteWords[firstLetter].remove( remainder )
-        except ValueError: pass # remove will fail if this really is a new word
-        except KeyError: # There's no list existing for this letter
-            self.autocompleteWords[firstLetter] = []
-        self.autocompleteWords[firstLetter].insert( 0, remainder )
+        # Put this word at the top of the list so it comes up on top next time
+        self.autocompleteWords.promoteWord( possibleNewWord )
 # end of AutocompleteFunctions.addNewAutocompleteWord
 
 
 
 
+def demoBookSwitchSave() -> bool:
+    """
+    Check the word counts after a Bible book with unsaved edits is saved
+        because the user has switched to a different book.
+
+    The USFM edit window has already moved its current verse key on to the new book by then,
+        so the changes must be counted for the book that was loaded (and saved), not the new one.
+
+    Returns True if the counts were correctly updated.
+    """
+    from types import SimpleNamespace
+    bookTexts = { 'GEN':'\\id GEN\n\\c 1\n\\v 1 In the beginning God created the heavens and the earth.\n',
+                  'EXO':'\\id EXO\n\\c 1\n\\v 1 These are the names of the sons of Israel who came into Egypt.\n' }
+    editedGENText = bookTexts['GEN'].replace( 'heavens', 'skies' )
+    internalMarkers, minLength = getInternalMarkers(), 3
+
+    bookWordCounts = { BBB:dict( countBookLinesWords( bookText.split( '\n' ), internalMarkers, BBB ) ) for BBB,bookText in bookTexts.items() }
+    autocompleteCounts = defaultdict( int )
+    for counts in bookWordCounts.values():
+        for word,count in counts.items(): autocompleteCounts[word] += count
+    autocompleteIndex = AutocompleteIndex()
+    autocompleteIndex.setWordCounts( autocompleteCounts )
+    class DemoEditWindow: pass # Just holds the autocomplete attributes (and must be hashable)
+    editWindowObject = DemoEditWindow()
+    editWindowObject.autocompleteMode, editWindowObject.autocompleteMinLength = 'Bible', minLength
+    editWindowObject.autocompleteBookWordCounts, editWindowObject.autocompleteWeightedBBB = bookWordCounts, None
+    editWindowObject.autocompleteWords, editWindowObject.autocompleteWordChars = autocompleteIndex, ''
+    originalEXOCounts = dict( bookWordCounts['EXO'] )
+
+    savedApp = BiblelatorGlobals.theApp
+    if savedApp is None: # We're not running inside the program
+        BiblelatorGlobals.theApp = SimpleNamespace( autocompleteVocabularies=AutocompleteVocabularies() )
+    try: # Save GEN (the book that was loaded) although the current verse key is now in EXO
+        oldCounts = bookWordCounts.get( 'GEN' )
+        newCounts, wordChanges = countChangedBookWords( editedGENText, oldCounts, internalMarkers, minLength )
+        updateBibleBookAutocompleteWords( editWindowObject, 'GEN', oldCounts, newCounts, wordChanges )
+    finally: BiblelatorGlobals.theApp = savedApp
+
+    expectedGENCounts = dict( countBookLinesWords( editedGENText.split( '\n' ), internalMarkers, 'GEN' ) )
+    result = bookWordCounts['EXO'] == originalEXOCounts and bookWordCounts['GEN'] == expectedGENCounts
+    for word in autocompleteCounts.keys() | expectedGENCounts.keys():
+        if ' ' in word or len(word) < minLength: continue # Only single words are always in the index
+        expectedScore = expectedGENCounts.get( word, 0 ) + originalEXOCounts.get( word, 0 )
+        if autocompleteIndex.getScore( word ) != (expectedScore or None):
+            vPrint( 'Quiet', debuggingThisModule, "  demoBookSwitchSave: {!r} has score {} instead of {}".format( word, autocompleteIndex.getScore( word ), expectedScore ) )
+            result = False
+    vPrint( 'Quiet', debuggingThisModule, "demoBookSwitchSave: word counts are {}".format( 'correct' if result else 'WRONG' ) )
+    return result
+# end of AutocompleteFunctions.demoBookSwitchSave
+
+
 def briefDemo() -> None:
     """
     Demo program to handle command line parameters and then run what they want.
@@ -891,6 +1458,8 @@ def briefDemo() -> None:
     BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
     vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
 
+    demoBookSwitchSave()
+
     tkRootWindow = tk.Tk()
     tkRootWindow.title( programNameVersion )
     tkRootWindow.textBox = tk.Text( tkRootWindow )
@@ -911,6 +1480,8 @@ def fullDemo() -> None:
     BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
     vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
 
+    demoBookSwitchSave()
+
     tkRootWindow = tk.Tk()
     tkRootWindow.title( programNameVersion )
     tkRootWindow.textBox = tk.Text( tkRootWindow )
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# AutocompleteIndex.py
+#
+# Prefix index used to look up the autocomplete words in text editors
+#
+# Copyright (C) 2020 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org+Biblelator@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+The autocomplete index holds all of the autocomplete words for an edit window
+    (which may be from a Bible or from a dictionary, etc.)
+    and answers "which words start with these letters?" queries
+    as the user is typing.
+
+The words are kept in one sorted list so that a prefix query is just
+    two binary searches (rather than a scan through every word),
+    and each word has a score so that the candidates come back
+    with the most common/likely words first.
+
+Words that the user has recently typed or selected also get a recency bonus
+    (which fades as other words are used) on top of their frequency score,
+    and when only the top few words are wanted (e.g., for the pop-up box)
+    they're chosen with a heap rather than by sorting every match.
+
+The ranked results for each prefix are cached
+    so that typing further letters of the same word only has to filter
+    the (already ranked) results of the shorter prefix.
+When a word is added or its score changes (e.g., every time the user types it),
+    it's just moved within the cached lists for its own prefixes
+    (found by binary searches) rather than those lists being thrown away and sorted again.
+
+Note that this module deliberately doesn't use tkinter.
+"""
+from bisect import bisect_left, insort
+import heapq
+
+# BibleOrgSys imports
+from BibleOrgSys import BibleOrgSysGlobals
+from BibleOrgSys.BibleOrgSysGlobals import fnPrint, vPrint, dPrint
+
+
+LAST_MODIFIED_DATE = '2020-06-20' # by RJH
+SHORT_PROGRAM_NAME = "AutocompleteIndex"
+PROGRAM_NAME = "Biblelator Autocomplete Index"
+PROGRAM_VERSION = '0.46'
+programNameVersion = f'{PROGRAM_NAME} v{PROGRAM_VERSION}'
+
+debuggingThisModule = False
+
+
+MAX_CACHED_PREFIXES = 2000 # The ranked prefix cache is simply emptied if it gets larger than this
+HIGHEST_CHARACTER = chr( 0x10FFFF ) # Appended to a prefix to find the end of the matching range
+MAX_RECENT_WORDS = 50 # Only this many recently used words get a recency bonus
+
+
+
+class AutocompleteIndex:
+    """
+    A class holding a list of autocomplete words along with their scores.
+
+    A higher score means that the word is more likely to be wanted,
+        e.g., because it's more common in the Bible,
+        or because the user has recently typed or selected it.
+    """
+    def __init__( self ):
+        """
+        Create an empty index.
+        """
+        fnPrint( debuggingThisModule, "AutocompleteIndex.__init__()" )
+        self.clear()
+    # end of AutocompleteIndex.__init__
+
+
+    def clear( self ) -> None:
+        """
+        Remove all the words from the index.
+        """
+        self.sortedWords = [] # All the words in code-point order (for the binary searches)
+        self.wordScores = {} # Indexed by word
+        self.topScore = 0 # So that promoted words can be put above everything else
+        self.bottomScore = 1 # So that appended words can be put below everything else
+        self.rankedCache = {} # Indexed by prefix, contains ranked lists of words
+        self.recentWords = {} # Indexed by word, contains the use number (with the most recent last)
+        self.useNumber = 0 # The use number of the most recently used word
+    # end of AutocompleteIndex.clear
+
+
+    def __len__( self ) -> int:
+        return len( self.sortedWords )
+    # end of AutocompleteIndex.__len__
+
+    def __contains__( self, word:str ) -> bool:
+        return word in self.wordScores
+    # end of AutocompleteIndex.__contains__
+
+    def __iter__( self ):
+        """
+        Iterate through the words in code-point order.
+        """
+        return iter( self.sortedWords )
+    # end of AutocompleteIndex.__iter__
+
+    def __str__( self ) -> str:
+        return "AutocompleteIndex object with {:,} words".format( len(self.sortedWords) )
+    # end of AutocompleteIndex.__str__
+
+
+    def getScore( self, word:str ) -> int:
+        """
+        Returns the current score for the word (or None if it's not in the index).
+        """
+        return self.wordScores.get( word )
+    # end of AutocompleteIndex.getScore
+
+
+    def getRecencyBonus( self, word:str ) -> float:
+        """
+        Returns the bonus for a recently used word
+            (enough to put the most recently used word above everything else
+            but fading away for older words).
+        """
+        try: age = self.useNumber - self.recentWords[word] # Always less than MAX_RECENT_WORDS
+        except KeyError: return 0
+        return (self.topScore + 1) * max( 0, MAX_RECENT_WORDS - age ) / MAX_RECENT_WORDS
+    # end of AutocompleteIndex.getRecencyBonus
+
+
+    def getRankScore( self, word:str ) -> float:
+        """
+        Returns the frequency-plus-recency score used to rank the word.
+        """
+        return self.wordScores.get( word, 0 ) + self.getRecencyBonus( word )
+    # end of AutocompleteIndex.getRankScore
+
+
+    def getCharacters( self ) -> set:
+        """
+        Returns the set of all characters used in the words that can be offered.
+        """
+        return set( ''.join( self.sortedWords ) )
+    # end of AutocompleteIndex.getCharacters
+
+
+    def setWords( self, wordList ) -> None:
+        """
+        Replace the contents of the index with the given words.
+
+        The wordList must already be in order with the most likely words first
+            and must not contain duplicates.
+        """
+        fnPrint( debuggingThisModule, "AutocompleteIndex.setWords( {:,} )".format( len(wordList) ) )
+
+        numWords = len( wordList )
+        self.wordScores = { word:numWords-j for j,word in enumerate( wordList ) }
+        if debuggingThisModule or BibleOrgSysGlobals.debugFlag or BibleOrgSysGlobals.strictCheckingFlag:
+            assert len(self.wordScores) == numWords # No duplicates
+        self.sortedWords = sorted( self.wordScores )
+        self.topScore, self.bottomScore = numWords, 1
+        self.rankedCache = {}
+        self.recentWords = {}
+    # end of AutocompleteIndex.setWords
+
+
+    def setWordCounts( self, wordCounts:dict ) -> None:
+        """
+        Replace the contents of the index with the given words
+            using their counts (i.e., frequencies) as their scores.
+        """
+        fnPrint( debuggingThisModule, "AutocompleteIndex.setWordCounts( {:,} )".format( len(wordCounts) ) )
+
+        self.wordScores = dict( wordCounts )
+        self.sortedWords = sorted( self.wordScores )
+        self.topScore = max( self.wordScores.values(), default=0 )
+        self.bottomScore = min( self.wordScores.values(), default=1 )
+        self.rankedCache = {}
+        self.recentWords = {}
+    # end of AutocompleteIndex.setWordCounts
+
+
+    def _mergeNewWords( self, newWords:list ) -> None:
+        """
+        Merge the given new words (which must not already be in the index)
+            into our sorted list.
+
+        Python's sort finds the two existing sorted runs,
+            so this is just a linear merge rather than a full re-sort.
+        """
+        if len(newWords) < 20: # Not worth the merge
+            for word in newWords: insort( self.sortedWords, word )
+        else:
+            self.sortedWords.extend( sorted( newWords ) )
+            self.sortedWords.sort()
+    # end of AutocompleteIndex._mergeNewWords
+
+
+    def appendWords( self, wordList ) -> None:
+        """
+        Add the given words (which must be in order with the most likely words first)
+            below all of the words that are already in the index.
+
+        Words that are already in the index keep their existing score.
+        """
+        fnPrint( debuggingThisModule, "AutocompleteIndex.appendWords( {:,} )".format( len(wordList) ) )
+
+        newWords = []
+        nextScore = self.bottomScore - 1
+        for word in wordList:
+            if word not in self.wordScores:
+                self.wordScores[word] = nextScore
+                newWords.append( word )
+                nextScore -= 1
+        self.bottomScore = nextScore + 1
+        self._mergeNewWords( newWords )
+        self.rankedCache = {}
+    # end of AutocompleteIndex.appendWords
+
+
+    def addWordCounts( self, wordCounts:dict ) -> None:
+        """
+        Add the given counts to the scores of the words in the index
+            (adding any new words as required).
+        """
+        fnPrint( debuggingThisModule, "AutocompleteIndex.addWordCounts( {:,} )".format( len(wordCounts) ) )
+
+        newWords = []
+        wordScores = self.wordScores
+        for word,count in wordCounts.items():
+            if word in wordScores: wordScores[word] += count
+            else:
+                wordScores[word] = count
+                newWords.append( word )
+            if wordScores[word] > self.topScore: self.topScore = wordScores[word]
+            if wordScores[word] < self.bottomScore: self.bottomScore = wordScores[word]
+        self._mergeNewWords( newWords )
+        self.rankedCache = {}
+    # end of AutocompleteIndex.addWordCounts
+
+
+    def adjustWordCounts( self, wordDeltas:dict ) -> list:
+        """
+        Add the given (positive or negative) amounts to the scores of the words in the index.
+
+        Words whose score drops to zero (or below) are removed from the index,
+            and new words with a positive amount are added.
+
+        Returns a list of the new words that were added.
+        """
+        fnPrint( debuggingThisModule, "AutocompleteIndex.adjustWordCounts( {:,} )".format( len(wordDeltas) ) )
+
+        newWords = []
+        wordScores = self.wordScores
+        for word,delta in wordDeltas.items():
+            if not delta: continue
+            if word in wordScores:
+                self._unrankWord( word )
+                newScore = wordScores[word] + delta
+                if newScore > 0:
+                    wordScores[word] = newScore
+                    if newScore > self.topScore: self.topScore = newScore
+                    if newScore < self.bottomScore: self.bottomScore = newScore
+                    self._rankWord( word )
+                else: # the word is no longer used
+                    del wordScores[word]
+                    self.recentWords.pop( word, None ) # so it's not offered as a recent word either
+                    del self.sortedWords[bisect_left( self.sortedWords, word )]
+            elif delta > 0:
+                wordScores[word] = delta
+                newWords.append( word )
+                if delta > self.topScore: self.topScore = delta
+                if delta < self.bottomScore: self.bottomScore = delta
+                self._rankWord( word )
+        self._mergeNewWords( newWords )
+        return newWords
+    # end of AutocompleteIndex.adjustWordCounts
+
+
+    def _findRankIndex( self, rankedWords:list, word:str ) -> int:
+        """
+        Returns the index in the ranked list where the word is (or should go)
+            using the word's current score.
+
+        The ranked lists are in order of decreasing score,
+            with words with the same score in code-point order.
+        """
+        wordScores = self.wordScores
+        score = wordScores[word]
+        lowIndex, highIndex = 0, len(rankedWords)
+        while lowIndex < highIndex:
+            middleIndex = (lowIndex + highIndex) // 2
+            middleWord = rankedWords[middleIndex]
+            middleScore = wordScores[middleWord]
+            if middleScore > score or (middleScore == score and middleWord < word):
+                lowIndex = middleIndex + 1
+            else: highIndex = middleIndex
+        return lowIndex
+    # end of AutocompleteIndex._findRankIndex
+
+
+    def _unrankWord( self, word:str ) -> None:
+        """
+        Remove the word from any cached results for its prefixes.
+
+        Must be called while the word still has its old score.
+        """
+        if self.rankedCache:
+            for endIndex in range( 1, len(word)+1 ):
+                rankedWords = self.rankedCache.get( word[:endIndex] )
+                if rankedWords is not None:
+                    rankIndex = self._findRankIndex( rankedWords, word )
+                    if debuggingThisModule or BibleOrgSysGlobals.debugFlag:
+                        assert rankedWords[rankIndex] == word
+                    del rankedWords[rankIndex]
+    # end of AutocompleteIndex._unrankWord
+
+
+    def _rankWord( self, word:str ) -> None:
+        """
+        Insert the word (with its new score) into any cached results for its prefixes.
+        """
+        if self.rankedCache:
+            for endIndex in range( 1, len(word)+1 ):
+                rankedWords = self.rankedCache.get( word[:endIndex] )
+                if rankedWords is not None:
+                    rankedWords.insert( self._findRankIndex( rankedWords, word ), word )
+    # end of AutocompleteIndex._rankWord
+
+
+    def addWord( self, word:str, score:int=0 ) -> None:
+        """
+        Add a new word to the index
+            or update the score of an existing word.
+        """
+        if word in self.wordScores: self._unrankWord( word )
+        else: insort( self.sortedWords, word )
+        self.wordScores[word] = score
+        if score > self.topScore: self.topScore = score
+        if score < self.bottomScore: self.bottomScore = score
+        self._rankWord( word )
+    # end of AutocompleteIndex.addWord
+
+
+    def promoteWord( self, word:str ) -> None:
+        """
+        Add the word if necessary (or else count it once more),
+            and note that it was used most recently so that it comes up on top next time.
+        """
+        self.addWord( word, self.wordScores.get( word, 0 ) + 1 )
+        self.recentWords.pop( word, None )
+        self.recentWords[word] = None
+        if len(self.recentWords) > MAX_RECENT_WORDS: # forget the oldest one
+            del self.recentWords[next( iter( self.recentWords ) )]
+        # Renumber them so that the age of a word is how many other words have been used since
+        self.recentWords = { recentWord:n for n,recentWord in enumerate( self.recentWords, start=1 ) }
+        self.useNumber = len( self.recentWords )
+    # end of AutocompleteIndex.promoteWord
+
+
+    def removeWord( self, word:str ) -> bool:
+        """
+        Remove the word from the index.
+
+        Returns True if the word was found.
+        """
+        if word not in self.wordScores: return False
+        self._unrankWord( word )
+        del self.wordScores[word]
+        self.recentWords.pop( word, None )
+        del self.sortedWords[bisect_left( self.sortedWords, word )]
+        return True
+    # end of AutocompleteIndex.removeWord
+
+
+    def _getRankedWords( self, prefix:str ) -> list:
+        """
+        Return a list of all the words which start with the given prefix
+            (including the prefix itself if it's a word)
+            with the highest scoring words first.
+        """
+        try: return self.rankedCache[prefix]
+        except KeyError: pass
+
+        if len(prefix) > 1 and prefix[:-1] in self.rankedCache:
+            # Just filter the already ranked list for the shorter prefix
+            rankedWords = [word for word in self.rankedCache[prefix[:-1]] if word.startswith( prefix )]
+        else: # Use the sorted list to find the range of matching words
+            startIndex = bisect_left( self.sortedWords, prefix )
+            endIndex = bisect_left( self.sortedWords, prefix+HIGHEST_CHARACTER, startIndex )
+            wordScores = self.wordScores
+            rankedWords = sorted( self.sortedWords[startIndex:endIndex], key=lambda word: -wordScores[word] ) # Stable so ties stay in code-point order
+
+        if len(self.rankedCache) >= MAX_CACHED_PREFIXES: self.rankedCache = {}
+        self.rankedCache[prefix] = rankedWords
+        return rankedWords
+    # end of AutocompleteIndex._getRankedWords
+
+
+    def _getRecentCompletions( self, prefix:str ) -> list:
+        """
+        Returns a list of the recently used words which start with the given prefix
+            (but not the prefix itself).
+        """
+        return [word for word in self.recentWords if word.startswith( prefix ) and word != prefix]
+    # end of AutocompleteIndex._getRecentCompletions
+
+
+    def getCompletions( self, prefix:str, maxCount:int=None ) -> list:
+        """
+        Returns a list of the words which start with the given prefix
+            (but not the prefix itself), with the most likely words first.
+
+        If maxCount is given, only returns (up to) that many words.
+            Because the cached list is already ranked by frequency,
+            the only candidates are the first maxCount words from it
+            plus any recently used words.
+        """
+        if not prefix: return []
+        rankedWords = self._getRankedWords( prefix )
+        recentWords = self._getRecentCompletions( prefix ) if self.recentWords else None
+        if maxCount is None:
+            results = [word for word in rankedWords if word != prefix]
+            return sorted( results, key=self.getRankScore, reverse=True ) if recentWords else results
+
+        candidates = []
+        for word in rankedWords:
+            if word != prefix:
+                candidates.append( word )
+                if len(candidates) >= maxCount: break
+        if not recentWords: return candidates
+        candidates.extend( word for word in recentWords if word not in candidates )
+        return heapq.nlargest( maxCount, candidates, key=self.getRankScore )
+    # end of AutocompleteIndex.getCompletions
+# end of class AutocompleteIndex
+
+
+
+def briefDemo() -> None:
+    """
+    Demo program to handle command line parameters and then run what they want.
+    """
+    BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
+    vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
+
+    acIndex = AutocompleteIndex()
+    acIndex.setWords( ['the','and','they','then','there','Lord God','therefore','thenceforth'] )
+    vPrint( 'Quiet', debuggingThisModule, acIndex )
+    for prefix in ( 'th', 'the', 'then', 'Lord', 'xyz' ):
+        vPrint( 'Quiet', debuggingThisModule, "  {!r} gave {}".format( prefix, acIndex.getCompletions( prefix ) ) )
+    acIndex.promoteWord( 'therefore' )
+    vPrint( 'Quiet', debuggingThisModule, "  After promoting 'therefore', 'the' gave {}".format( acIndex.getCompletions( 'the' ) ) )
+    vPrint( 'Quiet', debuggingThisModule, "  Top two for 'the' are {}".format( acIndex.getCompletions( 'the', 2 ) ) )
+
+    # Using one word over and over mustn't push other recently used words below their frequency scores
+    acIndex.setWords( ['the','then','they','there'] )
+    acIndex.promoteWord( 'then' )
+    for _n in range( 120 ): acIndex.promoteWord( 'there' )
+    for word in acIndex.recentWords:
+        assert acIndex.getRankScore( word ) >= acIndex.getScore( word ), "{!r} scored {} below its frequency score {}".format( word, acIndex.getRankScore( word ), acIndex.getScore( word ) )
+    assert acIndex.getCompletions( 'th', 2 ) == ['there','then'], acIndex.getCompletions( 'th', 2 )
+    vPrint( 'Quiet', debuggingThisModule, "  After using 'then' once and 'there' 120 times, 'th' gave {}".format( acIndex.getCompletions( 'th' ) ) )
+# end of AutocompleteIndex.briefDemo
+
+def fullDemo() -> None:
+    """
+    Full demo to check class is working
+    """
+    briefDemo()
+# end of AutocompleteIndex.fullDemo
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( SHORT_PROGRAM_NAME, PROGRAM_VERSION, LAST_MODIFIED_DATE )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    fullDemo()
+
+    BibleOrgSysGlobals.closedown( PROGRAM_NAME, PROGRAM_VERSION )
+# end of AutocompleteIndex.py
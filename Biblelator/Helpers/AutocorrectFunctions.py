@@ -23,6 +23,13 @@
 #   along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 """
+Autocorrect replaces certain typed character sequences (e.g., '<<')
+    with other text (e.g., '“') as soon as the last character is typed.
+
+The entries are compiled (by setAutocorrectEntries) into an AutocorrectMatcher,
+    a trie of the reversed input sequences, so that checking each keystroke
+    only needs to look back through the last few characters before the cursor
+    (no matter how many entries there are or how much text is in the box).
 """
 
 from gettext import gettext as _
@@ -40,7 +47,7 @@ if __name__ == '__main__':
 from Biblelator import BiblelatorGlobals
 
 
-LAST_MODIFIED_DATE = '2018-03-15' # by RJH
+LAST_MODIFIED_DATE = '2020-06-12' # by RJH
 SHORT_PROGRAM_NAME = "AutocorrectFunctions"
 PROGRAM_NAME = "Biblelator Autocorrect Functions"
 PROGRAM_VERSION = '0.46'
@@ -50,6 +57,58 @@ debuggingThisModule = False
 
 
 
+class AutocorrectMatcher:
+    """
+    A trie of the reversed input character sequences of the autocorrect entries.
+
+    Each node is a dict indexed by character,
+        and if an input sequence ends at that node, the '' entry
+        contains the position of that autocorrect entry in the original list.
+    """
+    def __init__( self, autocorrectEntries ):
+        """
+        Compile the list of 2-tuples (inChars,outChars) into the trie.
+        """
+        fnPrint( debuggingThisModule, "AutocorrectMatcher.__init__( {} )".format( len(autocorrectEntries) ) )
+        self.autocorrectEntries = list( autocorrectEntries )
+        self.trie = {}
+        self.maxLength = 0
+        for entryIndex,(inChars,_outChars) in enumerate( self.autocorrectEntries ):
+            if not inChars: continue
+            node = self.trie
+            for char in reversed( inChars ):
+                node = node.setdefault( char, {} )
+            node.setdefault( '', entryIndex ) # If there's duplicates, the first one wins
+            self.maxLength = max( len(inChars), self.maxLength )
+    # end of AutocorrectMatcher.__init__
+
+
+    def __len__( self ) -> int:
+        return len( self.autocorrectEntries )
+    # end of AutocorrectMatcher.__len__
+
+
+    def findMatch( self, previousText:str ):
+        """
+        Given the (last few) characters before the cursor,
+            returns the 2-tuple (inChars,outChars) of the autocorrect entry
+            whose input sequence ends the text (or None if there's none).
+
+        As with the original list, the first matching entry in the list wins.
+        """
+        node, bestIndex = self.trie, None
+        for char in reversed( previousText[-self.maxLength:] ):
+            try: node = node[char]
+            except KeyError: break
+            entryIndex = node.get( '' )
+            if entryIndex is not None and (bestIndex is None or entryIndex < bestIndex):
+                bestIndex = entryIndex
+        return None if bestIndex is None else self.autocorrectEntries[bestIndex]
+    # end of AutocorrectMatcher.findMatch
+# end of class AutocorrectMatcher
+
+
+
 def setAutocorrectEntries( self, autocorrectEntryList, append=False ):
     """
     Given a word list, set the entries into the autocorrect words
@@ -66,9 +125,8 @@ def setAutocorrectEntries( self, autocorrectEntryList, append=False ):
     else: self.autocorrectEntries = autocorrectEntryList
 
     # This next bit needs to be done whenever the autocorrect entries are changed
-    self.maxAutocorrectLength = 0
-    for inChars,outChars in self.autocorrectEntries:
-        self.maxAutocorrectLength = max( len(inChars), self.maxAutocorrectLength )
+    self.autocorrectMatcher = AutocorrectMatcher( self.autocorrectEntries )
+    self.maxAutocorrectLength = self.autocorrectMatcher.maxLength
 
     if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
         vPrint( 'Quiet', debuggingThisModule, "  autocorrect total entries loaded = {:,}".format( len(self.autocorrectEntries) ) )
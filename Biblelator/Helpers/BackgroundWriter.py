@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# BackgroundWriter.py
+#
+# Writes (saves) text files in a background thread
+#
+# Copyright (C) 2020 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org+Biblelator@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Saving a large book on a slow disk can freeze the GUI,
+    so an edit window can give a snapshot of the text to a BackgroundFileWriter
+    and then carry on editing.
+
+The file is written to a temporary file in the same folder,
+    flushed to the disk, and then renamed over the original file
+    so that the original file is never left half-written.
+
+If another save of the same file is requested while a file is still being written,
+    it replaces any earlier save of that file that hasn't been started yet,
+    i.e., only the newest snapshot of each file gets written.
+
+The writing thread never touches tkinter:
+    the GUI thread calls getResults() (usually from an after() loop)
+    to find out which saves have finished (or failed).
+
+Note that this module deliberately doesn't use tkinter.
+"""
+from gettext import gettext as _
+from typing import Any, Callable, List, Optional, Tuple
+import os
+import shutil
+import tempfile
+import threading
+import queue
+import logging
+
+# BibleOrgSys imports
+from BibleOrgSys import BibleOrgSysGlobals
+from BibleOrgSys.BibleOrgSysGlobals import fnPrint, vPrint, dPrint
+
+
+LAST_MODIFIED_DATE = '2020-06-20' # by RJH
+SHORT_PROGRAM_NAME = "BackgroundWriter"
+PROGRAM_NAME = "Biblelator Background Writer"
+PROGRAM_VERSION = '0.46'
+programNameVersion = f'{PROGRAM_NAME} v{PROGRAM_VERSION}'
+
+debuggingThisModule = False
+
+
+
+def writeFileAtomically( filepath:str, text:str, encoding:str='utf-8', newline:Optional[str]=None ) -> None:
+    """
+    Writes the text to a temporary file in the same folder,
+        makes sure that it's actually on the disk,
+        and then renames it to the given filepath (replacing any existing file).
+
+    Raises an OSError (and leaves any existing file unchanged) if something fails.
+    """
+    fnPrint( debuggingThisModule, "writeFileAtomically( {}, {:,} chars, {}, {!r} )".format( filepath, len(text), encoding, newline ) )
+
+    folderpath, filename = os.path.split( filepath )
+    fileDescriptor, tempFilepath = tempfile.mkstemp( suffix='.tmp', prefix='.{}.'.format( filename ), dir=folderpath or None )
+    try:
+        with open( fileDescriptor, mode='wt', encoding=encoding, newline=newline ) as tempFile:
+            tempFile.write( text )
+            tempFile.flush()
+            os.fsync( tempFile.fileno() )
+        if os.path.exists( filepath ):
+            shutil.copymode( filepath, tempFilepath ) # mkstemp only gives permissions for the owner
+        os.replace( tempFilepath, filepath )
+    except BaseException:
+        try: os.remove( tempFilepath )
+        except OSError: pass
+        raise
+# end of BackgroundWriter.writeFileAtomically
+
+
+
+class BackgroundFileWriter:
+    """
+    A class which writes text files in a background thread.
+
+    Only the newest waiting save of each file is written (older waiting ones are dropped).
+    """
+    def __init__( self ) -> None:
+        """
+        """
+        fnPrint( debuggingThisModule, "BackgroundFileWriter.__init__()" )
+        self.lock = threading.Lock()
+        self.waitingSaves = {} # Indexed by filepath, contains the newest save that hasn't been started yet
+        self.thread = None
+        self.resultsQueue = queue.Queue()
+    # end of BackgroundFileWriter.__init__
+
+
+    def __str__( self ) -> str:
+        return "BackgroundFileWriter: {}".format( 'busy' if self.isBusy() else 'idle' )
+    # end of BackgroundFileWriter.__str__
+
+
+    def write( self, filepath:str, text:str, encoding:str='utf-8', newline:Optional[str]=None,
+                        tag:Any=None, afterWriteFunction:Optional[Callable[[],None]]=None ) -> None:
+        """
+        Queues the text to be written to the file and returns immediately.
+
+        The tag is returned (with the results) by getResults().
+        If given, afterWriteFunction is called (in the background thread) after a successful write
+            (before the result is returned). Any exception that it raises is only logged,
+            i.e., the write is still reported as successful.
+        """
+        fnPrint( debuggingThisModule, "BackgroundFileWriter.write( {}, {:,} chars, {}, {!r}, {}, {} )".format( filepath, len(text), encoding, newline, tag, afterWriteFunction ) )
+
+        with self.lock:
+            if self.waitingSaves.pop( filepath, None ) is not None:
+                vPrint( 'Never', debuggingThisModule, "BackgroundFileWriter.write is replacing the waiting save for {}".format( filepath ) )
+            self.waitingSaves[filepath] = (text, encoding, newline, tag, afterWriteFunction) # Goes to the end of the (ordered) dict
+            if self.thread is None:
+                self.thread = threading.Thread( target=self._writeWaitingSaves, name='BackgroundFileWriter' )
+                self.thread.start()
+    # end of BackgroundFileWriter.write
+
+
+    def _writeWaitingSaves( self ) -> None:
+        """
+        Runs in the background thread until there's nothing more to write.
+        """
+        while True:
+            with self.lock:
+                if not self.waitingSaves:
+                    self.thread = None
+                    return
+                filepath = next( iter( self.waitingSaves ) ) # The oldest one
+                text, encoding, newline, tag, afterWriteFunction = self.waitingSaves.pop( filepath )
+            try: writeFileAtomically( filepath, text, encoding, newline )
+            except Exception as err:
+                logging.error( "BackgroundFileWriter couldn't write {}: {}".format( filepath, err ) )
+                self.resultsQueue.put( (filepath, tag, err) )
+                continue
+            if afterWriteFunction is not None:
+                try: afterWriteFunction()
+                except Exception as err: # but the file was still written ok
+                    logging.error( "BackgroundFileWriter after-write function failed for {}: {}".format( filepath, err ) )
+            self.resultsQueue.put( (filepath, tag, None) )
+    # end of BackgroundFileWriter._writeWaitingSaves
+
+
+    def isBusy( self ) -> bool:
+        """
+        Returns True if there's anything still being written
+            or any results that haven't been collected yet.
+        """
+        with self.lock:
+            return self.thread is not None or not self.resultsQueue.empty()
+    # end of BackgroundFileWriter.isBusy
+
+
+    def getResults( self ) -> List[Tuple[str,Any,Optional[Exception]]]:
+        """
+        Returns a list of (filepath, tag, error) 3-tuples for the writes that have finished
+            (where error is None if the write was successful).
+        """
+        results = []
+        while True:
+            try: results.append( self.resultsQueue.get( block=False ) )
+            except queue.Empty: return results
+    # end of BackgroundFileWriter.getResults
+
+
+    def waitUntilFinished( self ) -> None:
+        """
+        Blocks until everything has been written.
+
+        Note that the results still need to be collected with getResults().
+        """
+        fnPrint( debuggingThisModule, "BackgroundFileWriter.waitUntilFinished()" )
+        while True:
+            with self.lock: thread = self.thread
+            if thread is None: return
+            thread.join()
+    # end of BackgroundFileWriter.waitUntilFinished
+# end of class BackgroundFileWriter
+
+
+
+def briefDemo() -> None:
+    """
+    Demo program to handle command line parameters and then run what they want.
+    """
+    BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
+    vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
+
+    with tempfile.TemporaryDirectory() as folderpath:
+        filepath = os.path.join( folderpath, 'Test.USFM' )
+        writer = BackgroundFileWriter()
+        for j in range( 1, 6 ):
+            writer.write( filepath, '\\id GEN\n\\c 1\n\\v 1 Version {}\n'.format( j ), newline='\r\n', tag=j )
+        writer.waitUntilFinished()
+        vPrint( 'Quiet', debuggingThisModule, writer, writer.getResults() )
+        with open( filepath, 'rt', encoding='utf-8' ) as savedFile:
+            vPrint( 'Quiet', debuggingThisModule, "  Saved: {!r}  Folder: {}".format( savedFile.read(), os.listdir( folderpath ) ) )
+# end of BackgroundWriter.briefDemo
+
+def fullDemo() -> None:
+    """
+    Full demo to check class is working
+    """
+    briefDemo()
+# end of BackgroundWriter.fullDemo
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( SHORT_PROGRAM_NAME, PROGRAM_VERSION, LAST_MODIFIED_DATE )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    fullDemo()
+
+    BibleOrgSysGlobals.closedown( PROGRAM_NAME, PROGRAM_VERSION )
+# end of BackgroundWriter.py
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# BookTextBuffer.py
+#
+# Holds the text of a book which is only partly displayed in an edit window
+#
+# Copyright (C) 2020 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org+Biblelator@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+The USFM edit window usually only displays a few verses (or a chapter)
+    of the book that is being edited.
+
+So the BookTextBuffer holds the book as three pieces:
+    the (unchanging) text before the displayed verses,
+    the text in the edit box (fetched only when needed),
+    and the (unchanging) text after the displayed verses.
+The before and after pieces are held as offsets into one source string
+    (usually the joined text of the whole cached book)
+    so that navigating or changing the view mode doesn't copy them.
+
+getText() only joins the pieces if the displayed text has changed
+    since it was last called, so saving, checking, and getting statistics
+    don't each have to build the entire book again.
+
+Note that this module deliberately doesn't use tkinter.
+"""
+from gettext import gettext as _
+from typing import Callable
+
+# BibleOrgSys imports
+from BibleOrgSys import BibleOrgSysGlobals
+from BibleOrgSys.BibleOrgSysGlobals import fnPrint, vPrint, dPrint
+
+
+LAST_MODIFIED_DATE = '2020-06-13' # by RJH
+SHORT_PROGRAM_NAME = "BookTextBuffer"
+PROGRAM_NAME = "Biblelator Book Text Buffer"
+PROGRAM_VERSION = '0.46'
+programNameVersion = f'{PROGRAM_NAME} v{PROGRAM_VERSION}'
+
+debuggingThisModule = False
+
+
+
+class BookTextBuffer:
+    """
+    A class holding the undisplayed text before and after the displayed part of a book
+        and able to give the entire text of the book when needed.
+    """
+    def __init__( self, getDisplayedText:Callable[[],str] ) -> None:
+        """
+        The given function is called to get the current displayed text (usually from an edit box).
+        """
+        fnPrint( debuggingThisModule, "BookTextBuffer.__init__( {} )".format( getDisplayedText ) )
+        self.getDisplayedText = getDisplayedText
+        self.clear()
+    # end of BookTextBuffer.__init__
+
+
+    def clear( self ) -> None:
+        """
+        Forget any surrounding text, i.e., the displayed text is the entire book.
+        """
+        self.setSurroundingText( '', 0, 0 )
+    # end of BookTextBuffer.clear
+
+
+    def setSurroundingText( self, sourceText:str, beforeEnd:int, afterStart:int ) -> None:
+        """
+        The undisplayed text is sourceText[:beforeEnd] and sourceText[afterStart:].
+
+        Note that sourceText isn't copied (so it must not be changed later).
+        """
+        fnPrint( debuggingThisModule, "BookTextBuffer.setSurroundingText( {:,} chars, {:,}, {:,} )".format( len(sourceText), beforeEnd, afterStart ) )
+        if BibleOrgSysGlobals.debugFlag: assert 0 <= beforeEnd <= afterStart <= len(sourceText)
+
+        self.sourceText, self.beforeEnd, self.afterStart = sourceText, beforeEnd, afterStart
+        self.joinedText = self.joinedDisplayedText = None
+    # end of BookTextBuffer.setSurroundingText
+
+
+    def __len__( self ) -> int:
+        """
+        Returns the number of characters in the entire book (without joining it).
+        """
+        return self.beforeEnd + len( self.getDisplayedText() ) + len( self.sourceText ) - self.afterStart
+    # end of BookTextBuffer.__len__
+
+
+    def __str__( self ) -> str:
+        return "BookTextBuffer: {:,} chars before, {:,} chars after".format( self.beforeEnd, len(self.sourceText) - self.afterStart )
+    # end of BookTextBuffer.__str__
+
+
+    def getText( self ) -> str:
+        """
+        Returns the entire text of the book.
+
+        The pieces are only joined again if the displayed text has changed.
+        """
+        displayedText = self.getDisplayedText()
+        if self.joinedText is None or displayedText != self.joinedDisplayedText:
+            vPrint( 'Never', debuggingThisModule, "BookTextBuffer.getText() joining {:,} displayed chars".format( len(displayedText) ) )
+            if self.beforeEnd == 0 and self.afterStart == len(self.sourceText):
+                self.joinedText = displayedText # Nothing else to add
+            else:
+                self.joinedText = ''.join( (self.sourceText[:self.beforeEnd], displayedText, self.sourceText[self.afterStart:]) )
+            self.joinedDisplayedText = displayedText
+        return self.joinedText
+    # end of BookTextBuffer.getText
+# end of class BookTextBuffer
+
+
+
+def briefDemo() -> None:
+    """
+    Demo program to handle command line parameters and then run what they want.
+    """
+    BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
+    vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
+
+    bookText = '\\id GEN\n\\c 1\n\\p\n\\v 1 In the beginning\n\\v 2 The earth\n\\v 3 Then God said\n'
+    displayedStart, displayedEnd = bookText.index( '\\v 2' ), bookText.index( '\\v 3' )
+    editBoxText = bookText[displayedStart:displayedEnd].replace( 'earth', 'world' )
+    buffer = BookTextBuffer( lambda: editBoxText )
+    buffer.setSurroundingText( bookText, displayedStart, displayedEnd )
+    vPrint( 'Quiet', debuggingThisModule, buffer )
+    vPrint( 'Quiet', debuggingThisModule, "  {:,} chars: {!r}".format( len(buffer), buffer.getText() ) )
+# end of BookTextBuffer.briefDemo
+
+def fullDemo() -> None:
+    """
+    Full demo to check class is working
+    """
+    briefDemo()
+# end of BookTextBuffer.fullDemo
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( SHORT_PROGRAM_NAME, PROGRAM_VERSION, LAST_MODIFIED_DATE )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    fullDemo()
+
+    BibleOrgSysGlobals.closedown( PROGRAM_NAME, PROGRAM_VERSION )
+# end of BookTextBuffer.py
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# BookTextCache.py
+#
+# Keeps the text of recently read book files in memory
+#
+# Copyright (C) 2020 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org+Biblelator@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Edit windows read the entire book file every time that the user changes books,
+    so flipping back and forth between two books kept reading them from the disk.
+
+The BookTextCache (one for the whole program -- see getBookTextCache())
+    keeps the text of the most recently used files (indexed by absolute path).
+Each entry is checked against the file modification time and size
+    before it's used, so a file that has been changed is read again.
+
+The total size of the cached texts is kept under a memory budget
+    by dropping the least recently used files.
+
+Note that this module deliberately doesn't use tkinter.
+"""
+from gettext import gettext as _
+from typing import Optional
+from collections import OrderedDict
+import sys
+import os
+import threading
+
+# BibleOrgSys imports
+from BibleOrgSys import BibleOrgSysGlobals
+from BibleOrgSys.BibleOrgSysGlobals import fnPrint, vPrint, dPrint
+
+# Biblelator imports
+from Biblelator.Helpers.FileStamps import getFileStamp
+
+
+LAST_MODIFIED_DATE = '2020-06-18' # by RJH
+SHORT_PROGRAM_NAME = "BookTextCache"
+PROGRAM_NAME = "Biblelator Book Text Cache"
+PROGRAM_VERSION = '0.46'
+programNameVersion = f'{PROGRAM_NAME} v{PROGRAM_VERSION}'
+
+debuggingThisModule = False
+
+
+DEFAULT_BOOK_TEXT_CACHE_SIZE = 64 # Megabytes
+
+
+
+class BookTextCache:
+    """
+    A class holding the text of recently read files
+        (as long as the files haven't been changed since).
+    """
+    def __init__( self, maxBytes:int=DEFAULT_BOOK_TEXT_CACHE_SIZE*1024*1024 ) -> None:
+        """
+        """
+        fnPrint( debuggingThisModule, "BookTextCache.__init__( {:,} )".format( maxBytes ) )
+        self.maxBytes = maxBytes
+        self.lock = threading.Lock() # Files might also be read from background threads
+        self.entries = OrderedDict() # Indexed by absolute filepath, contains 4-tuples (fileStamp, encoding, text, numBytes)
+        self.totalBytes = 0
+        self.hits = self.misses = self.evictions = 0
+    # end of BookTextCache.__init__
+
+
+    def __len__( self ) -> int:
+        return len( self.entries )
+    # end of BookTextCache.__len__
+
+
+    def __str__( self ) -> str:
+        return "BookTextCache: {} files using {:,} of {:,} bytes; {:,} hits, {:,} misses, {:,} evictions" \
+                    .format( len(self.entries), self.totalBytes, self.maxBytes, self.hits, self.misses, self.evictions )
+    # end of BookTextCache.__str__
+
+
+    def setMaxBytes( self, maxBytes:int ) -> None:
+        """
+        Changes the memory budget (dropping files if necessary).
+        """
+        fnPrint( debuggingThisModule, "BookTextCache.setMaxBytes( {:,} )".format( maxBytes ) )
+        with self.lock:
+            self.maxBytes = maxBytes
+            self._evict()
+    # end of BookTextCache.setMaxBytes
+
+
+    def _evict( self ) -> None:
+        """
+        Drop the least recently used files until we're within the memory budget.
+
+        Must be called with the lock held.
+        """
+        while self.totalBytes > self.maxBytes and self.entries:
+            filepath, (fileStamp, encoding, text, numBytes) = self.entries.popitem( last=False )
+            self.totalBytes -= numBytes
+            self.evictions += 1
+            vPrint( 'Never', debuggingThisModule, "BookTextCache dropped {}".format( filepath ) )
+    # end of BookTextCache._evict
+
+
+    def _store( self, filepath:str, fileStamp, encoding:Optional[str], text:str ) -> None:
+        """
+        Must be called with the lock held.
+        """
+        oldEntry = self.entries.pop( filepath, None )
+        if oldEntry is not None: self.totalBytes -= oldEntry[3]
+        numBytes = sys.getsizeof( text )
+        if fileStamp is None or numBytes > self.maxBytes: return # Don't keep it
+        self.entries[filepath] = (fileStamp, encoding, text, numBytes) # Goes to the (most recently used) end
+        self.totalBytes += numBytes
+        self._evict()
+    # end of BookTextCache._store
+
+
+    def getText( self, filepath:str, encoding:Optional[str]='utf-8', keep:bool=True ) -> str:
+        """
+        Returns the entire text of the file (like reading it in text mode),
+            only reading it from the disk if it's not in the cache or has changed.
+
+        If keep is False, a file that has to be read isn't added to the cache
+            (e.g., when reading through all the books of a project).
+
+        Raises OSError (or UnicodeError) if the file can't be read.
+        """
+        filepath = os.path.abspath( filepath )
+        fileStamp = getFileStamp( filepath )
+        with self.lock:
+            entry = self.entries.get( filepath )
+            if entry is not None and fileStamp is not None and entry[0] == fileStamp and entry[1] == encoding:
+                self.entries.move_to_end( filepath )
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        vPrint( 'Never', debuggingThisModule, "BookTextCache.getText reading {}".format( filepath ) )
+        with open( filepath, 'rt', encoding=encoding ) as textFile:
+            text = textFile.read()
+        if keep or entry is not None:
+            with self.lock: self._store( filepath, fileStamp, encoding, text )
+        return text
+    # end of BookTextCache.getText
+
+
+    def updateText( self, filepath:str, encoding:Optional[str], text:str ) -> None:
+        """
+        Called after the text has been written to the file (e.g., from a background save)
+            so that we don't have to read the file again.
+
+        The text must be what reading the file would give
+            (i.e., with newlines as \\n).
+        """
+        fnPrint( debuggingThisModule, "BookTextCache.updateText( {}, {}, {:,} chars )".format( filepath, encoding, len(text) ) )
+        filepath = os.path.abspath( filepath )
+        fileStamp = getFileStamp( filepath )
+        with self.lock: self._store( filepath, fileStamp, encoding, text )
+    # end of BookTextCache.updateText
+
+
+    def clear( self ) -> None:
+        """
+        Forget all the files (but not the hit and miss counts).
+        """
+        with self.lock:
+            self.entries.clear()
+            self.totalBytes = 0
+    # end of BookTextCache.clear
+# end of class BookTextCache
+
+
+bookTextCache = None
+bookTextCacheLock = threading.Lock()
+
+def getBookTextCache() -> BookTextCache:
+    """
+    Returns the BookTextCache shared by all the windows (and background threads) in the program.
+    """
+    global bookTextCache
+    with bookTextCacheLock:
+        if bookTextCache is None:
+            bookTextCache = BookTextCache()
+        return bookTextCache
+# end of BookTextCache.getBookTextCache
+
+
+
+def briefDemo() -> None:
+    """
+    Demo program to handle command line parameters and then run what they want.
+    """
+    import tempfile
+    BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
+    vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
+
+    with tempfile.TemporaryDirectory() as folderpath:
+        cache = BookTextCache( maxBytes=2000 )
+        for BBB in ('GEN','EXO','LEV'):
+            with open( os.path.join( folderpath, BBB+'.USFM' ), 'wt', encoding='utf-8' ) as bookFile:
+                bookFile.write( '\\id {}\n'.format( BBB ) + '\\v 1 Some text\n' * 40 )
+        for BBB in ('GEN','EXO','GEN','EXO','LEV','GEN'):
+            cache.getText( os.path.join( folderpath, BBB+'.USFM' ) )
+        vPrint( 'Quiet', debuggingThisModule, cache )
+# end of BookTextCache.briefDemo
+
+def fullDemo() -> None:
+    """
+    Full demo to check class is working
+    """
+    briefDemo()
+# end of BookTextCache.fullDemo
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( SHORT_PROGRAM_NAME, PROGRAM_VERSION, LAST_MODIFIED_DATE )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    fullDemo()
+
+    BibleOrgSysGlobals.closedown( PROGRAM_NAME, PROGRAM_VERSION )
+# end of BookTextCache.py
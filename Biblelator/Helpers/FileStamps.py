@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# FileStamps.py
+#
+# Tells when a file has been changed
+#
+# Copyright (C) 2020 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org+Biblelator@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Various caches (word counts, book texts, book indexes) need to know
+    if a file has changed since they read it.
+
+A file stamp is a 2-tuple being the modification time (in ns) and size of the file.
+
+Note that this module deliberately doesn't use tkinter
+    (so it can be imported by the background threads).
+"""
+from gettext import gettext as _
+from typing import Optional, Tuple
+import os
+
+# BibleOrgSys imports
+from BibleOrgSys import BibleOrgSysGlobals
+from BibleOrgSys.BibleOrgSysGlobals import fnPrint, vPrint, dPrint
+
+
+LAST_MODIFIED_DATE = '2020-06-20' # by RJH
+SHORT_PROGRAM_NAME = "FileStamps"
+PROGRAM_NAME = "Biblelator File Stamps"
+PROGRAM_VERSION = '0.46'
+programNameVersion = f'{PROGRAM_NAME} v{PROGRAM_VERSION}'
+
+debuggingThisModule = False
+
+
+
+def getFileStamp( filepath ) -> Optional[Tuple[int,int]]:
+    """
+    Returns a 2-tuple being the modification time (in ns) and size of the file,
+        or None if the file doesn't exist.
+    """
+    try: fileStat = os.stat( filepath )
+    except OSError: return None
+    return fileStat.st_mtime_ns, fileStat.st_size
+# end of FileStamps.getFileStamp
+
+
+
+def briefDemo() -> None:
+    """
+    Demo program to handle command line parameters and then run what they want.
+    """
+    BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
+    vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
+
+    vPrint( 'Quiet', debuggingThisModule, __file__, getFileStamp( __file__ ) )
+    vPrint( 'Quiet', debuggingThisModule, 'NonExistent', getFileStamp( 'NonExistent' ) )
+# end of FileStamps.briefDemo
+
+def fullDemo() -> None:
+    """
+    Full demo to check class is working
+    """
+    briefDemo()
+# end of FileStamps.fullDemo
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( SHORT_PROGRAM_NAME, PROGRAM_VERSION, LAST_MODIFIED_DATE )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    fullDemo()
+
+    BibleOrgSysGlobals.closedown( PROGRAM_NAME, PROGRAM_VERSION )
+# end of FileStamps.py
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# HunspellAutocompleteIndex.py
+#
+# Autocomplete index for Hunspell dictionaries (which expands word endings, etc. as needed)
+#
+# Copyright (C) 2020 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org+Biblelator@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+A Hunspell dictionary consists of two files:
+    the .dic file lists the stems (root words), each with some flags,
+    and the .aff file contains the prefix and suffix rules for each flag
+    (e.g., SFX flag D might add -ed or -ied to verbs).
+
+Rather than generating every possible word form when the dictionary is loaded,
+    the HunspellAutocompleteIndex only stores the stems and their flags,
+    and then uses the compiled affix rules to generate the other word forms
+    for just the stems that might match what the user is typing
+    (and caches those results).
+
+Because the rules are read from the .aff file,
+    dictionaries for other languages can be used as well.
+
+Note that this module deliberately doesn't use tkinter.
+"""
+import os
+import re
+import logging
+import heapq
+from collections import defaultdict
+
+# BibleOrgSys imports
+from BibleOrgSys import BibleOrgSysGlobals
+from BibleOrgSys.BibleOrgSysGlobals import fnPrint, vPrint, dPrint
+
+# Biblelator imports
+if __name__ == '__main__':
+    import sys
+    aboveAboveFolderpath = os.path.dirname( os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ) )
+    if aboveAboveFolderpath not in sys.path:
+        sys.path.insert( 0, aboveAboveFolderpath )
+from Biblelator.Helpers.AutocompleteIndex import AutocompleteIndex
+
+
+LAST_MODIFIED_DATE = '2020-06-11' # by RJH
+SHORT_PROGRAM_NAME = "HunspellAutocompleteIndex"
+PROGRAM_NAME = "Biblelator Hunspell Autocomplete Index"
+PROGRAM_VERSION = '0.46'
+programNameVersion = f'{PROGRAM_NAME} v{PROGRAM_VERSION}'
+
+debuggingThisModule = False
+
+
+MAX_CACHED_INFLECTIONS = 20000 # The cache of generated word forms is simply emptied if it gets larger than this
+MIN_PREFIXED_ROOT_LENGTH = 2 # Don't look for words with a prefix (like re-) until this many letters of the root are typed
+HIDDEN_FLAG_NAMES = ( 'FORBIDDENWORD', 'NOSUGGEST', 'ONLYINCOMPOUND', ) # Stems (and their forms) with these flags are never offered
+NEED_AFFIX_FLAG_NAMES = ( 'NEEDAFFIX', 'PSEUDOROOT', ) # Only the forms of stems with these flags are offered
+
+
+
+def convertHunspellEncoding( encoding:str ) -> str:
+    """
+    Convert a Hunspell SET encoding name to a Python one.
+    """
+    encoding = encoding.lower()
+    if encoding.startswith( 'microsoft-' ): encoding = encoding[10:] # e.g., microsoft-cp1251
+    return encoding
+# end of HunspellAutocompleteIndex.convertHunspellEncoding
+
+
+def makeConditionRegex( condition:str, isSuffix:bool ):
+    """
+    Convert a Hunspell affix condition (e.g., '[^aeiou]y')
+        into a compiled regex which matches the end (or start) of a stem.
+
+    Returns None if the condition always matches.
+    """
+    if condition == '.': return None
+    regexString, inBrackets = '', False
+    for char in condition:
+        if inBrackets:
+            if char == ']': inBrackets = False
+            regexString += '\\\\' if char == '\\' else char
+        elif char == '[': inBrackets = True; regexString += char
+        elif char == '.': regexString += char
+        else: regexString += re.escape( char )
+    return re.compile( regexString+'$' if isSuffix else '^'+regexString )
+# end of HunspellAutocompleteIndex.makeConditionRegex
+
+
+
+class HunspellAffixRules:
+    """
+    A class holding the compiled prefix and suffix rules from a Hunspell .aff file.
+    """
+    def __init__( self ):
+        """
+        Create an empty set of rules (so no other word forms are generated).
+        """
+        fnPrint( debuggingThisModule, "HunspellAffixRules.__init__()" )
+        self.encoding = 'utf-8'
+        self.flagType = 'char' # or long, num, or UTF-8
+        self.flagAliases = [] # from AF lines
+        self.prefixRules, self.suffixRules = defaultdict( list ), defaultdict( list ) # Indexed by flag
+        self.hiddenFlags, self.needAffixFlags = set(), set()
+        self.prefixTexts = set() # 2-tuples of the added text and the stripped text for all prefix rules
+        self.suffixStrips = { '' } # All the different texts which are removed by suffix rules
+    # end of HunspellAffixRules.__init__
+
+
+    def __str__( self ) -> str:
+        return "HunspellAffixRules object with {} prefix and {} suffix flags".format( len(self.prefixRules), len(self.suffixRules) )
+    # end of HunspellAffixRules.__str__
+
+
+    def load( self, affixFilepath ) -> None:
+        """
+        Load and compile the rules from the Hunspell .aff file.
+
+        The encoding is taken from the SET line (which is usually near the top of the file).
+        """
+        fnPrint( debuggingThisModule, "HunspellAffixRules.load( {} )".format( affixFilepath ) )
+
+        with open( affixFilepath, 'rt', encoding='latin-1' ) as affixFile: # Only to find the encoding
+            for line in affixFile:
+                if line.startswith( 'SET ' ):
+                    self.encoding = convertHunspellEncoding( line.split()[1] )
+                    break
+
+        remainingRuleCount = 0
+        with open( affixFilepath, 'rt', encoding=self.encoding, errors='replace' ) as affixFile:
+            for line in affixFile:
+                fields = line.split()
+                if not fields or fields[0].startswith( '#' ): continue
+                keyword = fields[0]
+                if keyword in ('PFX','SFX') and len(fields) >= 4:
+                    if remainingRuleCount == 0: # it's a header line, e.g., SFX D Y 4
+                        ruleFlag, crossProduct = fields[1], fields[2]=='Y'
+                        try: remainingRuleCount = int( fields[3] )
+                        except ValueError: logging.error( "HunspellAffixRules: Bad affix header {!r} in {}".format( line, affixFilepath ) )
+                        continue
+                    # else it's a rule line, e.g., SFX D y ied [^aeiou]y
+                    remainingRuleCount -= 1
+                    strip = '' if fields[2]=='0' else fields[2]
+                    add = fields[3].split( '/', 1 )[0] # We ignore any continuation flags
+                    if add == '0': add = ''
+                    condition = fields[4] if len(fields) > 4 else '.'
+                    rule = ( strip, add, makeConditionRegex( condition, keyword=='SFX' ), crossProduct )
+                    if keyword == 'PFX':
+                        self.prefixRules[ruleFlag].append( rule )
+                        self.prefixTexts.add( (add, strip) )
+                    else:
+                        self.suffixRules[ruleFlag].append( rule )
+                        self.suffixStrips.add( strip )
+                elif keyword == 'FLAG' and len(fields) > 1: self.flagType = fields[1]
+                elif keyword == 'AF' and len(fields) > 1 and not fields[1].isdigit(): # an alias (not the count)
+                    self.flagAliases.append( fields[1] )
+                elif keyword in HIDDEN_FLAG_NAMES and len(fields) > 1: self.hiddenFlags.add( fields[1] )
+                elif keyword in NEED_AFFIX_FLAG_NAMES and len(fields) > 1: self.needAffixFlags.add( fields[1] )
+        vPrint( 'Info', debuggingThisModule, "  Loaded {}".format( self ) )
+    # end of HunspellAffixRules.load
+
+
+    def parseFlags( self, flagString:str ) -> tuple:
+        """
+        Split a flag string from the .dic file into the individual flags.
+        """
+        if self.flagAliases and flagString.isdigit():
+            try: flagString = self.flagAliases[int(flagString)-1]
+            except IndexError: return ()
+        if self.flagType == 'long':
+            return tuple( flagString[j:j+2] for j in range( 0, len(flagString), 2 ) )
+        if self.flagType == 'num':
+            return tuple( flagString.split( ',' ) )
+        return tuple( flagString ) # one character per flag
+    # end of HunspellAffixRules.parseFlags
+
+
+    def getAffixCharacters( self ) -> set:
+        """
+        Returns the set of all characters that might be added to stems.
+        """
+        affixCharacters = set()
+        for rules in (self.prefixRules, self.suffixRules):
+            for ruleList in rules.values():
+                for _strip,add,_regex,_crossProduct in ruleList:
+                    affixCharacters.update( add )
+        return affixCharacters
+    # end of HunspellAffixRules.getAffixCharacters
+
+
+    def expandStem( self, stem:str, flags:tuple ) -> list:
+        """
+        Returns a list of all the other word forms that can be generated from the stem
+            (not including the stem itself).
+        """
+        forms, crossSuffixedForms = [], []
+        for flag in flags:
+            for strip,add,conditionRegex,crossProduct in self.suffixRules.get( flag, () ):
+                if stem.endswith( strip ) and (conditionRegex is None or conditionRegex.search( stem )):
+                    form = stem[:len(stem)-len(strip)] + add
+                    forms.append( form )
+                    if crossProduct: crossSuffixedForms.append( form )
+        for flag in flags:
+            for strip,add,conditionRegex,crossProduct in self.prefixRules.get( flag, () ):
+                if stem.startswith( strip ) and (conditionRegex is None or conditionRegex.search( stem )):
+                    forms.append( add + stem[len(strip):] )
+                    if crossProduct:
+                        forms.extend( add + form[len(strip):] for form in crossSuffixedForms )
+        return list( dict.fromkeys( form for form in forms if form != stem ) ) # Remove duplicates
+    # end of HunspellAffixRules.expandStem
+# end of class HunspellAffixRules
+
+
+
+class HunspellAutocompleteIndex( AutocompleteIndex ):
+    """
+    An autocomplete index holding the stems from a Hunspell .dic file
+        along with their flags and the affix rules.
+
+    The other word forms are generated when the user types something
+        that might match them, i.e., when the start of the stem has been typed,
+        or the stem (maybe without a stripped ending) followed by more letters,
+        or a prefix (like re-) followed by the start of the stem.
+    """
+    def __init__( self, affixRules:HunspellAffixRules ):
+        """
+        Create an empty index which uses the given affix rules.
+        """
+        fnPrint( debuggingThisModule, "HunspellAutocompleteIndex.__init__( {} )".format( affixRules ) )
+        AutocompleteIndex.__init__( self )
+        self.affixRules = affixRules
+    # end of HunspellAutocompleteIndex.__init__
+
+
+    def clear( self ) -> None:
+        """
+        Remove all the words from the index.
+        """
+        AutocompleteIndex.clear( self )
+        self.stemFlags = {} # Indexed by stem (only for stems which have flags)
+        self.needAffixStems = set() # Stems which aren't words by themselves
+        self.inflectionCache = {} # Indexed by stem, contains lists of generated word forms
+    # end of HunspellAutocompleteIndex.clear
+
+
+    def __str__( self ) -> str:
+        return "HunspellAutocompleteIndex object with {:,} stems ({:,} with flags)".format( len(self.sortedWords), len(self.stemFlags) )
+    # end of HunspellAutocompleteIndex.__str__
+
+
+    def setStems( self, stemList:list, stemFlags:dict ) -> None:
+        """
+        Replace the contents of the index with the given stems
+            (which must be in order with the most likely stems first).
+
+        stemFlags is a dictionary containing tuples of flags for the stems which have them.
+        """
+        fnPrint( debuggingThisModule, "HunspellAutocompleteIndex.setStems( {:,}, {:,} )".format( len(stemList), len(stemFlags) ) )
+
+        self.setWords( stemList )
+        self.stemFlags = stemFlags
+        needAffixFlags = self.affixRules.needAffixFlags
+        self.needAffixStems = { stem for stem,flags in stemFlags.items() if needAffixFlags.intersection( flags ) } \
+                                    if needAffixFlags else set()
+        self.inflectionCache = {}
+    # end of HunspellAutocompleteIndex.setStems
+
+
+    def getCharacters( self ) -> set:
+        """
+        Returns the set of all characters used in the stems
+            and in the affixes which might be added to them.
+        """
+        return AutocompleteIndex.getCharacters( self ) | self.affixRules.getAffixCharacters()
+    # end of HunspellAutocompleteIndex.getCharacters
+
+
+    def getInflections( self, stem:str ) -> list:
+        """
+        Returns a list of the other word forms for the stem
+            (using the cache if we've already generated them).
+        """
+        try: return self.inflectionCache[stem]
+        except KeyError: pass
+
+        flags = self.stemFlags.get( stem )
+        inflections = self.affixRules.expandStem( stem, flags ) if flags else []
+        if len(self.inflectionCache) >= MAX_CACHED_INFLECTIONS: self.inflectionCache = {}
+        self.inflectionCache[stem] = inflections
+        return inflections
+    # end of HunspellAutocompleteIndex.getInflections
+
+
+    def _getCandidateStems( self, prefix:str ) -> set:
+        """
+        Returns the set of stems that might have word forms which start with the given prefix.
+        """
+        rootPrefixes = [prefix]
+        for add,strip in self.affixRules.prefixTexts:
+            if add and prefix.startswith( add ) and len(prefix)-len(add) >= MIN_PREFIXED_ROOT_LENGTH:
+                rootPrefixes.append( strip + prefix[len(add):] )
+
+        wordScores, suffixStrips = self.wordScores, self.affixRules.suffixStrips
+        candidateStems = set()
+        for rootPrefix in rootPrefixes:
+            candidateStems.update( self._getRankedWords( rootPrefix ) ) # Stems that start with the prefix
+            for endIndex in range( 1, len(rootPrefix) ): # Stems that (without any stripped ending) are shorter than the prefix
+                for suffixStrip in suffixStrips:
+                    stem = rootPrefix[:endIndex] + suffixStrip
+                    if stem in wordScores: candidateStems.add( stem )
+        return candidateStems
+    # end of HunspellAutocompleteIndex._getCandidateStems
+
+
+    def getCompletions( self, prefix:str, maxCount:int=None ) -> list:
+        """
+        Returns a list of the words (including generated word forms)
+            which start with the given prefix (but not the prefix itself),
+            with the most likely words first.
+
+        Generated word forms are ranked just below the stem that they came from.
+
+        If maxCount is given, only returns (up to) that many words.
+        """
+        if not prefix: return []
+
+        wordScores = self.wordScores
+        candidateScores = {}
+        for stem in self._getCandidateStems( prefix ):
+            stemScore = wordScores[stem]
+            if stem.startswith( prefix ) and stem != prefix and stem not in self.needAffixStems \
+            and stemScore > candidateScores.get( stem, 0 ):
+                candidateScores[stem] = stemScore
+            for form in self.getInflections( stem ):
+                if form.startswith( prefix ) and form != prefix:
+                    formScore = max( stemScore - 0.5, wordScores.get( form, 0 ) ) # Added/promoted words might have their own score
+                    if formScore > candidateScores.get( form, 0 ): candidateScores[form] = formScore
+        if self.recentWords:
+            for word in candidateScores: candidateScores[word] += self.getRecencyBonus( word )
+
+        if maxCount is None: return sorted( candidateScores, key=candidateScores.__getitem__, reverse=True )
+        return heapq.nlargest( maxCount, candidateScores, key=candidateScores.__getitem__ )
+    # end of HunspellAutocompleteIndex.getCompletions
+# end of class HunspellAutocompleteIndex
+
+
+
+def loadHunspellDictionary( dictionaryFilepath, encoding:str=None, progressFunction=None ) -> HunspellAutocompleteIndex:
+    """
+    Load the stems from a Hunspell .dic file (and the rules from the matching .aff file)
+        into a new HunspellAutocompleteIndex.
+
+    If the encoding isn't given, the one from the .aff file is used.
+
+    If progressFunction is given, it's called occasionally with a percentage (or None).
+    """
+    fnPrint( debuggingThisModule, "loadHunspellDictionary( {}, {} )".format( dictionaryFilepath, encoding ) )
+
+    affixRules = HunspellAffixRules()
+    affixFilepath = os.path.splitext( dictionaryFilepath )[0] + '.aff'
+    if os.path.isfile( affixFilepath ): affixRules.load( affixFilepath )
+    else: logging.warning( "loadHunspellDictionary: No affix file {} so only loading stems".format( affixFilepath ) )
+    if encoding is None: encoding = affixRules.encoding
+
+    internalCount = None
+    stemList, stemFlags = [], {}
+    lineCount = 0
+    with open( dictionaryFilepath, 'rt', encoding=encoding ) as dictionaryFile:
+        for line in dictionaryFile:
+            lineCount += 1
+            if lineCount==1 and line and line[0]==chr(65279): #U+FEFF or
+                logging.info( "loadHunspellDictionary: Detected Unicode Byte Order Marker (BOM) in {}".format( dictionaryFilepath ) )
+                line = line[1:] # Remove the Unicode Byte Order Marker (BOM)
+            line = line.strip()
+            if not line: continue # Just discard blank lines
+            #dPrint( 'Quiet', debuggingThisModule, "line", lineCount, repr(line) )
+
+            if lineCount==1 and line.isdigit(): # first line seems to be a count
+                internalCount = int( line )
+                continue
+            if progressFunction is not None and lineCount % 1000 == 0:
+                progressFunction( min( 99, 100 * lineCount // internalCount ) if internalCount else None )
+
+            entry = line.split( None, 1 )[0] # Remove any morphological fields
+            if '\\/' in entry: # the word itself contains a slash
+                entry = entry.replace( '\\/', '\x00' )
+                word, _slash, flagString = entry.partition( '/' )
+                word = word.replace( '\x00', '/' )
+            else: word, _slash, flagString = entry.partition( '/' )
+            if not word: continue
+            if flagString:
+                flags = affixRules.parseFlags( flagString )
+                if affixRules.hiddenFlags.intersection( flags ): continue
+                stemFlags[word] = flags
+            stemList.append( word )
+
+    autocompleteIndex = HunspellAutocompleteIndex( affixRules )
+    autocompleteIndex.setStems( list( dict.fromkeys( stemList ) ), stemFlags ) # Remove any duplicates
+    vPrint( 'Info', debuggingThisModule, "  loadHunspellDictionary loaded {}".format( autocompleteIndex ) )
+    return autocompleteIndex
+# end of HunspellAutocompleteIndex.loadHunspellDictionary
+
+
+
+def briefDemo() -> None:
+    """
+    Demo program to handle command line parameters and then run what they want.
+    """
+    BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
+    vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
+
+    affixRules = HunspellAffixRules()
+    affixRules.suffixRules['D'] = [ ('', 'd', makeConditionRegex( 'e', True ), True ),
+                                    ('y', 'ied', makeConditionRegex( '[^aeiou]y', True ), True ),
+                                    ('', 'ed', makeConditionRegex( '[^ey]', True ), True ) ]
+    affixRules.suffixStrips.update( ('y',) )
+    affixRules.prefixRules['A'] = [ ('', 're', None, True ) ]
+    affixRules.prefixTexts.add( ('re','') )
+    hIndex = HunspellAutocompleteIndex( affixRules )
+    hIndex.setStems( ['walk','carry','create','wall'], {'walk':('D','A'),'carry':('D',),'create':('D','A')} )
+    vPrint( 'Quiet', debuggingThisModule, hIndex )
+    for prefix in ( 'wal', 'walke', 'carri', 'recre', 'rewa' ):
+        vPrint( 'Quiet', debuggingThisModule, "  {!r} gave {}".format( prefix, hIndex.getCompletions( prefix ) ) )
+# end of HunspellAutocompleteIndex.briefDemo
+
+def fullDemo() -> None:
+    """
+    Full demo to check class is working
+    """
+    briefDemo()
+
+    for dictionaryFilepath in ( '/usr/share/hunspell/en_AU.dic', '/usr/share/hunspell/en_US.dic', ):
+        if os.path.isfile( dictionaryFilepath ):
+            hIndex = loadHunspellDictionary( dictionaryFilepath )
+            vPrint( 'Quiet', debuggingThisModule, "{}: {}".format( dictionaryFilepath, hIndex ) )
+            for prefix in ( 'abbr', 'walki', 'unbel' ):
+                vPrint( 'Quiet', debuggingThisModule, "  {!r} gave {}".format( prefix, hIndex.getCompletions( prefix, 12 ) ) )
+# end of HunspellAutocompleteIndex.fullDemo
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( SHORT_PROGRAM_NAME, PROGRAM_VERSION, LAST_MODIFIED_DATE )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    fullDemo()
+
+    BibleOrgSysGlobals.closedown( PROGRAM_NAME, PROGRAM_VERSION )
+# end of HunspellAutocompleteIndex.py
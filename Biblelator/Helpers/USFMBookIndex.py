@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# USFMBookIndex.py
+#
+# Indexes the verses (and empty fields) in USFM Bible books
+#
+# Copyright (C) 2020 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org+Biblelator@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+indexUSFMBookVerses() splits the text of a USFM book into verses
+    (giving the offsets of each verse rather than copies of the text)
+    and is used by the USFM edit window to cache the current book.
+
+The USFM edit window can also go to the next empty verse (or empty marker)
+    anywhere in the project.
+Rather than loading and checking every following verse (and book) each time,
+    an EmptyFieldIndex keeps sorted lists of the (intC,intV) references
+    of the verses with empty fields in each book of a project.
+It's built in a background thread, updated when a book is saved,
+    and a book is indexed again if its file has changed on disk
+    (e.g., after a Bible replace).
+
+Note that this module deliberately doesn't use tkinter.
+"""
+from gettext import gettext as _
+from typing import Dict, List, Tuple, Optional
+import os.path
+import threading
+import logging
+
+# BibleOrgSys imports
+from BibleOrgSys import BibleOrgSysGlobals
+from BibleOrgSys.BibleOrgSysGlobals import fnPrint, vPrint, dPrint
+
+# Biblelator imports
+from Biblelator.Helpers.FileStamps import getFileStamp
+from Biblelator.Helpers.BookTextCache import getBookTextCache
+
+
+LAST_MODIFIED_DATE = '2020-06-18' # by RJH
+SHORT_PROGRAM_NAME = "USFMBookIndex"
+PROGRAM_NAME = "Biblelator USFM Book Index"
+PROGRAM_VERSION = '0.46'
+programNameVersion = f'{PROGRAM_NAME} v{PROGRAM_VERSION}'
+
+debuggingThisModule = False
+
+
+
+def indexUSFMBookVerses( bookText:str, verseIndex:Optional[dict]=None, logName:Optional[str]=None ) -> dict:
+    """
+    Indexes the USFM book text (in one pass)
+        into a dictionary which is accessible by (C,V) strings
+        and contains the (start,end) offsets of the verse data in the book text
+        (usually only one pair, but more if there's a duplicate verse).
+
+    Automatically attaches section headings to the following verse
+        (rather than having them appear at the end of the current verse).
+
+    If given, the entries are added to verseIndex (which must be for the same text).
+    If given, logName (e.g., the project and book) is used to log any duplicate verses.
+
+    Returns the index dictionary.
+    """
+    fnPrint( debuggingThisModule, "indexUSFMBookVerses( {:,} chars, {}, {} )".format( len(bookText), verseIndex is not None, logName ) )
+    if verseIndex is None: verseIndex = {}
+
+    def addCacheEntry( C, V, startIndex, endIndex ):
+        """
+        Check for duplicates before
+            adding a new CV entry to the book index.
+        """
+        #dPrint( 'Never', debuggingThisModule, "addCacheEntry", C, V, startIndex, endIndex )
+        assert C and V and endIndex > startIndex
+        verseKeyTuple = (C, V)
+        if verseKeyTuple in verseIndex: # Oh, how come we already have this key???
+            existingData = getIndexedVerseText( bookText, verseIndex[verseKeyTuple] )
+            data = bookText[startIndex:endIndex] if endIndex <= len(bookText) else bookText[startIndex:]+'\n'
+            if data == existingData:
+                if logName is not None:
+                    logging.critical( "cacheBook: We have an identical duplicate {} {}:{}: {!r}" \
+                            .format( logName, C, V, data ) )
+            else:
+                if logName is not None:
+                    logging.critical( "cacheBook: We have a duplicate {} {}:{} -- already had {!r} and now appending {!r}" \
+                            .format( logName, C, V, existingData, data ) )
+                verseIndex[verseKeyTuple] += (startIndex, endIndex)
+                return
+        verseIndex[verseKeyTuple] = (startIndex, endIndex)
+    # end of indexUSFMBookVerses.addCacheEntry
+
+    def getMarkerText( blIndex ):
+        """
+        Given an index to (nonlocal) bookLines,
+            get that line and break into 2-tuple (marker,text).
+        """
+        gmtLine = bookLines[blIndex]
+        #marker = text = None
+        if gmtLine and gmtLine[0] == '\\':
+            try: marker, text = gmtLine[1:].split( None, 1 )
+            except ValueError: marker, text = gmtLine[1:].split( None, 1 )[0], ''
+        else: marker, text = None, gmtLine
+        return marker, text
+    # end of indexUSFMBookVerses.getMarkerText
+
+    # Main code for indexUSFMBookVerses
+    sectionHeadings = ( 's', 's1', 's2', 's3', 's4', )
+    C, V = '-1', '0' # So first/id line starts at -1:0
+    startedVerseEarly = False
+    entryStart = None # Offset of the start of the current entry (or None if there's no current entry)
+    bookLines = bookText.split( '\n' )
+    numLines = len( bookLines )
+    lineStart = 0 # Offset of the start of the current line
+    for j in range( numLines): # Do it this way to make it easy to look-ahead
+        line = bookLines[j]
+        lineEnd = lineStart + len(line) + 1 # Including the newline character
+        marker, text = getMarkerText( j )
+        #dPrint( 'Quiet', debuggingThisModule, "indexUSFMBookVerses line", repr(marker), repr(text), line )
+
+        if marker in ( 'c', 'C' ):
+            newC = ''
+            for char in line[3:]: # Get chapter number digits
+                if char.isdigit(): newC += char
+                else: break
+            if newC:
+                if entryStart is not None:
+                    addCacheEntry( C, V, entryStart, lineStart )
+                    entryStart = None
+                C, V = newC, '0'
+        elif marker in sectionHeadings:
+            if j<numLines-2:
+                marker1, text1 = getMarkerText( j+1 )
+                if marker1 in ('r','sr','mr',):
+                    marker2, text2 = getMarkerText( j+2 )
+                    if marker2 in BibleOrgSysGlobals.USFMParagraphMarkers and not text2:
+                        marker3, text3 = getMarkerText( j+3 )
+                        if marker3 in ( 'v', 'V' ):
+                            # Start a new verse entry here if we have a section heading, cross-reference, empty paragraph marker, then the next verse
+                            if entryStart is not None: # Save the previous CV entry
+                                addCacheEntry( C, V, entryStart, lineStart )
+                                entryStart = None
+                                startedVerseEarly = True
+                elif marker1 in ( 'v', 'V' ): # There's actually a missing paragraph marker but nevermind
+                    # Start a new verse entry here if we have a section heading, missing paragraph marker, then the next verse
+                    if entryStart is not None: # Save the previous CV entry
+                        addCacheEntry( C, V, entryStart, lineStart )
+                        entryStart = None
+                        startedVerseEarly = True
+                elif marker1 in BibleOrgSysGlobals.USFMParagraphMarkers and not text1:
+                    marker2, text2 = getMarkerText( j+2 )
+                    if marker2 in ( 'v', 'V' ):
+                        # Start a new verse entry here if we have a section heading, empty paragraph marker, then the next verse
+                        if entryStart is not None: # Save the previous CV entry
+                            addCacheEntry( C, V, entryStart, lineStart )
+                            entryStart = None
+                            startedVerseEarly = True
+        elif marker in ( 'v', 'V' ):
+            newV = ''
+            for char in line[3:]:
+                if char.isdigit(): newV += char
+                else: break
+            if newV:
+                if entryStart is not None and not startedVerseEarly:
+                    addCacheEntry( C, V, entryStart, lineStart )
+                    entryStart = None
+                V = newV
+                startedVerseEarly = False
+        elif marker in BibleOrgSysGlobals.USFMParagraphMarkers and not text and not startedVerseEarly: # already
+            if j<numLines-1:
+                marker1, text1 = getMarkerText( j+1 )
+                if marker1 in ( 'v', 'V' ):
+                    # We want to move this empty paragraph marker into the next verse
+                    if entryStart is not None:
+                        addCacheEntry( C, V, entryStart, lineStart )
+                        entryStart = None
+                        startedVerseEarly = True
+        elif C=='-1' and line.startswith( '\\' ):
+            if entryStart is not None: # Should only happen if the file has blank lines before any chapter markers
+                if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+                    vPrint( 'Quiet', debuggingThisModule, "cE", repr(bookText[entryStart:lineStart]) )
+                    # NOTE: This can fail if there's a line in the file NOT beginning with a USFM
+                    #   i.e., a continuation line
+                    assert bookText[entryStart:lineStart] == '\n' # Warn programmer if it's anything different
+                addCacheEntry( C, V, entryStart, lineStart ) # Will give a duplicate entry error adding to newline
+                entryStart = None
+            addCacheEntry( C, V, lineStart, lineEnd )
+            V = str( int(V) + 1 )
+            lineStart = lineEnd
+            continue # Don't save current entry in next line
+        if entryStart is None: entryStart = lineStart
+        lineStart = lineEnd
+    if entryStart is not None: # cache the final verse
+        addCacheEntry( C, V, entryStart, lineStart )
+    return verseIndex
+# end of USFMBookIndex.indexUSFMBookVerses
+
+
+def getIndexedVerseText( bookText:str, offsets:tuple ) -> str:
+    """
+    Given a tuple of (start,end) offsets (usually only one pair) from indexUSFMBookVerses,
+        returns the text from the indexed book (as a slice).
+
+    Note that the end offset of the last line may be one past the end of the book text
+        (if the book doesn't end with a newline), so we add the newline.
+
+    Any blank lines are weeded out.
+    """
+    data = None
+    for j in range( 0, len(offsets), 2 ):
+        startIndex, endIndex = offsets[j], offsets[j+1]
+        newData = bookText[startIndex:endIndex] if endIndex <= len(bookText) else bookText[startIndex:]+'\n'
+        data = newData if data is None else data + '\n' + newData
+        data = data.replace( '\n\n', '\n' ) # Weed out blank lines
+    return data
+# end of USFMBookIndex.getIndexedVerseText
+
+
+
+def emptyVerseMatch( stringToSearch:str ) -> bool:
+    """
+    Searches the verse data for an existing verse marker without text.
+
+    Returns True if one is found,
+        otherwise False.
+    """
+    #dPrint( 'Quiet', debuggingThisModule, "emptyVerseMatch searching in {!r}".format( stringToSearch ) )
+    for lineToSearch in stringToSearch.split( '\n' ):
+        #dPrint( 'Quiet', debuggingThisModule, " emptyVerseMatch lineToSearch", repr(lineToSearch) )
+        ix = lineToSearch.find( '\\v ' )
+        if ix != -1:
+            verseText = lineToSearch[ix+3:]
+            #dPrint( 'Quiet', debuggingThisModule, "      emptyVerseMatch verseText", repr(verseText) )
+            try: verseNumber, rest = verseText.split( ' ', 1 )
+            except ValueError: rest = '' # No space to split on
+            #dPrint( 'Quiet', debuggingThisModule, "      emptyVerseMatch rest", repr(rest) )
+            if not rest.strip():
+                return True
+    return False
+# end of USFMBookIndex.emptyVerseMatch
+
+def emptyMarkerMatch( stringToSearch:str ) -> bool:
+    """
+    Searches the verse data for an empty marker that should have text.
+
+    Returns True if one is found,
+        otherwise False.
+    """
+    #dPrint( 'Quiet', debuggingThisModule, "emptyMarkerMatch searching in {!r}".format( stringToSearch ) )
+    for lineToSearch in stringToSearch.split( '\n' ):
+        #dPrint( 'Quiet', debuggingThisModule, " emptyMarkerMatch lineToSearch", repr(lineToSearch) )
+        if lineToSearch.startswith( '\\' ):
+            try: marker, rest = lineToSearch[1:].split( ' ', 1 )
+            except ValueError: marker, rest = lineToSearch[1:], '' # No space to split on
+            #dPrint( 'Quiet', debuggingThisModule, " emptyMarkerMatch marker", repr(marker), "rest", repr(rest) )
+            if marker == 'v':
+                try: verseNumber, rest = rest.split( ' ', 1 )
+                except ValueError: rest = '' # No space to split on
+                #dPrint( 'Quiet', debuggingThisModule, "      emptyVerseMatch rest", repr(rest) )
+                if not rest.strip():
+                    return True
+            elif marker not in BibleOrgSysGlobals.USFMParagraphMarkers and marker not in ('b','li','li1',):
+                if not rest.strip():
+                    return True
+    return False
+# end of USFMBookIndex.emptyMarkerMatch
+
+
+EMPTY_FIELD_MATCH_FUNCTIONS = { 'verse':emptyVerseMatch, 'marker':emptyMarkerMatch }
+
+
+def findEmptyFields( bookText:str ) -> Dict[str,List[Tuple[int,int]]]:
+    """
+    Returns a dictionary indexed by 'verse' and 'marker'
+        containing sorted lists of the (intC,intV) references of the verses
+        containing an empty verse or an empty marker.
+    """
+    fnPrint( debuggingThisModule, "findEmptyFields( {:,} chars )".format( len(bookText) ) )
+
+    emptyFields = { somethingName:[] for somethingName in EMPTY_FIELD_MATCH_FUNCTIONS }
+    for (C,V),offsets in indexUSFMBookVerses( bookText ).items():
+        verseData = getIndexedVerseText( bookText, offsets )
+        for somethingName,matchFunction in EMPTY_FIELD_MATCH_FUNCTIONS.items():
+            if matchFunction( verseData ):
+                emptyFields[somethingName].append( (int(C),int(V)) )
+    for entries in emptyFields.values(): entries.sort()
+    return emptyFields
+# end of USFMBookIndex.findEmptyFields
+
+
+def readUSFMBookFile( filepath:str, encoding:Optional[str] ) -> Optional[str]:
+    """
+    Returns the text of the USFM file (without any Byte Order Marker)
+        or None if it can't be read.
+
+    Uses the text from the program's book text cache if the file hasn't changed
+        (but doesn't add other files to it).
+    """
+    try: bookText = getBookTextCache().getText( filepath, encoding, keep=False )
+    except (OSError, UnicodeError) as err:
+        logging.error( "readUSFMBookFile couldn't read {}: {}".format( filepath, err ) )
+        return None
+    if bookText[:1] == chr(65279): bookText = bookText[1:] # Remove the UTF-16 Unicode Byte Order Marker (BOM)
+    elif bookText[:3] == 'ï»¿': bookText = bookText[3:] # Remove the UTF-8 Unicode Byte Order Marker (BOM)
+    return bookText
+# end of USFMBookIndex.readUSFMBookFile
+
+
+
+class EmptyFieldIndex:
+    """
+    Keeps the references of the verses with empty fields
+        in each book of one (USFM) Bible project.
+
+    Each book entry is checked against the file modification time and size
+        before it's used, so it's indexed again if the file has been changed.
+    """
+    def __init__( self, sourceFolder:str, encoding:Optional[str] ) -> None:
+        """
+        """
+        fnPrint( debuggingThisModule, "EmptyFieldIndex.__init__( {}, {} )".format( sourceFolder, encoding ) )
+        self.sourceFolder, self.encoding = sourceFolder, encoding
+        self.lock = threading.Lock()
+        self.bookEntries = {} # Indexed by BBB, contains 2-tuples of (fileStamp, emptyFieldsDict)
+        self.buildThread = None
+    # end of EmptyFieldIndex.__init__
+
+
+    def __str__( self ) -> str:
+        return "EmptyFieldIndex for {} with {} books".format( self.sourceFolder, len(self.bookEntries) )
+    # end of EmptyFieldIndex.__str__
+
+
+    def startBuilding( self, bookFilenames:Dict[str,str] ) -> None:
+        """
+        Starts a background thread to index any of the given books (indexed by BBB)
+            that haven't already been indexed.
+
+        Only one build is done for the project.
+        """
+        fnPrint( debuggingThisModule, "EmptyFieldIndex.startBuilding( {} books )".format( len(bookFilenames) ) )
+        with self.lock:
+            if self.buildThread is not None: return # Already started
+            self.buildThread = threading.Thread( target=self._buildIndex, args=(dict(bookFilenames),), name='EmptyFieldIndex', daemon=True )
+        self.buildThread.start()
+    # end of EmptyFieldIndex.startBuilding
+
+
+    def _buildIndex( self, bookFilenames:Dict[str,str] ) -> None:
+        """
+        Runs in the background thread.
+        """
+        for BBB,filename in bookFilenames.items():
+            self.getEmptyFields( BBB, filename )
+        vPrint( 'Info', debuggingThisModule, "EmptyFieldIndex built for {} books in {}".format( len(bookFilenames), self.sourceFolder ) )
+    # end of EmptyFieldIndex._buildIndex
+
+
+    def updateBook( self, BBB:str, filename:str, bookText:str ) -> None:
+        """
+        Called after the book text has been written to the file (e.g., from a background save)
+            so that we don't have to read the file again.
+        """
+        fnPrint( debuggingThisModule, "EmptyFieldIndex.updateBook( {}, {}, {:,} chars )".format( BBB, filename, len(bookText) ) )
+        fileStamp = getFileStamp( os.path.join( self.sourceFolder, filename ) )
+        emptyFields = findEmptyFields( bookText )
+        with self.lock: self.bookEntries[BBB] = (fileStamp, emptyFields)
+    # end of EmptyFieldIndex.updateBook
+
+
+    def getEmptyFields( self, BBB:str, filename:str ) -> Optional[Dict[str,List[Tuple[int,int]]]]:
+        """
+        Returns the dictionary from findEmptyFields for the book
+            (reading and indexing the file first if necessary),
+            or None if the book file can't be read.
+        """
+        filepath = os.path.join( self.sourceFolder, filename )
+        fileStamp = getFileStamp( filepath )
+        if fileStamp is None: return None # No such file
+        with self.lock: bookEntry = self.bookEntries.get( BBB )
+        if bookEntry is not None and bookEntry[0] == fileStamp:
+            return bookEntry[1]
+
+        vPrint( 'Never', debuggingThisModule, "EmptyFieldIndex.getEmptyFields indexing {} {}".format( BBB, filepath ) )
+        bookText = readUSFMBookFile( filepath, self.encoding )
+        if bookText is None: return None
+        emptyFields = findEmptyFields( bookText )
+        with self.lock: self.bookEntries[BBB] = (fileStamp, emptyFields)
+        return emptyFields
+    # end of EmptyFieldIndex.getEmptyFields
+# end of class EmptyFieldIndex
+
+
+emptyFieldIndexes = {} # Indexed by source folder, contains EmptyFieldIndex objects
+emptyFieldIndexesLock = threading.Lock()
+
+def getEmptyFieldIndex( sourceFolder:str, encoding:Optional[str] ) -> EmptyFieldIndex:
+    """
+    Returns the EmptyFieldIndex for the project
+        (so that all edit windows for the same project share the same index).
+    """
+    with emptyFieldIndexesLock:
+        try: return emptyFieldIndexes[sourceFolder]
+        except KeyError:
+            emptyFieldIndex = emptyFieldIndexes[sourceFolder] = EmptyFieldIndex( sourceFolder, encoding )
+            return emptyFieldIndex
+# end of USFMBookIndex.getEmptyFieldIndex
+
+
+
+def briefDemo() -> None:
+    """
+    Demo program to handle command line parameters and then run what they want.
+    """
+    BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
+    vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
+
+    bookText = '\\id GEN\n\\c 1\n\\p\n\\v 1 In the beginning\n\\v 2\n\\s\n\\p\n\\v 3 Then God said\n'
+    verseIndex = indexUSFMBookVerses( bookText, logName='Demo GEN' )
+    for CV,offsets in verseIndex.items():
+        vPrint( 'Quiet', debuggingThisModule, "  {} {!r}".format( CV, getIndexedVerseText( bookText, offsets ) ) )
+    vPrint( 'Quiet', debuggingThisModule, "  Empty fields: {}".format( findEmptyFields( bookText ) ) )
+# end of USFMBookIndex.briefDemo
+
+def fullDemo() -> None:
+    """
+    Full demo to check class is working
+    """
+    briefDemo()
+# end of USFMBookIndex.fullDemo
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( SHORT_PROGRAM_NAME, PROGRAM_VERSION, LAST_MODIFIED_DATE )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    fullDemo()
+
+    BibleOrgSysGlobals.closedown( PROGRAM_NAME, PROGRAM_VERSION )
+# end of USFMBookIndex.py
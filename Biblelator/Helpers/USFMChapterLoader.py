@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# USFMChapterLoader.py
+#
+# Loads only some of the chapters of a large USFM book file
+#
+# Copyright (C) 2020 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org+Biblelator@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Large books (like Psalms, or study Bibles with lots of notes)
+    don't need to be completely loaded when the USFM edit window
+    is only displaying a verse or a chapter.
+
+A USFMChapterLoader finds the byte offset of each chapter (\\c) line
+    in one pass through the (memory-mapped) file,
+    and then only reads and decodes the requested chapters
+    (the window -- usually the displayed chapter plus a few either side).
+
+The text before and after the window is only read when it's needed
+    (e.g., for saving the entire book).
+After the book is saved, the window byte offsets are adjusted
+    to where the window was written in the new file.
+
+The window byte offsets are only valid for the file as it was
+    when the chapters were loaded (or saved), so if the file has been
+    changed since then (e.g., by another program or another window),
+    getTextBefore() and getTextAfter() raise FileChangedError
+    rather than returning text split at the wrong places.
+relocateWindow() can then find the same chapters in the changed file.
+
+Only works for encodings where a newline is a single \\n byte
+    and chapter markers are plain ASCII (e.g., UTF-8) -- see canLoadChapters().
+
+Note that this module deliberately doesn't use tkinter.
+"""
+from gettext import gettext as _
+from typing import List, Tuple, Optional
+from bisect import bisect_right
+import os
+import re
+import mmap
+
+# BibleOrgSys imports
+from BibleOrgSys import BibleOrgSysGlobals
+from BibleOrgSys.BibleOrgSysGlobals import fnPrint, vPrint, dPrint
+
+# Biblelator imports
+from Biblelator.Helpers.FileStamps import getFileStamp
+
+
+LAST_MODIFIED_DATE = '2020-06-20' # by RJH
+SHORT_PROGRAM_NAME = "USFMChapterLoader"
+PROGRAM_NAME = "Biblelator USFM Chapter Loader"
+PROGRAM_VERSION = '0.46'
+programNameVersion = f'{PROGRAM_NAME} v{PROGRAM_VERSION}'
+
+debuggingThisModule = False
+
+
+# Same as what indexUSFMBookVerses() accepts as a chapter line (but only with ASCII digits)
+CHAPTER_LINE_BYTES_REGEX = re.compile( br'^\\[cC][ \t\v\f\r]([0-9]+)', re.MULTILINE )
+
+
+
+def canLoadChapters( encoding:Optional[str] ) -> bool:
+    """
+    Returns True if files with this encoding can be split into chapters
+        without decoding them first.
+    """
+    if not encoding: return False # Don't know what the locale default might be
+    try: return '\\c 1\n'.encode( encoding ) == b'\\c 1\n' # Excludes UTF-16 (and any encoding that adds a BOM)
+    except (LookupError, UnicodeError): return False
+# end of USFMChapterLoader.canLoadChapters
+
+
+def buildChapterOffsetTable( bookFile ) -> Optional[Tuple[List[int],List[int]]]:
+    """
+    Given a file opened in binary mode,
+        returns two lists being the chapter numbers and the byte offsets of the start of the chapter lines
+        (with an extra first entry for any introduction as chapter -1 at offset 0,
+            and with the file size appended to the offsets).
+
+    Returns None if the chapters aren't in order (or are repeated).
+    """
+    fnPrint( debuggingThisModule, "buildChapterOffsetTable( {} )".format( bookFile ) )
+    fileSize = os.fstat( bookFile.fileno() ).st_size
+    chapterNumbers, chapterStarts = [-1], [0]
+    if fileSize: # Can't mmap an empty file
+        with mmap.mmap( bookFile.fileno(), 0, access=mmap.ACCESS_READ ) as bookMap:
+            for match in CHAPTER_LINE_BYTES_REGEX.finditer( bookMap ):
+                intC = int( match.group( 1 ) )
+                if intC <= chapterNumbers[-1]:
+                    vPrint( 'Quiet', debuggingThisModule, "buildChapterOffsetTable: chapter {} is out of order in {}".format( intC, bookFile.name ) )
+                    return None
+                chapterNumbers.append( intC )
+                chapterStarts.append( match.start() )
+    chapterStarts.append( fileSize )
+    return chapterNumbers, chapterStarts
+# end of USFMChapterLoader.buildChapterOffsetTable
+
+
+
+class FileChangedError( Exception ):
+    """
+    Raised if the file has been changed since the chapters were loaded
+        (so the byte offsets of the loaded chapters in the file are no longer valid).
+    """
+    pass
+# end of class FileChangedError
+
+
+
+class USFMChapterLoader:
+    """
+    A class which loads some chapters (a window) of a USFM book file
+        and can get the rest of the text of the book when it's needed.
+    """
+    def __init__( self, filepath:str, encoding:str ) -> None:
+        """
+        """
+        fnPrint( debuggingThisModule, "USFMChapterLoader.__init__( {}, {} )".format( filepath, encoding ) )
+        if BibleOrgSysGlobals.debugFlag: assert canLoadChapters( encoding )
+        self.filepath, self.encoding = filepath, encoding
+        self.fileStamp = self.chapterNumbers = self.chapterStarts = None
+        self.windowChapters = None # (firstC,lastC) 2-tuple of the loaded chapters
+        self.windowStart = self.windowEnd = None # Byte offsets of the loaded chapters in the file
+        self.windowAtEnd = False # Set if the window goes to the end of the file
+        self.windowStamp = None # The file stamp of the file that the window byte offsets are for
+    # end of USFMChapterLoader.__init__
+
+
+    def __str__( self ) -> str:
+        return "USFMChapterLoader for {} with chapters {} at bytes {}-{}" \
+                    .format( self.filepath, self.windowChapters, self.windowStart, self.windowEnd )
+    # end of USFMChapterLoader.__str__
+
+
+    def _openFile( self ):
+        """
+        Opens the file in binary mode
+            and (re)builds the chapter offset table if the file has changed.
+
+        Returns the file object (which must be closed by the caller).
+        """
+        bookFile = open( self.filepath, 'rb' )
+        fileStat = os.fstat( bookFile.fileno() )
+        fileStamp = fileStat.st_mtime_ns, fileStat.st_size # Same as getFileStamp()
+        if fileStamp != self.fileStamp:
+            vPrint( 'Never', debuggingThisModule, "USFMChapterLoader is finding the chapters in {}".format( self.filepath ) )
+            table = buildChapterOffsetTable( bookFile )
+            self.chapterNumbers, self.chapterStarts = (None,None) if table is None else table
+            self.fileStamp = fileStamp
+        return bookFile
+    # end of USFMChapterLoader._openFile
+
+
+    def _openWindowFile( self ):
+        """
+        Opens the file in binary mode
+            after checking that it hasn't changed since the window byte offsets were set.
+
+        Returns the file object (which must be closed by the caller).
+        Raises FileChangedError if the file has changed.
+        """
+        bookFile = open( self.filepath, 'rb' )
+        fileStat = os.fstat( bookFile.fileno() )
+        if (fileStat.st_mtime_ns, fileStat.st_size) != self.windowStamp:
+            bookFile.close()
+            raise FileChangedError( _("{} has been changed since chapters {}-{} were loaded").format( self.filepath, *self.windowChapters ) )
+        return bookFile
+    # end of USFMChapterLoader._openWindowFile
+
+
+    def _readText( self, bookFile, startOffset:int, endOffset:Optional[int] ) -> str:
+        """
+        Reads and decodes the bytes from the open file
+            (to the end of the file if endOffset is None).
+
+        Newlines are converted to \\n (like reading the file in text mode)
+            and any Byte Order Marker at the start of the file is removed.
+        """
+        bookFile.seek( startOffset )
+        text = bookFile.read( -1 if endOffset is None else endOffset-startOffset ).decode( self.encoding )
+        if '\r' in text: text = text.replace( '\r\n', '\n' ).replace( '\r', '\n' )
+        if startOffset == 0:
+            if text[:1] == chr(65279): text = text[1:] # Remove the UTF-16 Unicode Byte Order Marker (BOM)
+            elif text[:3] == 'ï»¿': text = text[3:] # Remove the UTF-8 Unicode Byte Order Marker (BOM)
+        return text
+    # end of USFMChapterLoader._readText
+
+
+    def loadChapters( self, firstC:int, lastC:int ) -> Optional[str]:
+        """
+        Reads and returns the text of the given chapters (inclusive)
+            and remembers them as the new window.
+
+        Any introduction is included if firstC is before the first chapter.
+
+        Returns None if the chapters can't be found (e.g., they're not in order in the file).
+        Raises OSError (or UnicodeError) if the file can't be read.
+        """
+        fnPrint( debuggingThisModule, "USFMChapterLoader.loadChapters( {}, {} )".format( firstC, lastC ) )
+
+        with self._openFile() as bookFile:
+            if self.chapterNumbers is None: return None
+            self._setWindow( firstC, lastC )
+            text = self._readText( bookFile, self.windowStart, self.windowEnd )
+        vPrint( 'Never', debuggingThisModule, "USFMChapterLoader loaded {:,} of {:,} bytes".format( self.windowEnd-self.windowStart, self.chapterStarts[-1] ) )
+        return text
+    # end of USFMChapterLoader.loadChapters
+
+
+    def _setWindow( self, firstC:int, lastC:int ) -> None:
+        """
+        Sets the window to the given chapters (inclusive)
+            using the chapter offset table of the file as it was last opened.
+        """
+        firstIndex = max( 0, bisect_right( self.chapterNumbers, firstC ) - 1 ) # The chapter containing firstC
+        afterIndex = max( firstIndex+1, bisect_right( self.chapterNumbers, lastC ) ) # The chapter after lastC
+        self.windowChapters = firstC, lastC
+        self.windowStart, self.windowEnd = self.chapterStarts[firstIndex], self.chapterStarts[afterIndex]
+        self.windowAtEnd = afterIndex == len(self.chapterNumbers)
+        self.windowStamp = self.fileStamp
+    # end of USFMChapterLoader._setWindow
+
+
+    def isWindowCurrent( self ) -> bool:
+        """
+        Returns True if the file hasn't been changed since the window byte offsets were set.
+        """
+        return self.windowStamp is not None and getFileStamp( self.filepath ) == self.windowStamp
+    # end of USFMChapterLoader.isWindowCurrent
+
+
+    def relocateWindow( self ) -> bool:
+        """
+        Called if the file has been changed since the chapters were loaded
+            to find where the same chapters are in the changed file
+            (without reading them again), e.g., so that the edited chapters
+            can replace those chapters when the book is saved.
+
+        Returns False if the chapters can't be found (e.g., they're now out of order).
+        Raises OSError if the file can't be read.
+        """
+        fnPrint( debuggingThisModule, "USFMChapterLoader.relocateWindow() for {}".format( self.windowChapters ) )
+        with self._openFile() as bookFile:
+            if self.chapterNumbers is None or self.windowChapters is None: return False
+            self._setWindow( *self.windowChapters )
+        return True
+    # end of USFMChapterLoader.relocateWindow
+
+
+    def coversChapters( self, firstC:int, lastC:int ) -> bool:
+        """
+        Returns True if the given chapters (inclusive) are all in the loaded window.
+        """
+        if self.windowChapters is None: return False
+        return (firstC >= self.windowChapters[0] or self.windowStart == 0) \
+            and (lastC <= self.windowChapters[1] or self.windowAtEnd)
+    # end of USFMChapterLoader.coversChapters
+
+
+    def getTextBefore( self ) -> str:
+        """
+        Reads and returns the text of the book before the loaded window.
+
+        Raises FileChangedError if the file has changed since the window was loaded (or saved).
+        """
+        if not self.windowStart: return ''
+        with self._openWindowFile() as bookFile:
+            return self._readText( bookFile, 0, self.windowStart )
+    # end of USFMChapterLoader.getTextBefore
+
+
+    def getTextAfter( self ) -> str:
+        """
+        Reads and returns the text of the book after the loaded window.
+
+        Raises FileChangedError if the file has changed since the window was loaded (or saved).
+        """
+        if self.windowAtEnd: return ''
+        with self._openWindowFile() as bookFile:
+            return self._readText( bookFile, self.windowEnd, None )
+    # end of USFMChapterLoader.getTextAfter
+
+
+    def getSavedByteLength( self, text:str, newline:Optional[str]=None ) -> int:
+        """
+        Returns the number of bytes that the text will take when written to a file.
+        """
+        numBytes = len( text.encode( self.encoding ) )
+        if newline and newline != '\n': numBytes += ( len(newline.encode( self.encoding )) - 1 ) * text.count( '\n' )
+        return numBytes
+    # end of USFMChapterLoader.getSavedByteLength
+
+
+    def setSavedWindow( self, windowStart:int, windowEnd:int ) -> None:
+        """
+        Called (straight) after the entire book has been written to our file
+            with the byte offsets where the window text was written.
+
+        (The chapter offset table is rebuilt the next time that chapters are loaded.)
+        """
+        fnPrint( debuggingThisModule, "USFMChapterLoader.setSavedWindow( {:,}, {:,} )".format( windowStart, windowEnd ) )
+        self.windowStart, self.windowEnd = windowStart, windowEnd
+        self.windowStamp = getFileStamp( self.filepath )
+    # end of USFMChapterLoader.setSavedWindow
+# end of class USFMChapterLoader
+
+
+
+def briefDemo() -> None:
+    """
+    Demo program to handle command line parameters and then run what they want.
+    """
+    import tempfile
+    BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
+    vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
+
+    with tempfile.TemporaryDirectory() as folderpath:
+        filepath = os.path.join( folderpath, 'PSA.USFM' )
+        with open( filepath, 'wt', encoding='utf-8', newline='\r\n' ) as bookFile:
+            bookFile.write( '\\id PSA\n' + ''.join( '\\c {}\n\\p\n\\v 1 Psalm {}\n'.format( c, c ) for c in range( 1, 151 ) ) )
+        chapterLoader = USFMChapterLoader( filepath, 'utf-8' )
+        vPrint( 'Quiet', debuggingThisModule, repr( chapterLoader.loadChapters( 22, 23 ) ) )
+        vPrint( 'Quiet', debuggingThisModule, chapterLoader, chapterLoader.coversChapters( 22, 23 ), chapterLoader.coversChapters( 21, 23 ) )
+        vPrint( 'Quiet', debuggingThisModule, "  {:,} chars before, {:,} chars after".format( len(chapterLoader.getTextBefore()), len(chapterLoader.getTextAfter()) ) )
+# end of USFMChapterLoader.briefDemo
+
+def fullDemo() -> None:
+    """
+    Full demo to check class is working
+    """
+    briefDemo()
+# end of USFMChapterLoader.fullDemo
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( SHORT_PROGRAM_NAME, PROGRAM_VERSION, LAST_MODIFIED_DATE )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    fullDemo()
+
+    BibleOrgSysGlobals.closedown( PROGRAM_NAME, PROGRAM_VERSION )
+# end of USFMChapterLoader.py
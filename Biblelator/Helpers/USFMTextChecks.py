@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# USFMTextChecks.py
+#
+# Incremental checks of the USFM text in an edit window
+#
+# Copyright (C) 2020 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org+Biblelator@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+The USFM edit window checks the text for problems after every keystroke
+    which can be slow if a whole book is displayed.
+
+So the USFMTextChecker keeps a copy of each line of the text
+    along with the counts (of chapter and verse markers, invalid character
+    combinations, paired markers, etc.), the positions of the invalid
+    combinations and paired markers, and any problem found in that line.
+When the user edits the text, only the changed lines need to be given
+    to replaceLines(), and the totals for the whole text are updated
+    by subtracting the old line counts and adding the new ones.
+
+Each line is scanned only once, by one compiled regular expression
+    which finds all of the strings that we're interested in
+    (rather than searching the line again for each one).
+getProblems() then walks through the saved positions
+    (using a stack for each pair to check that they balance)
+    and returns all of the problems with their line and column numbers.
+
+Because that walk is through the entire text, it's only done
+    when the user pauses typing. After each keystroke, getProblemSummary()
+    just uses the running totals: the number of lines with each problem message,
+    the invalid combination counts, and the numbers of starts and ends of each pair.
+
+Note that none of the checked character sequences can contain a newline
+    so the totals for the lines are the same as the counts for the entire text.
+
+Note that this module deliberately doesn't use tkinter.
+"""
+from gettext import gettext as _
+from collections import Counter
+import re
+
+# BibleOrgSys imports
+from BibleOrgSys import BibleOrgSysGlobals
+from BibleOrgSys.BibleOrgSysGlobals import fnPrint, vPrint, dPrint
+
+
+LAST_MODIFIED_DATE = '2020-06-20' # by RJH
+SHORT_PROGRAM_NAME = "USFMTextChecks"
+PROGRAM_NAME = "Biblelator USFM Text Checks"
+PROGRAM_VERSION = '0.46'
+programNameVersion = f'{PROGRAM_NAME} v{PROGRAM_VERSION}'
+
+debuggingThisModule = False
+
+
+TRAILING_SPACE_KEY = ' \n' # Used in the counts for lines which end with a space
+
+
+
+class USFMTextChecker:
+    """
+    A class holding the lines of USFM text from an edit window
+        along with the per-line counts, positions, and problems
+        and the running totals for the entire text.
+    """
+    def __init__( self, invalidCombinations, checkForPairs ):
+        """
+        Create an empty checker which finds the given character combinations
+            and the given pairs (2-tuples) of opening and closing characters/markers.
+        """
+        fnPrint( debuggingThisModule, "USFMTextChecker.__init__( {}, {} )".format( invalidCombinations, checkForPairs ) )
+        self.invalidCombinations, self.checkForPairs = tuple( invalidCombinations ), tuple( checkForPairs )
+        self.pairStarts = { pairStart:pairEnd for pairStart,pairEnd in self.checkForPairs }
+        self.pairEnds = { pairEnd:pairStart for pairStart,pairEnd in self.checkForPairs }
+        countedStrings = ['\\c ', '\\v ', '  ']
+        for pairStart,pairEnd in self.checkForPairs:
+            countedStrings.append( pairStart ); countedStrings.append( pairEnd )
+        countedStrings.extend( self.invalidCombinations )
+        countedStrings = tuple( dict.fromkeys( countedStrings ) ) # Removes any duplicates but keeps the order
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            for countedString in countedStrings: assert countedString and '\n' not in countedString
+        self.positionedStrings = set( self.invalidCombinations ) | set( self.pairStarts ) | set( self.pairEnds )
+
+        # The lookahead finds matches starting at every position (even overlapping ones)
+        #   and the longest strings come first so that we get the longest match at each position,
+        #   then we use prefixStrings to also get any shorter strings (e.g., '\\f*' for '\\f*,')
+        self.countedStringsRegex = re.compile( '(?=({}))'.format( '|'.join( re.escape( countedString )
+                        for countedString in sorted( countedStrings, key=len, reverse=True ) ) ) )
+        self.prefixStrings = { countedString:tuple( prefixString for prefixString in countedStrings
+                                                    if countedString.startswith( prefixString ) )
+                                for countedString in countedStrings }
+        self.clear()
+    # end of USFMTextChecker.__init__
+
+
+    def clear( self ) -> None:
+        """
+        Remove all the lines (so the next check will need to do the entire text).
+        """
+        self.lines = [] # The text of each line (without the newline character)
+        self.lineCounts = [] # A dict for each line
+        self.linePositions = [] # A list of 2-tuples (columnIndex, string) for each line
+        self.lineProblems = [] # None or a 2-tuple (errorFlag, message) for each line
+        self.totalCounts = Counter()
+        self.problemCounts = {} # Indexed by the lineProblem 2-tuples, contains the number of lines with that problem
+        self.numChars = 0
+    # end of USFMTextChecker.clear
+
+
+    def __len__( self ) -> int:
+        return len( self.lines )
+    # end of USFMTextChecker.__len__
+
+    def __str__( self ) -> str:
+        return "USFMTextChecker object with {:,} lines".format( len(self.lines) )
+    # end of USFMTextChecker.__str__
+
+
+    def getCharCount( self ) -> int:
+        """
+        Returns the number of characters in the text (including the newlines between the lines).
+        """
+        return self.numChars + len(self.lines) - 1 if self.lines else 0
+    # end of USFMTextChecker.getCharCount
+
+
+    def _checkLine( self, line:str ):
+        """
+        Scans a single line (once).
+
+        Returns the counts dict, the list of positions, and the problem (or None).
+
+        Note that self-overlapping strings (e.g., '..' in '...') are counted at each position.
+        """
+        lineCounts, linePositions = {}, []
+        for match in self.countedStringsRegex.finditer( line ):
+            columnIndex = match.start()
+            for foundString in self.prefixStrings[match.group( 1 )]:
+                lineCounts[foundString] = lineCounts.get( foundString, 0 ) + 1
+                if foundString in self.positionedStrings:
+                    linePositions.append( (columnIndex, foundString) )
+        if line and line[-1] == ' ': lineCounts[TRAILING_SPACE_KEY] = 1
+
+        lineProblem = None
+        if not line:
+            lineProblem = False, _("No good reason to have a blank line in a USFM book")
+        elif line[0] == '\\':
+            marker = line.split( None, 1)[0][1:] # First token, but without the first (backslash) character
+            if marker not in BibleOrgSysGlobals.loadedUSFMMarkers:
+                lineProblem = True, _("Not a recognized USFM marker {!r}").format( marker )
+        else:
+            lineProblem = True, _("Line should start with backslash, not '{}{}'").format( line[:8], '…' if len(line)>8 else '' )
+        return lineCounts, linePositions, lineProblem
+    # end of USFMTextChecker._checkLine
+
+
+    def replaceLines( self, firstIndex:int, numOldLines:int, newLines ) -> None:
+        """
+        Replace numOldLines lines starting at firstIndex (zero-based)
+            with the given new lines (without newline characters)
+            and update the running totals.
+        """
+        fnPrint( debuggingThisModule, "USFMTextChecker.replaceLines( {}, {}, {} )".format( firstIndex, numOldLines, len(newLines) ) )
+        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
+            assert 0 <= firstIndex and firstIndex+numOldLines <= len(self.lines)
+
+        lastIndex = firstIndex + numOldLines
+        problemCounts = self.problemCounts
+        for lineCounts in self.lineCounts[firstIndex:lastIndex]:
+            self.totalCounts.subtract( lineCounts )
+        for lineProblem in self.lineProblems[firstIndex:lastIndex]:
+            if lineProblem is not None:
+                problemCounts[lineProblem] -= 1
+                if not problemCounts[lineProblem]: del problemCounts[lineProblem]
+        self.numChars -= sum( len(line) for line in self.lines[firstIndex:lastIndex] )
+
+        newLineCounts, newLinePositions, newLineProblems = [], [], []
+        for line in newLines:
+            lineCounts, linePositions, lineProblem = self._checkLine( line )
+            self.totalCounts.update( lineCounts )
+            if lineProblem is not None:
+                problemCounts[lineProblem] = problemCounts.get( lineProblem, 0 ) + 1
+            self.numChars += len( line )
+            newLineCounts.append( lineCounts ); newLinePositions.append( linePositions ); newLineProblems.append( lineProblem )
+
+        self.lines[firstIndex:lastIndex] = newLines
+        self.lineCounts[firstIndex:lastIndex] = newLineCounts
+        self.linePositions[firstIndex:lastIndex] = newLinePositions
+        self.lineProblems[firstIndex:lastIndex] = newLineProblems
+    # end of USFMTextChecker.replaceLines
+
+
+    def setText( self, text:str ) -> None:
+        """
+        Check the entire text (throwing away any previous information).
+        """
+        fnPrint( debuggingThisModule, "USFMTextChecker.setText( {:,} chars )".format( len(text) ) )
+        self.clear()
+        self.replaceLines( 0, 0, text.split( '\n' ) )
+    # end of USFMTextChecker.setText
+
+
+    def getCount( self, countedString:str ) -> int:
+        """
+        Returns the number of times the string occurs in the entire text.
+
+        TRAILING_SPACE_KEY gives the number of lines ending with a space
+            (but not counting the final line as it's not followed by a newline).
+        """
+        count = self.totalCounts[countedString]
+        if countedString == TRAILING_SPACE_KEY and self.lines \
+        and TRAILING_SPACE_KEY in self.lineCounts[-1]:
+            count -= 1
+        return count
+    # end of USFMTextChecker.getCount
+
+
+    def getProblemSummary( self ):
+        """
+        Uses the running totals (rather than walking through the lines)
+            to quickly find the problems in the text (but not where they are).
+
+        Pairs are only reported here if the numbers of starts and ends differ
+            (getProblems() also checks that they're in the right order).
+
+        Returns a list of 3-tuples (errorFlag, message, count)
+            with the errors first.
+        """
+        fnPrint( debuggingThisModule, "USFMTextChecker.getProblemSummary()" )
+        problems = []
+        for (errorFlag,message),count in self.problemCounts.items():
+            if not errorFlag and len(self.lines) > 1 and self.lineProblems[-1] == (errorFlag,message):
+                count -= 1 # A blank final line (i.e., the text ends with a newline) isn't a problem
+            if count: problems.append( (errorFlag, message, count) )
+        totalCounts = self.totalCounts
+        for segment in self.invalidCombinations:
+            if totalCounts[segment]:
+                problems.append( (False, _("Found {!r} invalid character(s) in USFM text").format( segment ), totalCounts[segment]) )
+        for pairStart,pairEnd in self.checkForPairs:
+            difference = totalCounts[pairStart] - totalCounts[pairEnd]
+            if difference:
+                problems.append( (False, _("Counts of {!r} and {!r} differ in USFM text").format( pairStart, pairEnd ), abs(difference)) )
+        problems.sort( key=lambda problem: not problem[0] )
+        return problems
+    # end of USFMTextChecker.getProblemSummary
+
+
+    def getProblems( self ):
+        """
+        Walks once through the saved line problems and positions
+            (using a stack of open positions for each pair).
+
+        A blank final line (i.e., the text ends with a newline) isn't a problem
+            unless it's the only line.
+
+        Returns a list of all the problems in the text
+            as 4-tuples (lineIndex, columnIndex, errorFlag, message)
+            (with zero-based indexes) in order through the text.
+        """
+        fnPrint( debuggingThisModule, "USFMTextChecker.getProblems()" )
+        problems = []
+        lastLineIndex = len(self.lines) - 1
+        openStacks = { pairStart:[] for pairStart in self.pairStarts }
+        for lineIndex,(lineProblem,linePositions) in enumerate( zip( self.lineProblems, self.linePositions ) ):
+            if lineProblem is not None \
+            and (lineProblem[0] or lineIndex < lastLineIndex or lastLineIndex == 0):
+                problems.append( (lineIndex, 0, lineProblem[0], lineProblem[1]) )
+            for columnIndex,foundString in linePositions:
+                if foundString in self.pairStarts:
+                    openStacks[foundString].append( (lineIndex, columnIndex) )
+                if foundString in self.pairEnds:
+                    pairStart = self.pairEnds[foundString]
+                    if openStacks[pairStart]: openStacks[pairStart].pop()
+                    else:
+                        problems.append( (lineIndex, columnIndex, False,
+                            _("Found {!r} without previous {!r} in USFM text").format( foundString, pairStart ) ) )
+                if foundString in self.invalidCombinations:
+                    problems.append( (lineIndex, columnIndex, False,
+                            _("Found {!r} invalid character(s) in USFM text").format( foundString ) ) )
+        for pairStart,openPositions in openStacks.items():
+            for lineIndex,columnIndex in openPositions:
+                problems.append( (lineIndex, columnIndex, False,
+                            _("Found {!r} without matching {!r} in USFM text").format( pairStart, self.pairStarts[pairStart] ) ) )
+        problems.sort( key=lambda problem: problem[:2] )
+        return problems
+    # end of USFMTextChecker.getProblems
+# end of class USFMTextChecker
+
+
+
+def briefDemo() -> None:
+    """
+    Demo program to handle command line parameters and then run what they want.
+    """
+    BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
+    vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
+
+    checker = USFMTextChecker( [',,',' ,'], [('(',')'), ('\\f ','\\f*')] )
+    checker.setText( '\\id GEN\n\\c 1\n\\p\n\\v 1 In the beginning (God) created,, the heavens\n' )
+    vPrint( 'Quiet', debuggingThisModule, checker )
+    vPrint( 'Quiet', debuggingThisModule, "  Verse markers: {}  Invalid ',,': {}  Problems: {}" \
+                .format( checker.getCount( '\\v ' ), checker.getCount( ',,' ), checker.getProblems() ) )
+    checker.replaceLines( 3, 1, ['\\v 1 In the beginning ) God (created', '\\v 2 The earth'] )
+    vPrint( 'Quiet', debuggingThisModule, "  After edit: verse markers: {}  Problems: {}" \
+                .format( checker.getCount( '\\v ' ), checker.getProblems() ) )
+    vPrint( 'Quiet', debuggingThisModule, "  Problem summary: {}".format( checker.getProblemSummary() ) )
+# end of USFMTextChecks.briefDemo
+
+def fullDemo() -> None:
+    """
+    Full demo to check class is working
+    """
+    briefDemo()
+# end of USFMTextChecks.fullDemo
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( SHORT_PROGRAM_NAME, PROGRAM_VERSION, LAST_MODIFIED_DATE )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    fullDemo()
+
+    BibleOrgSysGlobals.closedown( PROGRAM_NAME, PROGRAM_VERSION )
+# end of USFMTextChecks.py
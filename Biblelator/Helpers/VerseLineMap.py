@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# VerseLineMap.py
+#
+# Maps the line numbers of an edit box to the displayed chapter/verse
+#
+# Copyright (C) 2020 Robert Hunt
+# Author: Robert Hunt <Freely.Given.org+Biblelator@gmail.com>
+# License: See gpl-3.0.txt
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+When verses are displayed in a USFM edit box, a mark like 'C3V16'
+    is set at the start of each verse.
+
+Every time the cursor moves, the edit window needs to know which verse
+    it's in, but searching backwards through the text box marks is slow
+    (and we might find 'insert', 'current', or 'anchor' marks first).
+
+So the VerseLineMap holds the (sorted) line numbers where each verse starts
+    so that finding the verse for a line is just a bisect.
+
+When lines are inserted or deleted, the line numbers after the change are adjusted,
+    i.e., the map doesn't have to be rebuilt from the text box marks
+    after every keystroke.
+
+Note that this module deliberately doesn't use tkinter.
+"""
+from gettext import gettext as _
+from typing import Callable, Iterable, Optional, Tuple
+from bisect import bisect_right
+
+# BibleOrgSys imports
+from BibleOrgSys import BibleOrgSysGlobals
+from BibleOrgSys.BibleOrgSysGlobals import fnPrint, vPrint, dPrint
+
+
+LAST_MODIFIED_DATE = '2020-06-17' # by RJH
+SHORT_PROGRAM_NAME = "VerseLineMap"
+PROGRAM_NAME = "Biblelator Verse Line Map"
+PROGRAM_VERSION = '0.46'
+programNameVersion = f'{PROGRAM_NAME} v{PROGRAM_VERSION}'
+
+debuggingThisModule = False
+
+
+
+def parseCVMarkName( markName:str ) -> Optional[Tuple[str,str]]:
+    """
+    Given a text box mark name like 'C3V16' or 'C-1V0',
+        returns the chapter and verse strings, e.g., ('3','16').
+
+    Returns None if it's not a chapter/verse mark (e.g., 'insert' or 'current').
+    """
+    if markName and markName[0]=='C' and (markName[1:2].isdigit() or markName[1:3]=='-1') and 'V' in markName:
+        C, V = markName[1:].split( 'V', 1 )
+        return C, V
+# end of VerseLineMap.parseCVMarkName
+
+
+
+class VerseLineMap:
+    """
+    A class holding the sorted starting line numbers of the verses in an edit box.
+    """
+    def __init__( self ) -> None:
+        """
+        """
+        fnPrint( debuggingThisModule, "VerseLineMap.__init__()" )
+        self.clear()
+    # end of VerseLineMap.__init__
+
+
+    def clear( self ) -> None:
+        """
+        Forget all the verses (e.g., when the edit box is cleared).
+        """
+        self.startLines, self.markNames = [], [] # Parallel lists sorted by line number
+        self.numLines = 0 # The number of lines in the edit box when the map was last updated
+    # end of VerseLineMap.clear
+
+
+    def setMarks( self, marks:Iterable[Tuple[int,int,str]], numLines:int ) -> None:
+        """
+        Given (line, column, markName) 3-tuples (in any order) for the marks in the edit box
+            (other marks are ignored),
+            and the number of lines in the edit box,
+            rebuilds the map.
+        """
+        fnPrint( debuggingThisModule, "VerseLineMap.setMarks( …, {:,} )".format( numLines ) )
+
+        self.clear()
+        for line, column, markName in sorted( marks ):
+            if parseCVMarkName( markName ) is not None:
+                self.startLines.append( line )
+                self.markNames.append( markName )
+        self.numLines = numLines
+    # end of VerseLineMap.setMarks
+
+
+    def __len__( self ) -> int:
+        return len( self.startLines )
+    # end of VerseLineMap.__len__
+
+
+    def __str__( self ) -> str:
+        return "VerseLineMap: {:,} verses in {:,} lines".format( len(self.startLines), self.numLines )
+    # end of VerseLineMap.__str__
+
+
+    def getMarkName( self, line:int ) -> Optional[str]:
+        """
+        Returns the name of the last verse mark at or before the given (1-based) line number
+            or None if there isn't one.
+        """
+        index = bisect_right( self.startLines, line ) - 1
+        return self.markNames[index] if index >= 0 else None
+    # end of VerseLineMap.getMarkName
+
+
+    def getCV( self, line:int ) -> Optional[Tuple[str,str]]:
+        """
+        Returns the chapter and verse strings for the given (1-based) line number
+            or None if it's before the first verse.
+        """
+        markName = self.getMarkName( line )
+        return None if markName is None else parseCVMarkName( markName )
+    # end of VerseLineMap.getCV
+
+
+    def insertLines( self, firstLine:int, numNewLines:int, getMarkLine:Callable[[str],int] ) -> None:
+        """
+        Adjusts the map after numNewLines newlines were inserted into line firstLine.
+
+        Verse marks after the insertion point on firstLine move down with the inserted text,
+            so getMarkLine is called (only for the marks on firstLine) to find their new line numbers.
+        """
+        fnPrint( debuggingThisModule, "VerseLineMap.insertLines( {}, {} )".format( firstLine, numNewLines ) )
+        if BibleOrgSysGlobals.debugFlag: assert numNewLines >= 0
+
+        startLines = self.startLines
+        firstIndex = bisect_right( startLines, firstLine - 1 )
+        afterIndex = bisect_right( startLines, firstLine )
+        for index in range( afterIndex, len(startLines) ):
+            startLines[index] += numNewLines
+        for index in range( firstIndex, afterIndex ): # These are in column order so any that moved are at the end
+            startLines[index] = getMarkLine( self.markNames[index] )
+        self.numLines += numNewLines
+    # end of VerseLineMap.insertLines
+
+
+    def deleteLines( self, firstLine:int, numDeletedLines:int ) -> None:
+        """
+        Adjusts the map after a deletion starting on line firstLine
+            which removed numDeletedLines newlines.
+
+        Verse marks in the deleted text all end up at the start of the deletion, i.e., on firstLine.
+        """
+        fnPrint( debuggingThisModule, "VerseLineMap.deleteLines( {}, {} )".format( firstLine, numDeletedLines ) )
+        if BibleOrgSysGlobals.debugFlag: assert numDeletedLines >= 0
+
+        startLines = self.startLines
+        firstIndex = bisect_right( startLines, firstLine )
+        lastLine = firstLine + numDeletedLines
+        for index in range( firstIndex, len(startLines) ):
+            startLines[index] = firstLine if startLines[index] <= lastLine else startLines[index] - numDeletedLines
+        self.numLines -= numDeletedLines
+    # end of VerseLineMap.deleteLines
+# end of class VerseLineMap
+
+
+
+def briefDemo() -> None:
+    """
+    Demo program to handle command line parameters and then run what they want.
+    """
+    BibleOrgSysGlobals.introduceProgram( __name__, programNameVersion, LAST_MODIFIED_DATE )
+    vPrint( 'Quiet', debuggingThisModule, "Running demo…" )
+
+    verseLineMap = VerseLineMap()
+    verseLineMap.setMarks( [(1,0,'C1V0'), (1,0,'insert'), (2,0,'C1V1'), (4,0,'C1V2'), (5,0,'C1V3'), (5,6,'C1V4')], 7 )
+    vPrint( 'Quiet', debuggingThisModule, verseLineMap, [verseLineMap.getCV(line) for line in range( 1, 8 )] )
+    verseLineMap.deleteLines( 3, 1 ) # Join lines 3 and 4
+    vPrint( 'Quiet', debuggingThisModule, verseLineMap, [verseLineMap.getCV(line) for line in range( 1, 7 )] )
+    verseLineMap.insertLines( 4, 1, lambda markName: 5 if markName=='C1V4' else 4 ) # Split line 4 before C1V4
+    vPrint( 'Quiet', debuggingThisModule, verseLineMap, [verseLineMap.getCV(line) for line in range( 1, 8 )] )
+# end of VerseLineMap.briefDemo
+
+def fullDemo() -> None:
+    """
+    Full demo to check class is working
+    """
+    briefDemo()
+# end of VerseLineMap.fullDemo
+
+if __name__ == '__main__':
+    from multiprocessing import freeze_support
+    freeze_support() # Multiprocessing support for frozen Windows executables
+
+    # Configure basic set-up
+    parser = BibleOrgSysGlobals.setup( SHORT_PROGRAM_NAME, PROGRAM_VERSION, LAST_MODIFIED_DATE )
+    BibleOrgSysGlobals.addStandardOptionsAndProcess( parser )
+
+    fullDemo()
+
+    BibleOrgSysGlobals.closedown( PROGRAM_NAME, PROGRAM_VERSION )
+# end of VerseLineMap.py
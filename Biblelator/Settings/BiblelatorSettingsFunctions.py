@@ -59,9 +59,10 @@ from Biblelator.BiblelatorGlobals import APP_NAME, DEFAULT, \
 from Biblelator.Dialogs.BiblelatorSimpleDialogs import showError
 from Biblelator.Dialogs.BiblelatorDialogs import SaveWindowsLayoutNameDialog, DeleteWindowsLayoutNameDialog
 from Biblelator.Windows.TextEditWindow import TextEditWindow
+from Biblelator.Helpers.BookTextCache import getBookTextCache, DEFAULT_BOOK_TEXT_CACHE_SIZE
 
 
-LAST_MODIFIED_DATE = '2020-05-10' # by RJH
+LAST_MODIFIED_DATE = '2020-06-18' # by RJH
 SHORT_PROGRAM_NAME = "BiblelatorSettingsFunctions"
 PROGRAM_NAME = "Biblelator Settings Functions"
 PROGRAM_VERSION = '0.46'
@@ -155,6 +156,10 @@ def parseAndApplySettings() -> None:
     try: BiblelatorGlobals.theApp.doChangeTheme( BiblelatorGlobals.theApp.settings.data[APP_NAME]['themeName'] )
     except KeyError: logging.warning( "Settings.KeyError: no themeName" )
 
+    try: bookTextCacheSize = int( BiblelatorGlobals.theApp.settings.data[APP_NAME]['bookTextCacheSize'] ) # in MB
+    except (KeyError, ValueError): bookTextCacheSize = DEFAULT_BOOK_TEXT_CACHE_SIZE
+    getBookTextCache().setMaxBytes( max( bookTextCacheSize, 0 ) * 1024 * 1024 )
+
     # Parse Interface stuff
     try: BiblelatorGlobals.theApp.interfaceLanguage = BiblelatorGlobals.theApp.settings.data['Interface']['interfaceLanguage']
     except KeyError: BiblelatorGlobals.theApp.interfaceLanguage = DEFAULT
@@ -495,6 +500,9 @@ def applyGivenWindowsSettings( givenWindowsSettingsName ):
                     if BibleOrgSysGlobals.debugFlag: assert windowType.endswith( 'EditWindow' )
                     rw.autocompleteMode = autocompleteMode
                     rw.prepareAutocomplete()
+                if 'AutocompleteDelay' in thisStuff:
+                    try: rw.autocompleteDelay = int( thisStuff['AutocompleteDelay'] )
+                    except ValueError: logging.error( "applyGivenWindowsSettings: " + _("Invalid AutocompleteDelay {!r}").format( thisStuff['AutocompleteDelay'] ) )
                 statusBarMode = thisStuff['StatusBar'] if 'StatusBar' in thisStuff else None
                 if statusBarMode:
                     statusBarOn = statusBarMode.lower() in ('on', 'true' ,'yes', 'enabled',)
@@ -603,6 +611,7 @@ def getCurrentChildWindowSettings():
 
         if appWin.windowType.endswith( 'EditWindow' ):
             thisOne['AutocompleteMode'] = appWin.autocompleteMode
+            thisOne['AutocompleteDelay'] = str( appWin.autocompleteDelay )
 # end of getCurrentChildWindowSettings
 
 
@@ -712,6 +721,7 @@ def writeSettingsFile():
     # Seems that winfo_geometry doesn't work above (causes root Window to move)
     mainStuff['minimumSize'] = BiblelatorGlobals.theApp.minimumSize
     mainStuff['maximumSize'] = BiblelatorGlobals.theApp.maximumSize
+    mainStuff['bookTextCacheSize'] = str( getBookTextCache().maxBytes // (1024*1024) ) # in MB
     if 0 and debuggingThisModule:
         vPrint( 'Quiet', debuggingThisModule, " saved size (across/down) to ini file", repr(mainStuff['windowSize']), "pos", repr(mainStuff['windowPosition']) )
         vPrint( 'Quiet', debuggingThisModule, "   min", repr(mainStuff['minimumSize']), "max", repr(mainStuff['maximumSize']) )
@@ -47,6 +47,7 @@ Base widgets to allow display and manipulation of
         __init__( self )
         _callback( self, result, *args )
         setTextChangeCallback( self, callableFunction )
+        bulkEdit( self )
         onTextChange( self, result, *args )
 
     #class CustomEntry( CallbackAddon, BEntry ) -- unused
@@ -107,6 +108,7 @@ Base widgets to allow display and manipulation of
 from gettext import gettext as _
 from typing import Optional
 import logging
+from contextlib import contextmanager
 
 import tkinter as tk
 import tkinter.font as tkFont
@@ -134,9 +136,10 @@ if __name__ == '__main__':
 from Biblelator import BiblelatorGlobals
 from Biblelator.BiblelatorGlobals import APP_NAME, tkSTART, DEFAULT, errorBeep, BIBLE_FORMAT_VIEW_MODES
 from Biblelator.Dialogs.BiblelatorSimpleDialogs import showError, showInfo
+from Biblelator.Helpers.AutocorrectFunctions import setAutocorrectEntries
 
 
-LAST_MODIFIED_DATE = '2020-05-09' # by RJH
+LAST_MODIFIED_DATE = '2020-06-12' # by RJH
 SHORT_PROGRAM_NAME = "BiblelatorTextBoxes"
 PROGRAM_NAME = "Biblelator specialised text widgets"
 PROGRAM_VERSION = '0.46'
@@ -561,6 +564,7 @@ class CallbackAddon():
             vPrint( 'Quiet', debuggingThisModule, "CallbackAddon.__init__()" )
 
         self.callbackFunction = None
+        self.bulkEditDepth, self.bulkEditChangeCount = 0, 0 # Used by bulkEdit() below
         # All widget changes happen via an internal Tcl command with the same name as the widget:
         #       all inserts, deletes, cursor changes, etc
         #
@@ -601,20 +605,13 @@ class CallbackAddon():
                 interp alias {{}} ::{widget} {{}} widget_proxy _{widget} {callback}
             """.format( widget=str(self), callback=private_callback ) )
 
-        self.autocorrectEntries = []
         # Temporarily include some default autocorrect values
-        self.autocorrectEntries.append( ('<<','“') ) # Cycle through quotes with angle brackets
-        self.autocorrectEntries.append( ('“<','‘') )
-        self.autocorrectEntries.append( ('‘<',"'") )
-        self.autocorrectEntries.append( ("'<",'<') )
-        self.autocorrectEntries.append( ('>>','”') )
-        self.autocorrectEntries.append( ('”>','’') )
-        self.autocorrectEntries.append( ('’>',"'") )
-        self.autocorrectEntries.append( ("'>",'>') )
-        self.autocorrectEntries.append( ('--','–') ) # Cycle through en-dash/em-dash with hyphens
-        self.autocorrectEntries.append( ('–-','—') )
-        self.autocorrectEntries.append( ('—-','-') )
-        self.autocorrectEntries.append( ('...','…') )
+        setAutocorrectEntries( self, [
+                ('<<','“'), ('“<','‘'), ('‘<',"'"), ("'<",'<'), # Cycle through quotes with angle brackets
+                ('>>','”'), ('”>','’'), ('’>',"'"), ("'>",'>'),
+                ('--','–'), ('–-','—'), ('—-','-'), # Cycle through en-dash/em-dash with hyphens
+                ('...','…'),
+                ] )
 
         self.setTextChangeCallback( self.onTextChange ) # Enable it (enables autocorrect)
     # end of CallbackAddon.__init__
@@ -625,7 +622,9 @@ class CallbackAddon():
         This little function does the actual call of the user routine
             to handle when the CallbackAddon changes.
         """
-        if self.callbackFunction is not None:
+        if self.bulkEditDepth: # Just count them -- we'll notify once at the end of the bulk edit
+            self.bulkEditChangeCount += 1
+        elif self.callbackFunction is not None:
             self.callbackFunction( result, *args )
     # end of CallbackAddon._callback
 
@@ -639,6 +638,30 @@ class CallbackAddon():
     # end of CallbackAddon.setTextChangeCallback
 
 
+    @contextmanager
+    def bulkEdit( self ):
+        """
+        Used as a 'with' block around multi-step programmatic edits
+            (e.g., loading, pasting, replacing) so that the user routine
+            isn't called for every individual insert, delete, and cursor move.
+
+        If anything changed, the user routine is called ONCE at the end
+            with the pseudo-command 'bulkEdit' and the number of suppressed changes.
+        Bulk edits can be nested -- only the outer one does the notification.
+        """
+        fnPrint( debuggingThisModule, "CallbackAddon.bulkEdit() at depth {}".format( self.bulkEditDepth ) )
+        if not self.bulkEditDepth: self.bulkEditChangeCount = 0
+        self.bulkEditDepth += 1
+        try: yield self
+        finally:
+            try:
+                if self.bulkEditDepth==1 and self.bulkEditChangeCount and self.callbackFunction is not None:
+                    # NOTE: bulkEditDepth stays set during this call so any edits made by the user routine don't recurse
+                    self.callbackFunction( '', 'bulkEdit', self.bulkEditChangeCount )
+            finally: self.bulkEditDepth -= 1
+    # end of CallbackAddon.bulkEdit
+
+
     def onTextChange( self, result, *args ):
         """
         Called (set-up as a call-back function) whenever the entry cursor changes
@@ -690,20 +713,16 @@ class CallbackAddon():
         # Handle auto-correct
         if self.autocorrectEntries and args[0]=='insert' and args[1]=='insert':
             #dPrint( 'Quiet', debuggingThisModule, "Handle autocorrect" )
-            #previousText = getCharactersBeforeCursor( self )
-            allText = self.get()
-            #dPrint( 'Quiet', debuggingThisModule, "allText", repr(allText) )
-            index = self.index( tk.INSERT )
-            #dPrint( 'Quiet', debuggingThisModule, "index", repr(index) )
-            previousText = allText[0:index]
+            # Only fetch the few characters that could possibly match (not the entire buffer)
+            previousText = self.get( tk.INSERT+'-{}c'.format( self.maxAutocorrectLength ), tk.INSERT )
             #dPrint( 'Quiet', debuggingThisModule, "previousText", repr(previousText) )
-            for inChars,outChars in self.autocorrectEntries:
-                if previousText.endswith( inChars ):
-                    #dPrint( 'Quiet', debuggingThisModule, "Going to replace {!r} with {!r}".format( inChars, outChars ) )
-                    # Delete the typed character(s) and replace with the new one(s)
-                    self.delete( index-len(inChars), index )
-                    self.insert( tk.INSERT, outChars )
-                    break
+            autocorrectEntry = self.autocorrectMatcher.findMatch( previousText )
+            if autocorrectEntry is not None:
+                inChars, outChars = autocorrectEntry
+                #dPrint( 'Quiet', debuggingThisModule, "Going to replace {!r} with {!r}".format( inChars, outChars ) )
+                # Delete the typed character(s) and replace with the new one(s)
+                self.delete( tk.INSERT+'-{}c'.format( len(inChars) ), tk.INSERT )
+                self.insert( tk.INSERT, outChars )
         # end of auto-correct section
     # end of CallbackAddon.onTextChange
 # end of CallbackAddon class
@@ -60,9 +60,10 @@ from Biblelator.Helpers.AutocorrectFunctions import setDefaultAutocorrectEntries
 from Biblelator.Helpers.AutocompleteFunctions import getCharactersBeforeCursor, \
                                 getWordCharactersBeforeCursor, getCharactersAndWordBeforeCursor, \
                                 getWordBeforeSpace, addNewAutocompleteWord, acceptAutocompleteSelection
+from Biblelator.Helpers.AutocompleteIndex import AutocompleteIndex
 
 
-LAST_MODIFIED_DATE = '2020-04-29' # by RJH
+LAST_MODIFIED_DATE = '2020-06-11' # by RJH
 SHORT_PROGRAM_NAME = "BiblelatorTextEditWindow"
 PROGRAM_NAME = "Biblelator Text Edit Window"
 PROGRAM_VERSION = '0.46'
@@ -75,6 +76,8 @@ REFRESH_TITLE_TIME = 500 # msecs
 CHECK_DISK_CHANGES_TIME = 33333 # msecs
 NO_TYPE_TIME = 6000 # msecs
 NUM_AUTOCOMPLETE_POPUP_LINES = 6
+MAX_AUTOCOMPLETE_POPUP_WORDS = 100 # Only the best words are put into the pop-up box
+AUTOCOMPLETE_DEBOUNCE_TIME = 300 # msecs pause in typing before looking up autocomplete words (if autocompleteDelay is enabled)
 
 
 
@@ -130,12 +133,15 @@ class TextEditWindowAddon:
         setDefaultAutocorrectEntries( self )
         #setAutocorrectEntries( self, ourAutocorrectEntries )
 
-        self.autocompleteBox, self.autocompleteWords, self.existingAutocompleteWordText = None, {}, ''
+        self.autocompleteBox, self.autocompleteWords, self.existingAutocompleteWordText = None, AutocompleteIndex(), ''
+        self.autocompletePopupBox = None # The Listbox is kept (but hidden) when autocompleteBox is None
         self.autocompleteWordChars = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_'
         # Note: I guess we could have used non-word chars instead (to stop the backwards word search)
         self.autocompleteMinLength = 3 # Show the normal window after this many characters have been typed
         self.autocompleteMaxLength = 15 # Remove window after this many characters have been typed
         self.autocompleteMode = None # None or Dictionary1 or Dictionary2 (or Bible or BibleBook)
+        self.autocompleteDelay = 0 # msecs to wait for a pause in typing before looking up words (0 means immediately)
+        self.autocompleteLookupID = None
         self.addAllNewWords = False
 
         self.invalidCombinations = [] # characters or character combinations that shouldn't occur
@@ -263,8 +269,11 @@ class TextEditWindowAddon:
         viewMenu.add_separator()
         viewMenu.add_checkbutton( label=_('Status bar'), underline=9, variable=self._showStatusBarVar, command=self.doToggleStatusBar )
 
-        toolsMenu = tk.Menu( self.menubar, tearoff=False )
+        self._autocompleteDelayVar = tk.BooleanVar()
+        toolsMenu = tk.Menu( self.menubar, tearoff=False, postcommand=self.refreshAutocompleteDelayVar )
         self.menubar.add_cascade( menu=toolsMenu, label=_('Tools'), underline=0 )
+        toolsMenu.add_checkbutton( label=_('Autocomplete after typing pause'), underline=0, variable=self._autocompleteDelayVar, command=self.doToggleAutocompleteDelay )
+        toolsMenu.add_separator()
         toolsMenu.add_command( label=_('Options…'), underline=0, command=self.notWrittenYet )
 
         windowMenu = tk.Menu( self.menubar, tearoff=False )
@@ -288,6 +297,26 @@ class TextEditWindowAddon:
     # end of TextEditWindowAddon.createMenuBar
 
 
+    def refreshAutocompleteDelayVar( self ) -> None:
+        """
+        Called just before the Tools menu is shown
+            so the checkbutton shows the current setting
+            (which might have been loaded from the settings file after the menu was made).
+        """
+        self._autocompleteDelayVar.set( bool( self.autocompleteDelay ) )
+    # end of TextEditWindowAddon.refreshAutocompleteDelayVar
+
+
+    def doToggleAutocompleteDelay( self ) -> None:
+        """
+        Called from the Tools menu to turn on/off waiting for a pause in typing
+            before looking up autocomplete words.
+        """
+        fnPrint( debuggingThisModule, "TextEditWindowAddon.doToggleAutocompleteDelay()" )
+        self.autocompleteDelay = AUTOCOMPLETE_DEBOUNCE_TIME if self._autocompleteDelayVar.get() else 0
+    # end of TextEditWindowAddon.doToggleAutocompleteDelay
+
+
     def createContextMenu( self ):
         """
         """
@@ -389,18 +418,28 @@ class TextEditWindowAddon:
 
     def makeAutocompleteBox( self ) -> None:
         """
-        Create a pop-up listbox in order to be able to display possible autocomplete words.
+        Show a pop-up listbox in order to be able to display possible autocomplete words.
+
+        The listbox (in a Frame in a Toplevel) is only created the first time
+            and after that it's just moved and shown again.
         """
         fnPrint( debuggingThisModule, "TextEditWindowAddon.makeAutocompleteBox()" )
         if debuggingThisModule or BibleOrgSysGlobals.debugFlag or BibleOrgSysGlobals.strictCheckingFlag:
             assert self.autocompleteBox is None
 
-        # Create the pop-up listbox
         x, y, cx, cy = self.textBox.bbox( tk.INSERT ) # Get canvas coordinates
+        geometry = '+{}+{}'.format( x + self.textBox.winfo_rootx() + 2, y + cy + self.textBox.winfo_rooty() )
+        if self.autocompletePopupBox is not None: # we've already made it
+            topLevel = self.autocompletePopupBox.master.master # master is Frame, master.master is Toplevel
+            topLevel.wm_geometry( geometry )
+            topLevel.deiconify()
+            self.autocompleteBox = self.autocompletePopupBox
+            return
+
+        # Create the pop-up listbox
         topLevel = tk.Toplevel( self.textBox.master )
         topLevel.wm_overrideredirect(1) # Don't display window decorations (close button, etc.)
-        topLevel.wm_geometry( '+{}+{}' \
-            .format( x + self.textBox.winfo_rootx() + 2, y + cy + self.textBox.winfo_rooty() ) )
+        topLevel.wm_geometry( geometry )
         frame = tk.Frame( topLevel, highlightthickness=1, highlightcolor='darkgreen' )
         frame.pack( fill=tk.BOTH, expand=tk.YES )
         autocompleteScrollbar = tk.Scrollbar( frame, highlightthickness=0 )
@@ -416,6 +455,7 @@ class TextEditWindowAddon:
         self.autocompleteBox.bind( '<KeyPress>', self.OnAutocompleteChar )
         self.autocompleteBox.bind( '<Double-Button-1>', self.doAcceptAutocompleteSelection )
         self.autocompleteBox.bind( '<FocusOut>', self.removeAutocompleteBox )
+        self.autocompletePopupBox = self.autocompleteBox
     # end of TextEditWindowAddon.makeAutocompleteBox
 
 
@@ -473,16 +513,16 @@ class TextEditWindowAddon:
 
     def removeAutocompleteBox( self, event=None ):
         """
-        Remove the pop-up Listbox (in a Frame in a Toplevel) when it's no longer required.
+        Hide the pop-up Listbox (in a Frame in a Toplevel) when it's no longer required.
+            (It's kept so that it can be shown again by makeAutocompleteBox.)
 
         Used by autocomplete routines in onTextChange.
         """
-        if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-            #dPrint( 'Quiet', debuggingThisModule, "TextEditWindowAddon.removeAutocompleteBox( {} )".format( event ) )
-            assert self.autocompleteBox is not None
+        #dPrint( 'Quiet', debuggingThisModule, "TextEditWindowAddon.removeAutocompleteBox( {} )".format( event ) )
+        if self.autocompleteBox is None: return # e.g., FocusOut after it was already hidden
 
         self.textBox.focus()
-        self.autocompleteBox.master.master.destroy() # master is Frame, master.master is Toplevel
+        self.autocompleteBox.master.master.withdraw() # master is Frame, master.master is Toplevel
         self.autocompleteBox = None
     # end of TextEditWindowAddon.removeAutocompleteBox
 
@@ -615,79 +655,37 @@ class TextEditWindowAddon:
                 #dPrint( 'Quiet', debuggingThisModule, "Handle autocorrect" )
                 previousText = getCharactersBeforeCursor( self, self.maxAutocorrectLength )
                 #dPrint( 'Quiet', debuggingThisModule, "previousText", repr(previousText) )
-                for inChars,outChars in self.autocorrectEntries:
-                    if previousText.endswith( inChars ):
-                        #dPrint( 'Quiet', debuggingThisModule, "Going to replace {!r} with {!r}".format( inChars, outChars ) )
-                        # Delete the typed character(s) and replace with the new one(s)
-                        self.textBox.delete( tk.INSERT+'-{}c'.format( len(inChars) ), tk.INSERT )
-                        self.textBox.insert( tk.INSERT, outChars )
-                        break
+                autocorrectEntry = self.autocorrectMatcher.findMatch( previousText )
+                if autocorrectEntry is not None:
+                    inChars, outChars = autocorrectEntry
+                    #dPrint( 'Quiet', debuggingThisModule, "Going to replace {!r} with {!r}".format( inChars, outChars ) )
+                    # Delete the typed character(s) and replace with the new one(s)
+                    self.textBox.delete( tk.INSERT+'-{}c'.format( len(inChars) ), tk.INSERT )
+                    self.textBox.insert( tk.INSERT, outChars )
             # end of auto-correct section
 
 
             # Handle auto-complete
             if self.autocompleteMode is not None and self.autocompleteWords and args[0] in ('insert','delete',):
                 #dPrint( 'Quiet', debuggingThisModule, "Handle autocomplete1" )
-                lastAutocompleteWordText = self.existingAutocompleteWordText
-                self.existingAutocompleteWordText = getWordCharactersBeforeCursor( self, self.autocompleteMaxLength )
-                #dPrint( 'Quiet', debuggingThisModule, "existingAutocompleteWordText: {!r}".format( self.existingAutocompleteWordText ) )
-                if self.existingAutocompleteWordText != lastAutocompleteWordText:
-                    # We've had an actual change in the entered text
-                    possibleWords = None
-
-                    if len(self.existingAutocompleteWordText) >= self.autocompleteMinLength:
-                        # See if we have any words that start with the already typed letters
-                        #dPrint( 'Quiet', debuggingThisModule, "Handle autocomplete1A with {!r}".format( self.existingAutocompleteWordText ) )
-                        firstLetter, remainder = self.existingAutocompleteWordText[0], self.existingAutocompleteWordText[1:]
-                        #dPrint( 'Quiet', debuggingThisModule, "firstletter={!r} remainder={!r}".format( firstLetter, remainder ) )
-                        try: possibleWords = [firstLetter+thisBit for thisBit in self.autocompleteWords[firstLetter] \
-                                                            if thisBit.startswith(remainder) and thisBit != remainder]
-                        except KeyError: pass
-                        self.autocompleteOverlap = self.existingAutocompleteWordText
-                        #dPrint( 'Quiet', debuggingThisModule, 'possibleWordsA', possibleWords )
-
-                    # Maybe we haven't typed enough yet to pop-up the standard box so we look ahead using the previous word
-                    if not possibleWords:
-                        previousStuff = getCharactersAndWordBeforeCursor( self, self.autocompleteMaxLength )
-                        #dPrint( 'Quiet', debuggingThisModule, "Handle autocomplete1B with {!r}".format( previousStuff ) )
-                        firstLetter, remainder = previousStuff[0], previousStuff[1:]
-                        #dPrint( 'Quiet', debuggingThisModule, "firstletter={!r} remainder={!r}".format( firstLetter, remainder ) )
-                        self.autocompleteOverlap = previousStuff
-                        #try: possibleWords = [thisBit[remainderLength:] for thisBit in self.autocompleteWords[firstLetter] \
-                        try: possibleWords = [firstLetter+thisBit for thisBit in self.autocompleteWords[firstLetter] \
-                                                            if thisBit.startswith(remainder) and thisBit != remainder]
-                        except KeyError: pass
-                        self.autocompleteOverlap = previousStuff
-                        #dPrint( 'Quiet', debuggingThisModule, 'possibleWordsB', possibleWords )
-
-                    if possibleWords: # we have some word(s) to pop-up for possible selection
-                        #dPrint( 'Quiet', debuggingThisModule, "Handle autocomplete2" )
-                        if self.autocompleteBox is None:
-                            self.makeAutocompleteBox()
-                        else: # the Listbox is already made -- just empty it
-                            #dPrint( 'Quiet', debuggingThisModule, 'empty listbox' )
-                            self.autocompleteBox.delete( 0, tk.END ) # clear the listbox completely
-                        # Now fill the Listbox
-                        #dPrint( 'Quiet', debuggingThisModule, 'fill listbox' )
-                        for word in possibleWords:
-                            if BibleOrgSysGlobals.debugFlag: assert possibleWords.count( word ) == 1
-                            self.autocompleteBox.insert( tk.END, word )
-                        # Do a bit more set-up
-                        #self.autocompleteBox.pack( side=tk.LEFT, fill=tk.BOTH )
-                        self.autocompleteBox.select_set( '0' )
-                        self.autocompleteBox.focus()
-                    elif self.autocompleteBox is not None:
-                        #dPrint( 'Quiet', debuggingThisModule, 'destroy1 autocomplete listbox -- no possible words' )
+                if self.autocompleteLookupID:
+                    self.after_cancel( self.autocompleteLookupID ) # Cancel any delayed lookup which is scheduled
+                    self.autocompleteLookupID = None
+                if self.autocompleteDelay: # wait until they pause typing
+                    if self.autocompleteBox is not None: # the words in it are now out-of-date
                         self.removeAutocompleteBox()
-                    if self.addAllNewWords \
-                    and args[0]=='insert' and args[1]=='insert' \
-                    and args[2] in BibleOrgSysGlobals.TRAILING_WORD_END_CHARS:
-                        # Just finished typing a word (by typing a space or something)
-                        word = getWordBeforeSpace( self )
-                        if word: # in the Bible modes, we also add new words as they're typed
-                            #dPrint( 'Quiet', debuggingThisModule, "TextEditWindowAddon: Adding/Updating autocomplete word", repr(word) )
-                            addNewAutocompleteWord( self, word )
-                            # NOTE: edited/deleted words aren't removed until the program restarts
+                        self.existingAutocompleteWordText = '' # so that the delayed lookup fills a new box even if the word ends up the same
+                    self.autocompleteLookupID = self.after( self.autocompleteDelay, self.doAutocompleteLookup )
+                else: self.doAutocompleteLookup()
+                if self.addAllNewWords \
+                and args[0]=='insert' and args[1]=='insert' \
+                and args[2] in BibleOrgSysGlobals.TRAILING_WORD_END_CHARS:
+                    # Just finished typing a word (by typing a space or something)
+                    word = getWordBeforeSpace( self )
+                    if word: # in the Bible modes, we also add new words as they're typed
+                        #dPrint( 'Quiet', debuggingThisModule, "TextEditWindowAddon: Adding/Updating autocomplete word", repr(word) )
+                        addNewAutocompleteWord( self, word )
+                        # NOTE: edited/deleted words aren't removed until the program restarts
             elif self.autocompleteBox is not None:
                 #dPrint( 'Quiet', debuggingThisModule, 'destroy3 autocomplete listbox -- autocomplete is not enabled/appropriate' )
                 self.removeAutocompleteBox()
@@ -704,6 +702,60 @@ class TextEditWindowAddon:
     # end of TextEditWindowAddon.onTextChange
 
 
+    def doAutocompleteLookup( self ) -> None:
+        """
+        Find the autocomplete words which match the characters before the cursor
+            and show them in the pop-up box (or remove the box if there's none).
+
+        Called from onTextChange, either immediately
+            or else after a pause in typing (if autocompleteDelay is set).
+        """
+        fnPrint( debuggingThisModule, "TextEditWindowAddon.doAutocompleteLookup()" )
+        self.autocompleteLookupID = None
+
+        lastAutocompleteWordText = self.existingAutocompleteWordText
+        self.existingAutocompleteWordText = getWordCharactersBeforeCursor( self, self.autocompleteMaxLength )
+        #dPrint( 'Quiet', debuggingThisModule, "existingAutocompleteWordText: {!r}".format( self.existingAutocompleteWordText ) )
+        if self.existingAutocompleteWordText != lastAutocompleteWordText:
+            # We've had an actual change in the entered text
+            possibleWords = None
+
+            if len(self.existingAutocompleteWordText) >= self.autocompleteMinLength:
+                # See if we have any words that start with the already typed letters
+                #dPrint( 'Quiet', debuggingThisModule, "Handle autocomplete1A with {!r}".format( self.existingAutocompleteWordText ) )
+                possibleWords = self.autocompleteWords.getCompletions( self.existingAutocompleteWordText, MAX_AUTOCOMPLETE_POPUP_WORDS )
+                self.autocompleteOverlap = self.existingAutocompleteWordText
+                #dPrint( 'Quiet', debuggingThisModule, 'possibleWordsA', possibleWords )
+
+            # Maybe we haven't typed enough yet to pop-up the standard box so we look ahead using the previous word
+            if not possibleWords:
+                previousStuff = getCharactersAndWordBeforeCursor( self, self.autocompleteMaxLength )
+                #dPrint( 'Quiet', debuggingThisModule, "Handle autocomplete1B with {!r}".format( previousStuff ) )
+                possibleWords = self.autocompleteWords.getCompletions( previousStuff, MAX_AUTOCOMPLETE_POPUP_WORDS )
+                self.autocompleteOverlap = previousStuff
+                #dPrint( 'Quiet', debuggingThisModule, 'possibleWordsB', possibleWords )
+
+            if possibleWords: # we have some word(s) to pop-up for possible selection
+                #dPrint( 'Quiet', debuggingThisModule, "Handle autocomplete2" )
+                if self.autocompleteBox is None:
+                    self.makeAutocompleteBox()
+                #dPrint( 'Quiet', debuggingThisModule, 'empty listbox' )
+                self.autocompleteBox.delete( 0, tk.END ) # clear the listbox completely
+                # Now fill the Listbox (all at once)
+                #dPrint( 'Quiet', debuggingThisModule, 'fill listbox' )
+                if BibleOrgSysGlobals.debugFlag: assert len( set( possibleWords ) ) == len( possibleWords ) # No duplicates
+                self.autocompleteBox.insert( tk.END, *possibleWords )
+                # Do a bit more set-up
+                #self.autocompleteBox.pack( side=tk.LEFT, fill=tk.BOTH )
+                self.autocompleteBox.activate( 0 ) # in case the reused Listbox had a different active word
+                self.autocompleteBox.select_set( '0' )
+                self.autocompleteBox.focus()
+            elif self.autocompleteBox is not None:
+                #dPrint( 'Quiet', debuggingThisModule, 'destroy1 autocomplete listbox -- no possible words' )
+                self.removeAutocompleteBox()
+    # end of TextEditWindowAddon.doAutocompleteLookup
+
+
     def onTextNoChange( self ):
         """
         Called whenever the text box HASN'T CHANGED for NO_TYPE_TIME msecs.
@@ -735,10 +787,7 @@ class TextEditWindowAddon:
         index = self.textBox.index( tk.INSERT )
         atLine, atColumn = index.split('.')
 
-        grandtotal = 0
-        for firstLetter in self.autocompleteWords:
-            vPrint( 'Quiet', debuggingThisModule, "fL", firstLetter )
-            grandtotal += len( self.autocompleteWords[firstLetter] )
+        grandtotal = len( self.autocompleteWords )
 
         infoString = 'Current location:\n' \
             + '  Line, column: {}, {}\n'.format( atLine, atColumn ) \
@@ -807,10 +856,11 @@ class TextEditWindowAddon:
         except tk.TclError:
             showError( self, APP_NAME, _("Nothing to paste") )
             return
-        self.textBox.insert( tk.INSERT, text)          # add at current insert cursor
-        self.textBox.tag_remove( tk.SEL, tkSTART, tk.END )
-        self.textBox.tag_add( tk.SEL, tk.INSERT+'-{}c'.format( len(text) ), tk.INSERT )
-        self.textBox.see( tk.INSERT )                   # select it, so it can be cut
+        with self.textBox.bulkEdit(): # Only one text change notification for a large paste
+            self.textBox.insert( tk.INSERT, text)          # add at current insert cursor
+            self.textBox.tag_remove( tk.SEL, tkSTART, tk.END )
+            self.textBox.tag_add( tk.SEL, tk.INSERT+'-{}c'.format( len(text) ), tk.INSERT )
+            self.textBox.see( tk.INSERT )                   # select it, so it can be cut
     # end of TextEditWindowAddon.doPaste
 
 
@@ -890,8 +940,9 @@ class TextEditWindowAddon:
         on Apply in change dialog: change and refind
         """
         if self.textBox.tag_ranges( tk.SEL ):                      # must find first
-            self.textBox.delete( tk.SEL_FIRST, tk.SEL_LAST)
-            self.textBox.insert( tk.INSERT, changeto)             # deletes if empty
+            with self.textBox.bulkEdit(): # Only one text change notification for the replacement
+                self.textBox.delete( tk.SEL_FIRST, tk.SEL_LAST)
+                self.textBox.insert( tk.INSERT, changeto)             # deletes if empty
             self.textBox.see( tk.INSERT )
             self.doBoxFind( findtext )                          # goto next appear
             self.textBox.update() # force refresh
@@ -1017,16 +1068,17 @@ class TextEditWindowAddon:
         """
         fnPrint( debuggingThisModule, "TextEditWindowAddon.setAllText( {!r} )".format( newText ) )
 
-        self.textBox.configure( state=tk.NORMAL ) # In case it was disabled
-        self.textBox.delete( tkSTART, tk.END ) # Delete everything that's existing
-        self.textBox.insert( tk.END, newText )
-        self.textBox.highlightAllPatterns( self.patternsToHighlight )
+        with self.textBox.bulkEdit(): # Only one text change notification for all of this
+            self.textBox.configure( state=tk.NORMAL ) # In case it was disabled
+            self.textBox.delete( tkSTART, tk.END ) # Delete everything that's existing
+            self.textBox.insert( tk.END, newText )
+            self.textBox.highlightAllPatterns( self.patternsToHighlight )
 
-        self.textBox.mark_set( tk.INSERT, tkSTART ) # move insert point to top
-        self.textBox.see( tk.INSERT ) # scroll to top, insert is set
+            self.textBox.mark_set( tk.INSERT, tkSTART ) # move insert point to top
+            self.textBox.see( tk.INSERT ) # scroll to top, insert is set
 
-        self.textBox.edit_reset() # clear undo/redo stks
-        self.textBox.edit_modified( tk.FALSE ) # clear modified flag
+            self.textBox.edit_reset() # clear undo/redo stks
+            self.textBox.edit_modified( tk.FALSE ) # clear modified flag
     # end of TextEditWindowAddon.setAllText
 
 
@@ -1257,6 +1309,10 @@ class TextEditWindowAddon:
         """
         fnPrint( debuggingThisModule, "TextEditWindowAddon.doClose( {} )".format( event ) )
 
+        if self.autocompleteLookupID:
+            self.after_cancel( self.autocompleteLookupID ) # Cancel any delayed autocomplete lookup
+            self.autocompleteLookupID = None
+
         if self.modified():
             saveWork = False
             if self.saveChangesAutomatically and self.folderpath and self.filename:
@@ -29,7 +29,7 @@ from gettext import gettext as _
 from typing import Dict, List, Tuple, Optional
 import os.path
 import logging
-from collections import OrderedDict
+from bisect import bisect_left, bisect_right
 
 import tkinter as tk
 from tkinter.ttk import Style, Notebook, Frame, Label, Radiobutton
@@ -58,12 +58,22 @@ from Biblelator.Helpers.BiblelatorHelpers import createEmptyUSFMBookText, calcul
 from Biblelator.Windows.BibleResourceWindows import InternalBibleResourceWindowAddon
 from Biblelator.Windows.BibleReferenceCollection import BibleReferenceCollectionWindow
 from Biblelator.Windows.ChildWindows import ChildWindow
-from Biblelator.Windows.TextEditWindow import TextEditWindow, TextEditWindowAddon #, NO_TYPE_TIME
-from Biblelator.Helpers.AutocompleteFunctions import loadBibleAutocompleteWords, loadBibleBookAutocompleteWords, \
-                                    loadHunspellAutocompleteWords, loadILEXAutocompleteWords
-
-
-LAST_MODIFIED_DATE = '2020-05-01' # by RJH
+from Biblelator.Windows.TextEditWindow import TextEditWindow, TextEditWindowAddon, AUTOCOMPLETE_DEBOUNCE_TIME, \
+                                    CHECK_DISK_CHANGES_TIME #, NO_TYPE_TIME
+from Biblelator.Helpers.AutocompleteFunctions import gatherBibleAutocompleteWords, gatherBibleBookAutocompleteWords, \
+                                    gatherHunspellAutocompleteWords, gatherILEXAutocompleteWords, \
+                                    getInternalMarkers, needsBibleBookAutocompleteUpdate, countChangedBookWords, \
+                                    updateBibleBookAutocompleteWords
+from Biblelator.Helpers.USFMTextChecks import USFMTextChecker, TRAILING_SPACE_KEY
+from Biblelator.Helpers.BookTextBuffer import BookTextBuffer
+from Biblelator.Helpers.BackgroundWriter import BackgroundFileWriter
+from Biblelator.Helpers.USFMBookIndex import indexUSFMBookVerses, getIndexedVerseText, findEmptyFields, getEmptyFieldIndex
+from Biblelator.Helpers.VerseLineMap import VerseLineMap, parseCVMarkName
+from Biblelator.Helpers.BookTextCache import getBookTextCache
+from Biblelator.Helpers.USFMChapterLoader import USFMChapterLoader, FileChangedError, canLoadChapters
+
+
+LAST_MODIFIED_DATE = '2020-06-20' # by RJH
 SHORT_PROGRAM_NAME = "BiblelatorUSFMEditWindow"
 PROGRAM_NAME = "Biblelator USFM Edit Window"
 PROGRAM_VERSION = '0.46'
@@ -72,6 +82,13 @@ programNameVersion = f'{PROGRAM_NAME} v{PROGRAM_VERSION}'
 debuggingThisModule = False
 
 
+SAVE_RESULTS_CHECK_TIME = 200 # msecs between checks for background saves finishing
+
+LAZY_LOAD_BOOK_SIZE = 256 * 1024 # Bytes -- larger books are only loaded a few chapters at a time
+LAZY_LOAD_CONTEXT_VIEW_MODES = ( 'BeforeAndAfter', 'ByVerse', 'ByChapter', ) # Modes that don't need the entire book
+PREFETCH_CHAPTERS = 2 # Number of chapters loaded before and after the current one (when only loading some chapters)
+
+
 class ToolsOptionsDialog( ModalDialog ):
     """
     """
@@ -128,6 +145,10 @@ class ToolsOptionsDialog( ModalDialog ):
         self.rb1b.grid( row=3, column=1, sticky=tk.W )
         self.rb1c = Radiobutton( self.autocompletePage, text=_("Dictionary2"), variable=self.selectVariable1, value=5 )
         self.rb1c.grid( row=4, column=1, sticky=tk.W )
+        self.delayVariable = tk.IntVar()
+        self.delayVariable.set( 1 if self.parent.autocompleteDelay else 0 )
+        delayCb = tk.Checkbutton( self.autocompletePage, text=_("Wait for a pause in typing before showing words"), variable=self.delayVariable )
+        delayCb.grid( row=5, column=0, columnspan=2, sticky=tk.W )
 
         vPrint( 'Quiet', debuggingThisModule, "Add all pages" )
         self.notebook.add( self.generalPage, text=_("General") )
@@ -147,6 +168,7 @@ class ToolsOptionsDialog( ModalDialog ):
         self.parent.autocompleteMode = ToolsOptionsDialog.acValues[self.selectVariable1.get()-1]
         if self.parent.autocompleteMode != existingAutocompleteMode:
             vPrint( 'Quiet', debuggingThisModule, "Switching to {!r} autocomplete mode (from {!r})".format( self.parent.autocompleteMode, existingAutocompleteMode ) )
+        self.parent.autocompleteDelay = AUTOCOMPLETE_DEBOUNCE_TIME if self.delayVariable.get() else 0
 
         self.result = True
     # end of ToolsOptionsDialog.apply
@@ -181,7 +203,10 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
         #self.windowType = 'USFMBibleEditWindow' # from 'InternalBibleResourceWindow'
         #dPrint( 'Quiet', debuggingThisModule, 'U', self.windowType, self.genericWindowType )
         self.editMode = DEFAULT if editMode is None else editMode
-        self.verseCache = OrderedDict()
+        self.bookCacheBBB = self.bookCacheText = None # The book text that the verse index refers to
+        self.bookVerseIndex = {} # Indexed by (C,V) string 2-tuples, contains tuples of (start,end) offsets
+        self.bookOrderedBBB = self.bookOrderedText = None # Built from the above when needed by splitBookText
+        self.bookOrderedCVs, self.bookOrderedStarts = [], [] # (intC,intV) tuples and their offsets into self.bookOrderedText
 
         self.defaultFormatViewMode = 'Unformatted' # Only option done so far
         self.createMenuBar()
@@ -246,6 +271,7 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
                                      ('\\fig ','\\fig*'), ('\\ndx ','\\ndx*'), ('\\pro ','\\pro*'),
                                      ('\\w ','\\w*'), ('\\wg ','\\wg*'), ('\\wh ','\\wh*'),
                                     ) )
+        self.usfmTextChecker = USFMTextChecker( self.invalidCombinations, self.checkForPairs ) # Keeps the line-by-line check results
 
         self.patternsToHighlight = []
         # Temporarily include some default values
@@ -261,8 +287,15 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
 
         self.folderpath = self.filename = self.filepath = None
         self.lastBBB = None
-        self.bookTextBefore = self.bookText = self.bookTextAfter = None # The current text for this book
+        self.bookText = None # The current text for this book
+        self.bookTextBBB = None # The book that self.bookText belongs to (which is the one that gets saved)
+        self.bookTextBuffer = BookTextBuffer( self.getAllText ) # Holds the text before and after the displayed verses
+        self.chapterLoader = None # Only used for large books where self.bookText is only some of the chapters
         self.bookTextModified = False
+        self.verseLineMap = VerseLineMap() # Finds the chapter/verse for the cursor line
+        self.bookWriter = BackgroundFileWriter() # Saves are written in a background thread
+        self.saveInBackground = True # Set to False while closing
+        self.saveResultsCheckID = None
         self.exportFolderpath = None
 
         self.saveChangesAutomatically = True # different from AutoSave (which is in different files in different folders)
@@ -330,6 +363,10 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
                         self.myKeyboardShortcutsList.append( keyCode )
                 self.myKeyboardBindingsList.append( (name,BiblelatorGlobals.theApp.keyBindingDict[name][0],) )
             else: logging.critical( 'No key binding available for {}'.format( repr(name) ) )
+
+        # The standard text box undo/redo keys don't tell onTextChange what changed
+        self.textBox.bind( '<<Undo>>', self.onUndoRedo, add='+' )
+        self.textBox.bind( '<<Redo>>', self.onUndoRedo, add='+' )
     # end of USFMEditWindow.createEditorKeyboardBindings()
 
 
@@ -532,27 +569,56 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
 
     def prepareAutocomplete( self ):
         """
+        Get the autocomplete words from the app's shared vocabularies
+            (so that other windows using the same source share the same words),
+            which might mean loading them in a background thread.
+
+        The user can keep typing in the meantime
+            and autocomplete starts working once the words are ready.
         """
         BiblelatorGlobals.theApp.logUsage( PROGRAM_NAME, debuggingThisModule, 'prepareAutocomplete' )
         logging.debug( "prepareAutocomplete()" )
         vPrint( 'Never', debuggingThisModule, "prepareAutocomplete()" )
         if debuggingThisModule or BibleOrgSysGlobals.debugFlag:
             BiblelatorGlobals.theApp.setDebugText( "prepareAutocomplete…" )
-        BiblelatorGlobals.theApp.setWaitStatus( _("Preparing autocomplete words…") )
+
+        currentBBB = self.currentVerseKey.getBBB()
+        sourceFolder = os.path.abspath( self.internalBible.sourceFolder ) if self.internalBible is not None else None
 
         # Choose ONE of the following options
         if self.autocompleteMode == 'Bible':
-            loadBibleAutocompleteWords( self ) # Find words used in the Bible to fill the autocomplete mechanism
+            # Find words used in the Bible to fill the autocomplete mechanism
+            # NOTE: Other windows on the same Bible share these words (weighted towards the first window's book)
+            vocabularyKey = ( 'Bible', sourceFolder )
+            gatherFunction, gatherArgs = gatherBibleAutocompleteWords, (self.internalBible, currentBBB)
         elif self.autocompleteMode == 'BibleBook':
-            loadBibleBookAutocompleteWords( self ) # Find words used in this Bible book to fill the autocomplete mechanism
+            if currentBBB == 'UNK': return # UNKnown book -- no use here
+            # Find words used in this Bible book to fill the autocomplete mechanism
+            vocabularyKey = ( 'BibleBook', sourceFolder, currentBBB )
+            gatherFunction, gatherArgs = gatherBibleBookAutocompleteWords, (self.internalBible, currentBBB)
         elif self.autocompleteMode == 'Dictionary1':
-            loadHunspellAutocompleteWords( self, '/usr/share/hunspell/en_AU.dic', 'iso8859-15' )
+            gatherFunction, gatherArgs = gatherHunspellAutocompleteWords, ('/usr/share/hunspell/en_AU.dic',)
+            vocabularyKey = ( 'Hunspell', ) + gatherArgs
         elif self.autocompleteMode == 'Dictionary2':
-            loadILEXAutocompleteWords( self, '../../../MyPrograms/TED_Dictionary/EnglishDict.db', ('ENG','BRI',) )
+            gatherFunction, gatherArgs = gatherILEXAutocompleteWords, ('../../../MyPrograms/TED_Dictionary/EnglishDict.db', ('ENG','BRI',))
+            vocabularyKey = ( 'ILEX', os.path.abspath( gatherArgs[0] ), gatherArgs[1] )
         else: dPrint( 'Never', debuggingThisModule, repr(self.autocompleteMode) ); halt # Programming error
+
+        BiblelatorGlobals.theApp.autocompleteVocabularies.requestVocabulary( self, vocabularyKey, gatherFunction, gatherArgs )
     # end of USFMEditWindow.prepareAutocomplete
 
 
+    def releaseAutocompleteVocabulary( self ):
+        """
+        Tell the app that we no longer need our autocomplete words
+            (so they're freed, or their background loading is stopped,
+            if no other window is using them).
+        """
+        vPrint( 'Never', debuggingThisModule, "releaseAutocompleteVocabulary()" )
+        BiblelatorGlobals.theApp.autocompleteVocabularies.releaseVocabulary( self )
+    # end of USFMEditWindow.releaseAutocompleteVocabulary
+
+
 
     def onTextChange( self, result, *args ):
         """
@@ -618,7 +684,7 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
             self.bookTextModified = True
 
             # Check the text for USFM errors
-            try: self.checkUSFMTextForProblems()
+            try: self.checkUSFMTextForProblems( changeArgs=args )
             except KeyboardInterrupt:
                 vPrint( 'Quiet', debuggingThisModule, "USFMEditWindow: Got keyboard interrupt (2) -- saving my file…" )
                 self.doSave() # Sometimes the above seems to lock up
@@ -628,19 +694,12 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
                     self.onTextNoChangeID = None
                 return
 
-        # Try to determine the CV mark
-        # It seems that we have to try various strategies because
-        #       sometimes we get a 'current' mark and sometimes an 'anchor1'
-        gotCV = False
-        # Try to put the most useful methods first (for efficiency)
-        for mark in (self.textBox.mark_previous(tk.INSERT), self.textBox.mark_previous(tk.INSERT+'-1c'),
-                    self.textBox.mark_previous(tk.INSERT+' linestart+1c'), self.textBox.mark_previous(tk.INSERT+' linestart'),):
-            if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-                #dPrint( 'Quiet', debuggingThisModule, "  mark", j, mark )
-                if mark is None: vPrint( 'Quiet', debuggingThisModule, "    WHY is mark NONE?" )
-            if mark and mark[0]=='C' and (mark[1].isdigit() or mark[1:3]=='-1') and 'V' in mark:
-                gotCV = True; break
-        if gotCV and mark != self.lastCVMark:
+        # Determine the CV mark for the cursor line
+        #   (from our line map rather than searching backwards through the text box marks)
+        self.updateVerseLineMap( args )
+        cursorLine = int( self.textBox.index( tk.INSERT ).split( '.', 1 )[0] )
+        mark = self.verseLineMap.getMarkName( cursorLine )
+        if mark is not None and mark != self.lastCVMark:
             self.lastCVMark = mark
             C, V = mark[1:].split( 'V', 1 )
             #theApp.gotoGroupBCV( self._groupCode, self.currentVerseKey.getBBB(), C, V )
@@ -664,19 +723,151 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
     # end of USFMEditWindow.onTextNoChange
 
 
-    def checkUSFMTextForProblems( self, includeFormatting=False ):
+    def updateUSFMTextChecker( self, changeArgs ) -> bool:
         """
-        Called whenever the text box HASN'T CHANGED for NO_TYPE_TIME msecs.
+        Given the arguments of the text box command which changed the text
+            (as passed to onTextChange), update just the changed lines in the USFM text checker.
+
+        Only handles inserts and deletes at the cursor (i.e., typing, autocorrect, and autocomplete)
+            where we know where the change was.
+
+        To check that we're still in sync, the change in the number of characters
+            is compared with what was inserted (or deleted) rather than counting the entire text.
+        Undo and redo (which don't come here) clear the checker -- see onUndoRedo().
+
+        Returns False if the entire text needs to be checked instead.
+        """
+        checker = self.usfmTextChecker
+        if not changeArgs or not len(checker): return False
+        numLines = int( self.textBox.index( tk.END+'-1c' ).split( '.', 1 )[0] )
+        if changeArgs[0] in ('insert','delete') and len(changeArgs)>1 and str(changeArgs[1]).startswith( tk.INSERT ):
+            oldNumChars = checker.getCharCount()
+            # The cursor is now after the inserted text or at the place where the text was deleted
+            cursorLine = int( self.textBox.index( tk.INSERT ).split( '.', 1 )[0] )
+            lineDelta = numLines - len(checker)
+            if changeArgs[0] == 'insert':
+                if lineDelta < 0: return False
+                firstLine, numOldLines = cursorLine - lineDelta, 1
+            else: # it was a delete
+                if lineDelta > 0: return False
+                firstLine, numOldLines = cursorLine, 1 - lineDelta
+            if firstLine < 1 or firstLine-1+numOldLines > len(checker): return False
+            newLines = self.textBox.get( '{}.0'.format( firstLine ), '{}.end'.format( cursorLine ) ).split( '\n' )
+            checker.replaceLines( firstLine-1, numOldLines, newLines )
+            # Make sure that we're still in sync
+            charDelta = checker.getCharCount() - oldNumChars
+            if changeArgs[0] == 'insert':
+                if charDelta != sum( len(insertedText) for insertedText in changeArgs[2::2] ): return False
+            elif charDelta > 0 or (len(changeArgs)==2 and charDelta < -1): return False # A delete with one index only deletes one character
+        elif changeArgs[0] in ('insert','delete','replace','bulkEdit'): return False # don't know exactly what changed
+        # else it was only a cursor move
+
+        return numLines == len(checker)
+    # end of USFMEditWindow.updateUSFMTextChecker
+
+
+    def onUndoRedo( self, event=None ) -> None:
+        """
+        Called when an edit is undone or redone (from the menu or the keyboard)
+            which we can't follow line by line,
+            so the entire text gets checked again (once it's been changed).
+        """
+        vPrint( 'Never', debuggingThisModule, "USFMEditWindow.onUndoRedo( {} )".format( event ) )
+        self.usfmTextChecker.clear()
+        self.after_idle( self.rebuildVerseLineMap )
+        self.after_idle( self.checkUSFMTextForProblems )
+    # end of USFMEditWindow.onUndoRedo
+
+
+    def doUndo( self, event=None ) -> None:
+        TextEditWindowAddon.doUndo( self, event )
+        self.onUndoRedo()
+    # end of USFMEditWindow.doUndo
+
+    def doRedo( self, event=None ) -> None:
+        TextEditWindowAddon.doRedo( self, event )
+        self.onUndoRedo()
+    # end of USFMEditWindow.doRedo
+
+
+    def removeVerseMarks( self ) -> None:
+        """
+        Remove the chapter/verse marks from the text box
+            (otherwise the marks for verses that are no longer displayed are left at the start).
+        """
+        oldMarkNames = [markName for markName in self.textBox.mark_names() if parseCVMarkName( markName ) is not None]
+        if oldMarkNames: self.textBox.mark_unset( *oldMarkNames )
+        self.verseLineMap.clear()
+    # end of USFMEditWindow.removeVerseMarks
+
+
+    def rebuildVerseLineMap( self ) -> None:
+        """
+        Rebuild the line to chapter/verse map from the chapter/verse marks in the text box.
+        """
+        vPrint( 'Never', debuggingThisModule, "USFMEditWindow.rebuildVerseLineMap() for", self.moduleID )
+        marks = []
+        for markName in self.textBox.mark_names():
+            if parseCVMarkName( markName ) is not None:
+                line, column = self.textBox.index( markName ).split( '.', 1 )
+                marks.append( (int(line), int(column), markName) )
+        numLines = int( self.textBox.index( tk.END+'-1c' ).split( '.', 1 )[0] )
+        self.verseLineMap.setMarks( marks, numLines )
+    # end of USFMEditWindow.rebuildVerseLineMap
+
+
+    def updateVerseLineMap( self, changeArgs ) -> None:
+        """
+        Given the arguments of the text box command which changed the text
+            (as passed to onTextChange), shift the verse starting lines after the change.
+
+        Like updateUSFMTextChecker, only inserts and deletes at the cursor
+            are handled without rebuilding the map from the text box marks.
+        """
+        verseLineMap = self.verseLineMap
+        numLines = int( self.textBox.index( tk.END+'-1c' ).split( '.', 1 )[0] )
+        lineDelta = numLines - verseLineMap.numLines
+        if lineDelta == 0:
+            if changeArgs and changeArgs[0] in ('replace','bulkEdit'): # Marks might have been moved within the changed text
+                self.rebuildVerseLineMap()
+            return # else the line numbers haven't changed
+        if changeArgs and changeArgs[0] in ('insert','delete') and len(changeArgs)>1 and str(changeArgs[1]).startswith( tk.INSERT ):
+            # The cursor is now after the inserted text or at the place where the text was deleted
+            cursorLine = int( self.textBox.index( tk.INSERT ).split( '.', 1 )[0] )
+            if changeArgs[0] == 'insert' and lineDelta > 0:
+                try:
+                    verseLineMap.insertLines( cursorLine - lineDelta, lineDelta,
+                            lambda markName: int( self.textBox.index( markName ).split( '.', 1 )[0] ) )
+                    return
+                except tk.TclError: pass # Seems a mark has gone -- rebuild below
+            elif changeArgs[0] == 'delete' and lineDelta < 0:
+                verseLineMap.deleteLines( cursorLine, -lineDelta )
+                return
+        self.rebuildVerseLineMap() # don't know exactly what changed (e.g., undo/redo don't call onTextChange)
+    # end of USFMEditWindow.updateVerseLineMap
+
+
+    def checkUSFMTextForProblems( self, includeFormatting=False, changeArgs=None ):
+        """
+        Called whenever the text box HASN'T CHANGED for NO_TYPE_TIME msecs
+            (and also from onTextChange with the arguments of the change).
+
+        If changeArgs are given, only the changed lines are (re)checked
+            and the totals for the text are updated.
+        The entire text is rechecked if includeFormatting is set
+            (and only then are the positions of the problems found).
 
         Checks for some types of formatting errors.
         """
         #dPrint( 'Quiet', debuggingThisModule, "USFMEditWindow.checkUSFMTextForProblems", includeFormatting )
 
-        editedText = self.getAllText()
+        checker = self.usfmTextChecker
+        if includeFormatting or not self.updateUSFMTextChecker( changeArgs ):
+            checker.setText( self.getAllText() )
 
         # Check counts of USFM chapter and verse markers
-        numChaps = editedText.count( '\\c ' )
-        numVerses = editedText.count( '\\v ' )
+        numChaps = checker.getCount( '\\c ' )
+        numVerses = checker.getCount( '\\v ' )
         BBB, C, V = self.currentVerseKey.getBCV()
         #intC, intV = newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
 
@@ -714,56 +905,28 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
         elif numVerses < minVerseMarkers:
             warningMessage = _("May have missing USFM verse markers (expected {}, found {})").format( maxVerseMarkers, numVerses )
             #dPrint( 'Quiet', debuggingThisModule, warningMessage )
-        if '  ' in editedText:
+        if checker.getCount( '  ' ):
             warningMessage = _("No good reason to have multiple spaces in a USFM book")
             #dPrint( 'Quiet', debuggingThisModule, warningMessage )
-        elif includeFormatting and ' \n' in editedText:
+        elif includeFormatting and checker.getCount( TRAILING_SPACE_KEY ):
             suggestionMessage = _("No good reason to have a line ending with a space in a USFM book")
 
         if not errorMessage and not warningMessage: # and not suggestionMessage:
-            adjText = editedText
-            if adjText and adjText[-1] in ('\n','\r',): adjText = adjText[:-1] # Remove the final newline character
-            for line in adjText.split( '\n' ):
-                #dPrint( 'Quiet', debuggingThisModule, "checkUSFMTextForProblems got line: {!r}".format( line ) )
-                if not line:
-                    warningMessage = _("No good reason to have a blank line in a USFM book")
-                if line:
-                    if line[0] == '\\':
-                        marker = line.split( None, 1)[0][1:] # First token, but without the first (backslash) character
-                        #dPrint( 'Quiet', debuggingThisModule, "  Found marker: {!r}".format( marker ) )
-                        if marker not in BibleOrgSysGlobals.loadedUSFMMarkers:
-                            errorMessage = _("Not a recognized USFM marker {!r}").format( marker )
-                            break
-                    else:
-                        errorMessage = _("Line should start with backslash, not '{}{}'").format( line[:8], '…' if len(line)>8 else '' )
-                        break
-
-        if not errorMessage and not warningMessage: # and not suggestionMessage:
-            for segment in self.invalidCombinations:
-                if segment in editedText:
-                    warningMessage = _("Found {!r} invalid character(s) in USFM text").format( segment ); break
-
-        if not errorMessage and not warningMessage and not suggestionMessage:
-            for pairStart,pairEnd in self.checkForPairs:
-                if editedText.count( pairStart ) != editedText.count( pairEnd ):
-                    warningMessage = _("Counts of {!r} and {!r} differ in USFM text").format( pairStart, pairEnd ); break
-                # NOTE: Code below doesn't give error with ( ( ) -- that's why we have the counts above
-                ixl = -1
-                while True:
-                    ixl = editedText.find( pairStart, ixl+1 )
-                    if ixl == -1: break # none / no more found
-                    ixr = editedText.find( pairEnd, ixl+len(pairStart) )
-                    if ixr == -1: # no matching pair
-                        warningMessage = _("Found {!r} without matching {!r} in USFM text").format( pairStart, pairEnd ); break
-                if warningMessage: break # from outer loop
-                ixr = 99999 # Now work backwards
-                while True:
-                    ixr = editedText.rfind( pairEnd, 0, ixr )
-                    if ixr == -1: break
-                    ixl = editedText.rfind( pairStart, 0, ixr )
-                    if ixl == -1:
-                        warningMessage = _("Found {!r} without previous {!r} in USFM text").format( pairEnd, pairStart ); break
-                if warningMessage: break # from outer loop
+            if includeFormatting: # Get the line, invalid character, and unmatched pair problems (all in one pass through the lines)
+                problems = checker.getProblems()
+                if problems: # Show the first error (else the first warning) and where it is
+                    lineIndex, columnIndex, isError, message = next( (problem for problem in problems if problem[2]), problems[0] )
+                    message = _("{} at line {} column {}").format( message, lineIndex+1, columnIndex+1 )
+                    numOtherProblems = len(problems) - 1
+            else: # Just use the running totals after a keystroke (the positions are found when they pause typing)
+                problems = checker.getProblemSummary()
+                if problems: # Errors come first
+                    isError, message, count = problems[0]
+                    numOtherProblems = sum( problem[2] for problem in problems ) - 1
+            if problems:
+                if numOtherProblems: message += ' ' + _("(and {:,} other problem(s))").format( numOtherProblems )
+                if isError: errorMessage = message
+                else: warningMessage = message
 
         haveOwnStatusBar = self._showStatusBarVar.get()
         if errorMessage:
@@ -810,9 +973,7 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
         numVerses = text.count( '\\v ' )
         numSectionHeadings = text.count('\\s ')+text.count('\\s1 ')+text.count('\\s2 ')+text.count('\\s3 ')+text.count('\\s4 ')
 
-        grandtotal = 0
-        for firstLetter in self.autocompleteWords:
-            grandtotal += len( self.autocompleteWords[firstLetter] )
+        grandtotal = len( self.autocompleteWords )
 
         infoString = 'Current location:\n' \
             + '  BCV: {} {}:{}\n'.format( BBB, C, V ) \
@@ -835,15 +996,22 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
     # end of USFMEditWindow.modified
 
 
-    def getBookDataFromDisk( self, BBB ) -> Optional[str]:
+    def getBookDataFromDisk( self, BBB, intC:Optional[int]=None ) -> Optional[str]:
         """
         Fetches and returns the internal Bible data for the given book
             by reading the USFM source file completely
+            (or getting it from the program's book text cache if it hasn't changed)
             and returning the text.
+
+        If the chapter number is given and the book is large,
+            only the chapters around it are read (using self.chapterLoader)
+            if the context view mode doesn't need the entire book.
         """
-        logging.debug( "USFMEditWindow.getBookDataFromDisk( {} ) was {} for {}".format( BBB, self.lastBBB, self.projectName ) )
-        vPrint( 'Never', debuggingThisModule, "USFMEditWindow.getBookDataFromDisk( {} ) was {} for {}".format( BBB, self.lastBBB, self.projectName ) )
+        logging.debug( "USFMEditWindow.getBookDataFromDisk( {}, {} ) was {} for {}".format( BBB, intC, self.lastBBB, self.projectName ) )
+        vPrint( 'Never', debuggingThisModule, "USFMEditWindow.getBookDataFromDisk( {}, {} ) was {} for {}".format( BBB, intC, self.lastBBB, self.projectName ) )
 
+        self.finishSaving() # Make sure that we don't read a file that's still being written
+        self.chapterLoader = None
         if BBB != self.lastBBB:
             #self.bookText = None
             #self.bookTextModified = False
@@ -860,7 +1028,15 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
                 self.bookFilepath = os.path.join( self.internalBible.sourceFolder, self.bookFilename )
                 if self.setFilepath( self.bookFilepath ): # For title displays, etc.
                     #dPrint( 'Quiet', debuggingThisModule, 'gVD', BBB, repr(self.bookFilepath), repr(self.internalBible.encoding) )
-                    bookText = open( self.bookFilepath, 'rt', encoding=self.internalBible.encoding ).read()
+                    if intC is not None and self._contextViewMode in LAZY_LOAD_CONTEXT_VIEW_MODES \
+                    and os.path.getsize( self.bookFilepath ) > LAZY_LOAD_BOOK_SIZE and canLoadChapters( self.internalBible.encoding ):
+                        self.chapterLoader = USFMChapterLoader( self.bookFilepath, self.internalBible.encoding )
+                        bookText = self.loadBookChapters( intC )
+                        if bookText is not None:
+                            self.getProjectEmptyFieldIndex() # Starts it being built in the background (if it isn't already)
+                            return bookText
+                        self.chapterLoader = None # Seems we'll have to load the entire book after all
+                    bookText = getBookTextCache().getText( self.bookFilepath, self.internalBible.encoding )
                     if bookText is None:
                         showError( self, APP_NAME, _("Couldn't decode and open file {} with encoding {}").format( self.bookFilepath, self.internalBible.encoding ) )
                     elif bookText == '':
@@ -873,6 +1049,7 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
                             logging.info( "getBookDataFromDisk: Detected Unicode (UTF-8) Byte Order Marker (BOM) in {}".format( self.bookFilepath ) )
                             bookText = bookText[3:] # Remove the UTF-8 Unicode Byte Order Marker (BOM)
                         # NOTE: We don't restore the BOM later
+                    self.getProjectEmptyFieldIndex() # Starts it being built in the background (if it isn't already)
                     return bookText
             else:
                 showError( self, APP_NAME, _("Couldn't determine USFM filename for {!r} book").format( BBB ) )
@@ -880,15 +1057,63 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
     # end of USFMEditWindow.getBookDataFromDisk
 
 
+    def loadBookChapters( self, intC:int ) -> Optional[str]:
+        """
+        Reads and returns the text of the chapters around the given one
+            from self.chapterLoader (which remembers which chapters we have).
+
+        Returns None if the chapters can't be found (e.g., if they're not in order in the file).
+        """
+        fnPrint( debuggingThisModule, "USFMEditWindow.loadBookChapters( {} )".format( intC ) )
+        self.bookWriter.waitUntilFinished() # Make sure that we don't read a file that's still being written
+        return self.chapterLoader.loadChapters( intC-PREFETCH_CHAPTERS, intC+PREFETCH_CHAPTERS )
+    # end of USFMEditWindow.loadBookChapters
+
+
+    def loadMoreBookChapters( self, BBB:str, intC:int ) -> None:
+        """
+        Called when we're only using some chapters of the book
+            and need chapters that aren't loaded (or the entire book).
+
+        If we've got unsaved changes, our chapters are saved back into the file first
+            so that we can carry on only loading the chapters that we need.
+
+        Loads the entire book (into self.bookText) if the save failed
+            or if the context view mode now needs the entire book.
+        """
+        fnPrint( debuggingThisModule, "USFMEditWindow.loadMoreBookChapters( {}, {} )".format( BBB, intC ) )
+
+        bookText = None
+        if self._contextViewMode in LAZY_LOAD_CONTEXT_VIEW_MODES:
+            if self.modified():
+                self.doSave() # Puts our changed chapters back into the book file
+                self.finishSaving() # So that we know if it worked
+            if not self.modified():
+                bookText = self.loadBookChapters( intC )
+        if bookText is None: # Get the entire book instead
+            if self.modified():
+                try: bookText = self.getEntireText() # Includes our changes
+                except (FileChangedError, OSError) as err:
+                    showError( self, APP_NAME, _("Couldn't load the rest of {}: {}").format( self.filename, err ) )
+                    return # and keep the chapters that we've got
+            else: bookText = self.getBookDataFromDisk( BBB ) # Will have been changed on disk
+            self.chapterLoader = None
+        self.bookText = bookText
+        if bookText is not None: self.cacheBook( BBB )
+    # end of USFMEditWindow.loadMoreBookChapters
+
+
     def cacheBook( self, BBB:str, clearFirst=True ):
         """
-        Puts the book data from self.bookText into the self.verseCache dictionary
-            accessible by verse key.
+        Indexes the book data from self.bookText (in one pass)
+            into the self.bookVerseIndex dictionary
+            which is accessible by (C,V) and contains the (start,end) offsets
+            of the verse data in the book text (not copies of the text).
 
         Automatically attaches section headings to the following verse
             (rather than having them appear at the end of the current verse).
 
-        Normally clears the cache before starting,
+        Normally clears the index before starting,
             to prevent duplicate entries.
         """
         logging.debug( "USFMEditWindow.cacheBook( {}, {} ) for {}".format( BBB, clearFirst, self.projectName ) )
@@ -898,196 +1123,88 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
 
         if clearFirst:
             vPrint( 'Never', debuggingThisModule, "  Clearing cache first!" )
-            self.verseCache = OrderedDict()
-
-        def addCacheEntry( BBB, C, V, data ):
-            """
-            Check for duplicates before
-                adding a new BCV entry to the book cache.
-            """
-            #dPrint( 'Never', debuggingThisModule, "addCacheEntry", BBB, C, V, data )
-            assert BBB and C and V and data
-            verseKeyHash = SimpleVerseKey( BBB, C, V ).makeHash()
-            if verseKeyHash in self.verseCache: # Oh, how come we already have this key???
-                if data == self.verseCache[verseKeyHash]:
-                    logging.critical( "cacheBook: We have an identical duplicate {} {}: {!r}" \
-                            .format( self.projectAbbreviation, verseKeyHash, data ) )
-                else:
-                    logging.critical( "cacheBook: We have a duplicate {} {} -- already had {!r} and now appending {!r}" \
-                            .format( self.projectAbbreviation, verseKeyHash, self.verseCache[verseKeyHash], data ) )
-                    data = self.verseCache[verseKeyHash] + '\n' + data
-            self.verseCache[verseKeyHash] = data.replace( '\n\n', '\n' ) # Weed out blank lines
-        # end of USFMEditWindow.cacheBook.addCacheEntry
-
-        def getMarkerText( blIndex ):
-            """
-            Given an index to (nonlocal) bookLines,
-                get that line and break into 2-tuple (marker,text).
-            """
-            gmtLine = bookLines[blIndex]
-            #marker = text = None
-            if gmtLine and gmtLine[0] == '\\':
-                try: marker, text = gmtLine[1:].split( None, 1 )
-                except ValueError: marker, text = gmtLine[1:].split( None, 1 )[0], ''
-            else: marker, text = None, gmtLine
-            return marker, text
-        # end of USFMEditWindow.cacheBook.getMarkerText
-
-        # Main code for cacheBook
-        sectionHeadings = ( 's', 's1', 's2', 's3', 's4', )
-        C, V = '-1', '0' # So first/id line starts at -1:0
-        startedVerseEarly = False
-        currentEntry = ''
-        bookLines = self.bookText.split( '\n' )
-        numLines = len( bookLines )
-        for j in range( numLines): # Do it this way to make it easy to look-ahead
-            line = bookLines[j]
-            marker, text = getMarkerText( j )
-            #dPrint( 'Quiet', debuggingThisModule, "cacheBook line", repr(marker), repr(text), line )
-
-            if marker in ( 'c', 'C' ):
-                newC = ''
-                for char in line[3:]: # Get chapter number digits
-                    if char.isdigit(): newC += char
-                    else: break
-                if newC:
-                    if currentEntry:
-                        addCacheEntry( BBB, C, V, currentEntry )
-                        currentEntry = ''
-                    C, V = newC, '0'
-            elif marker in sectionHeadings:
-                if j<numLines-2:
-                    marker1, text1 = getMarkerText( j+1 )
-                    if marker1 in ('r','sr','mr',):
-                        marker2, text2 = getMarkerText( j+2 )
-                        if marker2 in BibleOrgSysGlobals.USFMParagraphMarkers and not text2:
-                            marker3, text3 = getMarkerText( j+3 )
-                            if marker3 in ( 'v', 'V' ):
-                                # Start a new verse entry here if we have a section heading, cross-reference, empty paragraph marker, then the next verse
-                                if currentEntry: # Save the previous CV entry
-                                    addCacheEntry( BBB, C, V, currentEntry )
-                                    currentEntry = ''
-                                    startedVerseEarly = True
-                    elif marker1 in ( 'v', 'V' ): # There's actually a missing paragraph marker but nevermind
-                        # Start a new verse entry here if we have a section heading, missing paragraph marker, then the next verse
-                        if currentEntry: # Save the previous CV entry
-                            addCacheEntry( BBB, C, V, currentEntry )
-                            currentEntry = ''
-                            startedVerseEarly = True
-                    elif marker1 in BibleOrgSysGlobals.USFMParagraphMarkers and not text1:
-                        marker2, text2 = getMarkerText( j+2 )
-                        if marker2 in ( 'v', 'V' ):
-                            # Start a new verse entry here if we have a section heading, empty paragraph marker, then the next verse
-                            if currentEntry: # Save the previous CV entry
-                                addCacheEntry( BBB, C, V, currentEntry )
-                                currentEntry = ''
-                                startedVerseEarly = True
-            elif marker in ( 'v', 'V' ):
-                newV = ''
-                for char in line[3:]:
-                    if char.isdigit(): newV += char
-                    else: break
-                if newV:
-                    if currentEntry and not startedVerseEarly:
-                        addCacheEntry( BBB, C, V, currentEntry )
-                        currentEntry = ''
-                    V = newV
-                    startedVerseEarly = False
-            elif marker in BibleOrgSysGlobals.USFMParagraphMarkers and not text and not startedVerseEarly: # already
-                if j<numLines-1:
-                    marker1, text1 = getMarkerText( j+1 )
-                    if marker1 in ( 'v', 'V' ):
-                        # We want to move this empty paragraph marker into the next verse
-                        if currentEntry:
-                            addCacheEntry( BBB, C, V, currentEntry )
-                            currentEntry = ''
-                            startedVerseEarly = True
-            elif C=='-1' and line.startswith( '\\' ):
-                if currentEntry: # Should only happen if the file has blank lines before any chapter markers
-                    if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-                        vPrint( 'Quiet', debuggingThisModule, "cE", currentEntry )
-                        # NOTE: This can fail if there's a line in the file NOT beginning with a USFM
-                        #   i.e., a continuation line
-                        assert currentEntry == '\n' # Warn programmer if it's anything different
-                    addCacheEntry( BBB, C, V, currentEntry ) # Will give a duplicate entry error adding to newline
-                    currentEntry = ''
-                addCacheEntry( BBB, C, V, line + '\n' )
-                V = str( int(V) + 1 )
-                continue # Don't save current entry in next line
-            currentEntry += line + '\n'
-        if currentEntry: # cache the final verse
-            addCacheEntry( BBB, C, V, currentEntry )
+            self.bookVerseIndex = {}
+        elif BibleOrgSysGlobals.debugFlag: assert BBB == self.bookCacheBBB and self.bookText == self.bookCacheText
+        self.bookCacheBBB, self.bookCacheText = BBB, self.bookText
+        self.bookOrderedBBB = self.bookOrderedText = None # Will need to be rebuilt
+
+        indexUSFMBookVerses( self.bookText, self.bookVerseIndex, logName='{} {}'.format( self.projectAbbreviation, BBB ) )
         #from itertools import islice
-        #dPrint( 'Quiet', debuggingThisModule, "USFMEditWindow.cacheBook", BBB, "verseCache:", list( islice( self.verseCache, 0, 20 ) ) )
+        #dPrint( 'Quiet', debuggingThisModule, "USFMEditWindow.cacheBook", BBB, "bookVerseIndex:", list( islice( self.bookVerseIndex.items(), 0, 20 ) ) )
     # end of USFMEditWindow.cacheBook
 
 
     def getCachedVerseData( self, verseKey ):
         """
-        Returns the requested verse from our cache if it's there,
+        Returns the requested verse from our indexed book if it's there,
             otherwise returns None.
         """
         #dPrint( 'Never', debuggingThisModule, "getCachedVerseData( {} )".format( verseKey ) )
-        try: return self.verseCache[verseKey.makeHash()]
+        if verseKey.getBBB() != self.bookCacheBBB: return None
+        try: offsets = self.bookVerseIndex[(verseKey.getChapterNumber(), verseKey.getVerseNumber())]
         except KeyError: return None
+        return getIndexedVerseText( self.bookCacheText, offsets )
     # end of USFMEditWindow.getCachedVerseData
 
 
-    def emptyVerseMatch( self, stringToSearch ):
+    def splitBookText( self, BBB:str, firstCV:Tuple[int,int], afterCV:Tuple[int,int] ) -> List[Tuple[int,int]]:
         """
-        Goes through all chapters, verses, and books
-            searching for an existing verse marker without text.
+        Given the (intC,intV) of the first displayed verse and of the verse after the last displayed one,
+            sets the book text before and after the displayed verses into self.bookTextBuffer
+            and returns a list of the (intC,intV) tuples of the displayed verses.
 
-        Returns True if one is found,
-            otherwise False.
+        The cached verses are joined (in versification order) only once for each cached book
+            (rather than adding every verse to the before/after texts each time we navigate)
+            and the buffer only keeps offsets into that text.
         """
-        #dPrint( 'Quiet', debuggingThisModule, "emptyVerseMatch searching in {!r}".format( stringToSearch ) )
-        for lineToSearch in stringToSearch.split( '\n' ):
-            #dPrint( 'Quiet', debuggingThisModule, " emptyVerseMatch lineToSearch", repr(lineToSearch) )
-            ix = lineToSearch.find( '\\v ' )
-            if ix != -1:
-                verseText = lineToSearch[ix+3:]
-                #dPrint( 'Quiet', debuggingThisModule, "      emptyVerseMatch verseText", repr(verseText) )
-                try: verseNumber, rest = verseText.split( ' ', 1 )
-                except ValueError: rest = '' # No space to split on
-                #dPrint( 'Quiet', debuggingThisModule, "      emptyVerseMatch rest", repr(rest) )
-                if not rest.strip():
-                    return True
-        return False
-    # end of USFMEditWindow.getCachedVerseData
+        fnPrint( debuggingThisModule, "USFMEditWindow.splitBookText( {}, {}, {} )".format( BBB, firstCV, afterCV ) )
+
+        if BBB != self.bookOrderedBBB or self.bookOrderedText is None:
+            verseDataList, self.bookOrderedCVs, self.bookOrderedStarts = [], [], []
+            offset = 0
+            numChaps = self.getNumChapters( BBB )
+            if numChaps is None: numChaps = 0
+            for thisC in range( -1, numChaps+1 ):
+                try: numVerses = self.getNumVerses( BBB, thisC )
+                except KeyError: numVerses = 0
+                for thisV in range( numVerses+1 ):
+                    self.bookOrderedCVs.append( (thisC,thisV) )
+                    self.bookOrderedStarts.append( offset )
+                    thisVerseData = self.getCachedVerseData( SimpleVerseKey( BBB, thisC, thisV ) )
+                    if thisVerseData:
+                        verseDataList.append( thisVerseData )
+                        offset += len( thisVerseData )
+            self.bookOrderedStarts.append( offset ) # So there's an offset for the end of the book
+            self.bookOrderedBBB, self.bookOrderedText = BBB, ''.join( verseDataList )
+
+        firstIndex = bisect_left( self.bookOrderedCVs, firstCV )
+        afterIndex = max( firstIndex, bisect_left( self.bookOrderedCVs, afterCV ) )
+        self.bookTextBuffer.setSurroundingText( self.bookOrderedText, self.bookOrderedStarts[firstIndex], self.bookOrderedStarts[afterIndex] )
+        return self.bookOrderedCVs[firstIndex:afterIndex]
+    # end of USFMEditWindow.splitBookText
+
+
+    def getProjectEmptyFieldIndex( self ):
+        """
+        Returns the (shared) EmptyFieldIndex for our project
+            (starting to build it in the background if necessary),
+            or None if we don't have a project folder.
+        """
+        if self.internalBible is None or not self.internalBible.sourceFolder: return None
+        emptyFieldIndex = getEmptyFieldIndex( self.internalBible.sourceFolder, self.internalBible.encoding )
+        try: emptyFieldIndex.startBuilding( self.internalBible.possibleFilenameDict )
+        except AttributeError: pass # we have no books (yet)
+        return emptyFieldIndex
+    # end of USFMEditWindow.getProjectEmptyFieldIndex
+
+
+    def doGotoNextEmptySomething( self, somethingName:str ) -> None:
+        """
+        Given a somethingName string (e.g., 'verse', 'marker' -- see EMPTY_FIELD_MATCH_FUNCTIONS)
+            go to the next verse (in this or a following book) with that kind of empty field.
 
-    def emptyMarkerMatch( self, stringToSearch ):
-        """
-        Goes through all chapters, verses, and books
-            searching for an empty marker that should have text.
-
-        Returns True if one is found,
-            otherwise False.
-        """
-        #dPrint( 'Quiet', debuggingThisModule, "emptyMarkerMatch searching in {!r}".format( stringToSearch ) )
-        for lineToSearch in stringToSearch.split( '\n' ):
-            #dPrint( 'Quiet', debuggingThisModule, " emptyMarkerMatch lineToSearch", repr(lineToSearch) )
-            if lineToSearch.startswith( '\\' ):
-                try: marker, rest = lineToSearch[1:].split( ' ', 1 )
-                except ValueError: marker, rest = lineToSearch[1:], '' # No space to split on
-                #dPrint( 'Quiet', debuggingThisModule, " emptyMarkerMatch marker", repr(marker), "rest", repr(rest) )
-                if marker == 'v':
-                    try: verseNumber, rest = rest.split( ' ', 1 )
-                    except ValueError: rest = '' # No space to split on
-                    #dPrint( 'Quiet', debuggingThisModule, "      emptyVerseMatch rest", repr(rest) )
-                    if not rest.strip():
-                        return True
-                elif marker not in BibleOrgSysGlobals.USFMParagraphMarkers and marker not in ('b','li','li1',):
-                    if not rest.strip():
-                        return True
-        return False
-    # end of USFMEditWindow.emptyMarkerMatch
-
-    def doGotoNextEmptySomething( self, somethingName, matchFunction ):
-        """
-        Given a somethingName string (e.g., 'verse', 'marker' )
-            and a function which takes a string and returns True if the required empty field is found,
-            step through verses, chapters, and books and go to the next empty field.
+        Uses the project EmptyFieldIndex (rather than loading and checking every following verse)
+            except that any unsaved changes to the current book are checked directly.
 
         Stays at the current BCV if no empty field is found.
         """
@@ -1095,42 +1212,32 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
         if BibleOrgSysGlobals.debugFlag:
             vPrint( 'Quiet', debuggingThisModule, "doGotoNextEmptySomething( {!r} ) from {} {}:{}".format( somethingName, BBB, C, V ) )
 
-        #dPrint( 'Quiet', debuggingThisModule, "doGotoNextEmptySomething starting at {} {}:{}".format( BBB, C, V ) )
-        intC, intV = int( C ), int( V )
-        while True:
-            #dPrint( 'Quiet', debuggingThisModule, "  doGotoNextEmptySomething looping at {} {}:{}".format( BBB, intC, intV ) )
-            if intV < self.maxVersesThisChapter: intV+=1 # Next verse
-            elif intC < self.maxChaptersThisBook:
-                intC, intV = intC+1, 0 # Next chapter
-                self.maxVersesThisChapter = self.getNumVerses( BBB, intC )
-            else: # need to go to the next book
-                if self.bookTextModified: self.doSave() # resets bookTextModified flag
-                BBB = self.getNextBookCode( BBB )
-                if BBB is None:
-                    #dPrint( 'Quiet', debuggingThisModule, "    doGotoNextEmptySomething finished all books -- stopping" )
-                    showInfo( self, APP_NAME, _("No (more) empty {} found").format( somethingName ) )
-                    break
-                else:
-                    #dPrint( 'Quiet', debuggingThisModule, "    doGotoNextEmptySomething going to next book {}".format( BBB ) )
-                    intC, intV = 1, 1
-                    self.maxChaptersThisBook = self.getNumChapters( BBB )
-                    self.maxVersesThisChapter = self.getNumVerses( BBB, intC )
-                    self.bookText = self.getBookDataFromDisk( BBB )
-                    if self.bookText is not None:
-                        self.cacheBook( BBB )
-            #dPrint( 'Quiet', debuggingThisModule, "    doGotoNextEmptySomething going to {} {}:{}".format( BBB, intC, intV ) )
-            cachedVerseData = self.getCachedVerseData( SimpleVerseKey( BBB, intC, intV ) )
-            if cachedVerseData is None: # Could be end of books OR INSIDE A VERSE BRIDGE
-                pass
-                #dPrint( 'Quiet', debuggingThisModule, "      doGotoNextEmptySomething got None!" )
-                #break
-            else:
-                #dPrint( 'Quiet', debuggingThisModule, "      doGotoNextEmptySomething got", repr(cachedVerseData) )
-                assert isinstance( cachedVerseData, str )
-                if matchFunction( cachedVerseData ):
-                    #dPrint( 'Quiet', debuggingThisModule, "      doGotoNextEmptySomething found empty {} at {} {}:{}!".format( somethingName, BBB, intC, intV ) )
-                    self.gotoBCV( BBB, intC,intV, 'USFMEditWindow.doGotoNextEmptySomething' )
-                    break # Found an empty verse -- done
+        emptyFieldIndex = self.getProjectEmptyFieldIndex()
+        try: bookFilenames = self.internalBible.possibleFilenameDict
+        except AttributeError: bookFilenames = {} # we have no books
+        searchBBB, afterCV = BBB, (int( C ), int( V ))
+        while searchBBB is not None:
+            #dPrint( 'Quiet', debuggingThisModule, "  doGotoNextEmptySomething searching {} after {}".format( searchBBB, afterCV ) )
+            if searchBBB == self.bookTextBBB and self.modified(): # check the text in the editor
+                emptyFields = findEmptyFields( self.getEntireText() )
+            elif emptyFieldIndex is not None and searchBBB in bookFilenames:
+                emptyFields = emptyFieldIndex.getEmptyFields( searchBBB, bookFilenames[searchBBB] )
+            else: emptyFields = None
+            if emptyFields:
+                entries = emptyFields[somethingName]
+                numChapters = self.getNumChapters( searchBBB ) or 0
+                for ix in range( bisect_right( entries, afterCV ), len(entries) ):
+                    intC, intV = entries[ix]
+                    if intC > numChapters: break # and all the following ones will be too
+                    try: numVerses = self.getNumVerses( searchBBB, intC )
+                    except KeyError: numVerses = 0
+                    if intV <= numVerses:
+                        #dPrint( 'Quiet', debuggingThisModule, "      doGotoNextEmptySomething found empty {} at {} {}:{}!".format( somethingName, searchBBB, intC, intV ) )
+                        self.gotoBCV( searchBBB, intC,intV, 'USFMEditWindow.doGotoNextEmptySomething' )
+                        return # Found an empty verse -- done
+            searchBBB, afterCV = self.getNextBookCode( searchBBB ), (1,0) # Following books are searched from 1:1
+        #dPrint( 'Quiet', debuggingThisModule, "    doGotoNextEmptySomething finished all books -- stopping" )
+        showInfo( self, APP_NAME, _("No (more) empty {} found").format( somethingName ) )
     # end of USFMEditWindow.doGotoNextEmptySomething
 
     def doGotoNextEmptyVerse( self, event=None ):
@@ -1145,7 +1252,7 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
             vPrint( 'Quiet', debuggingThisModule, "doGotoNextEmptyVerse() from {} {}:{}".format( BBB, C, V ) )
             BiblelatorGlobals.theApp.setDebugText( "UEW doGotoNextEmptyVerse…" )
 
-        self.doGotoNextEmptySomething( 'verse', self.emptyVerseMatch )
+        self.doGotoNextEmptySomething( 'verse' )
     # end of USFMEditWindow.doGotoNextEmptyVerse
 
     def doGotoNextEmptyMarker( self, event=None ):
@@ -1160,7 +1267,7 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
             vPrint( 'Quiet', debuggingThisModule, "doGotoNextEmptyMarker() from {} {}:{}".format( BBB, C, V ) )
             BiblelatorGlobals.theApp.setDebugText( "UEW doGotoNextEmptyMarker…" )
 
-        self.doGotoNextEmptySomething( 'marker', self.emptyMarkerMatch )
+        self.doGotoNextEmptySomething( 'marker' )
     # end of USFMEditWindow.doGotoNextEmptyMarker
 
 
@@ -1174,6 +1281,7 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
             1/ Saves any changes in the editor to self.bookText
             2/ If we've changed book:
                 if changes to self.bookText, save them to disk
+                    (and stay in the old book if they can't be saved)
                 load the new book text
             3/ Load the appropriate verses into the editor according to the contextViewMode.
         """
@@ -1212,14 +1320,20 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
 
         if self.textBox.edit_modified(): # we need to extract the changes into self.bookText
             assert self.bookTextModified
-            self.bookText = self.getEntireText()
+            self.bookText = self.bookTextBuffer.getText() # Only the loaded chapters if we're using self.chapterLoader
             if newBBB == oldBBB: # We haven't changed books -- update our book cache
                 self.cacheBook( newBBB )
 
         if newReferenceVerseKey is None:
             if oldVerseKey is not None:
                 if self.bookTextModified: self.doSave() # resets bookTextModified flag
+                self.finishSaving() # so we know if it was written
+                if self.bookTextModified: # it wasn't, so keep the text
+                    self.setCurrentVerseKey( oldVerseKey )
+                    self.refreshTitle()
+                    return
                 self.clearText() # Leaves the text box enabled
+                self.removeVerseMarks()
                 self.textBox.configure( state=tk.DISABLED ) # Don't allow editing
                 self.textBox.edit_modified( False ) # clear modified flag (otherwise we could empty the book file)
                 self.refreshTitle()
@@ -1234,14 +1348,22 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
         #markAsUnmodified = True
         if newBBB != oldBBB: # we've switched books
             if self.bookTextModified: self.doSave() # resets bookTextModified flag
+            self.finishSaving() # Wait until the old book is written so we know if it worked
+            if self.bookTextModified: # it couldn't be saved, so stay in the old book rather than losing the changes
+                self.setCurrentVerseKey( oldVerseKey )
+                self.numTotalVerses = calculateTotalVersesForBook( oldBBB, self.getNumChapters, self.getNumVerses )
+                self.refreshTitle()
+                return
             self.editStatus = 'Editable'
-            self.bookText = self.getBookDataFromDisk( newBBB )
+            self.bookText = self.getBookDataFromDisk( newBBB, newVerseKey.getChapterNumberInt() )
+            self.bookTextBBB = newBBB
             if self.bookText is None:
                 uNumber, uAbbrev = BibleOrgSysGlobals.loadedBibleBooksCodes.getUSFMNumber(newBBB), BibleOrgSysGlobals.loadedBibleBooksCodes.getUSFMAbbreviation(newBBB)
                 if uNumber is None or uAbbrev is None: # no use asking about creating the book
                     # NOTE: I think we've already shown this error in getBookDataFromDisk()
                     #showError( self, APP_NAME, _("Couldn't determine USFM filename for {!r} book").format( newBBB ) )
                     self.clearText() # Leaves the text box enabled
+                    self.removeVerseMarks()
                     self.textBox.edit_modified( tk.FALSE ) # clear Tkinter modified flag
                     self.bookTextModified = False
                     self.textBox.configure( state=tk.DISABLED ) # Don't allow editing
@@ -1257,88 +1379,73 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
                         self.bookTextModified = True
                         #self.doSave() # Save the chapter/verse markers (blank book outline) ## Doesn't work -- saves a blank file
             else: self.cacheBook( newBBB )
+        elif self.chapterLoader is not None: # we only have some of the chapters of this book
+            intC = newVerseKey.getChapterNumberInt()
+            if self._contextViewMode not in LAZY_LOAD_CONTEXT_VIEW_MODES or not self.chapterLoader.coversChapters( intC-1, intC+1 ):
+                self.loadMoreBookChapters( newBBB, intC )
 
         # Now load the desired part of the book into the edit window
-        #   while at the same time, setting self.bookTextBefore and self.bookTextAfter
+        #   while at the same time, setting the text before and after it into self.bookTextBuffer
         #   (so that combining these three components, would reconstitute the entire file).
         if self.bookText is not None:
             self.loading = True # Turns off USFMEditWindow onTextChange notifications for now
             self.clearText() # Leaves the text box enabled
+            self.removeVerseMarks()
             startingFlag = True
 
             if self._contextViewMode == 'BeforeAndAfter':
                 vPrint( 'Never', debuggingThisModule, 'USFMEditWindow.updateShownBCV', 'BeforeAndAfter2' )
                 BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
-                self.bookTextBefore = self.bookTextAfter = ''
-                numChaps = self.getNumChapters( BBB )
-                if numChaps is None: numChaps = 0
-                for thisC in range( -1, numChaps+1 ):
-                    try: numVerses = self.getNumVerses( BBB, thisC )
-                    except KeyError: numVerses = 0
-                    for thisV in range( numVerses+1 ):
-                        thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
-                        thisVerseData = self.getCachedVerseData( thisVerseKey )
-                        if thisC < intC: self.bookTextBefore += thisVerseData if thisVerseData else ''
-                        elif thisC > intC: self.bookTextAfter += thisVerseData if thisVerseData else ''
-                        elif thisV < intV-1: self.bookTextBefore += thisVerseData if thisVerseData else ''
-                        elif thisV > intV+1: self.bookTextAfter += thisVerseData if thisVerseData else ''
-                        else: # these are the displayed verses
-                            RC = self.textBox.index( tk.INSERT ) # Something like 55.6 for line 55, before column 6
-                            self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
-                                                currentVerseFlag=thisC==intC and thisV==intV,
-                                                substituteTrailingSpaces=self.markTrailingSpacesFlag,
-                                                substituteMultipleSpaces=self.markMultipleSpacesFlag )
-                            if thisC==intC and thisV==intV and thisVerseData: # this is the current verse
-                                row, col = RC.split( '.', 1 ) # Get our starting row/column
-                                #dPrint( 'Quiet', debuggingThisModule, 'R.C', repr(RC), repr(row), repr(col), 'tVD', repr(thisVerseData) )
-                                lines = thisVerseData.split( '\n' )
-                                offset = 0
-                                if lines[0] and lines[0][0]=='\\' and lines[0][1:] in BibleOrgSysGlobals.USFMParagraphMarkers:
-                                    # Assume the first line is just a USFM paragraph marker (with no other info)
-                                    #dPrint( 'Quiet', debuggingThisModule, "Move to 2.end after", repr(lines[0]), "for", self.moduleID )
-                                    offset = 1
-                                savedCursorPosition = '{}.end'.format( int(row) + offset ) # Move the cursor to the end of the SECOND line in the verse
-                                #dPrint( 'Quiet', debuggingThisModule, "Move to {!r} after {!r} for {}".format( savedCursorPosition, lines[0], self.moduleID ) )
-                            startingFlag = False
+                displayedCVs = self.splitBookText( BBB, (intC,intV-1), (intC,intV+2) )
+                for thisC,thisV in displayedCVs:
+                    thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
+                    thisVerseData = self.getCachedVerseData( thisVerseKey )
+                    RC = self.textBox.index( tk.INSERT ) # Something like 55.6 for line 55, before column 6
+                    self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
+                                        currentVerseFlag=thisC==intC and thisV==intV,
+                                        substituteTrailingSpaces=self.markTrailingSpacesFlag,
+                                        substituteMultipleSpaces=self.markMultipleSpacesFlag )
+                    if thisC==intC and thisV==intV and thisVerseData: # this is the current verse
+                        row, col = RC.split( '.', 1 ) # Get our starting row/column
+                        #dPrint( 'Quiet', debuggingThisModule, 'R.C', repr(RC), repr(row), repr(col), 'tVD', repr(thisVerseData) )
+                        lines = thisVerseData.split( '\n' )
+                        offset = 0
+                        if lines[0] and lines[0][0]=='\\' and lines[0][1:] in BibleOrgSysGlobals.USFMParagraphMarkers:
+                            # Assume the first line is just a USFM paragraph marker (with no other info)
+                            #dPrint( 'Quiet', debuggingThisModule, "Move to 2.end after", repr(lines[0]), "for", self.moduleID )
+                            offset = 1
+                        savedCursorPosition = '{}.end'.format( int(row) + offset ) # Move the cursor to the end of the SECOND line in the verse
+                        #dPrint( 'Quiet', debuggingThisModule, "Move to {!r} after {!r} for {}".format( savedCursorPosition, lines[0], self.moduleID ) )
+                    startingFlag = False
 
             elif self._contextViewMode == 'ByVerse':
                 vPrint( 'Never', debuggingThisModule, 'USFMEditWindow.updateShownBCV', 'ByVerse2' )
                 savedCursorPosition = '1.end' # Default the cursor to the end of the first line
                 BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
-                self.bookTextBefore = self.bookTextAfter = ''
-                numChaps = self.getNumChapters( BBB )
-                if numChaps is None: numChaps = 0
-                for thisC in range( -1, numChaps+1 ):
-                    try: numVerses = self.getNumVerses( BBB, thisC )
-                    except KeyError: numVerses = 0
-                    for thisV in range( numVerses+1 ):
-                        thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
-                        thisVerseData = self.getCachedVerseData( thisVerseKey )
-                        if thisC < intC: self.bookTextBefore += thisVerseData if thisVerseData else ''
-                        elif thisC > intC: self.bookTextAfter += thisVerseData if thisVerseData else ''
-                        elif thisV < intV: self.bookTextBefore += thisVerseData if thisVerseData else ''
-                        elif thisV > intV: self.bookTextAfter += thisVerseData if thisVerseData else ''
-                        else: # this is the current verse
-                            #dPrint( 'Quiet', debuggingThisModule, "tVD for", self.moduleID, thisVerseKey, thisVerseData )
-                            if thisVerseData is None: # We might have a missing or bridged verse
-                                intV = int( thisV )
-                                while intV > 1:
-                                    intV -= 1 # Go back looking for bridged verses to display
-                                    thisVerseData = self.getCachedVerseData( SimpleVerseKey( BBB, thisC, intV ) )
-                                    #dPrint( 'Quiet', debuggingThisModule, "  tVD for", self.moduleID, intV, thisVerseData )
-                                    if thisVerseData is not None: # it seems to have worked
-                                        break # Might have been nice to check/confirm that it was actually a bridged verse???
-                            self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
-                                                currentVerseFlag=thisC==intC and thisV==intV,
-                                                substituteTrailingSpaces=self.markTrailingSpacesFlag,
-                                                substituteMultipleSpaces=self.markMultipleSpacesFlag )
-                            #dPrint( 'Quiet', debuggingThisModule, 'tVD', repr(thisVerseData) )
-                            if thisVerseData:
-                                lines = thisVerseData.split( '\n' )
-                                if lines[0] and lines[0][0]=='\\' and lines[0][1:] in BibleOrgSysGlobals.USFMParagraphMarkers:
-                                    # Assume the first line is just a USFM paragraph marker (with no other info)
-                                    #dPrint( 'Quiet', debuggingThisModule, "Move to 2.end after", repr(lines[0]), "for", self.moduleID )
-                                    savedCursorPosition = '2.end' # Move the cursor to the end of the SECOND line
+                displayedCVs = self.splitBookText( BBB, (intC,intV), (intC,intV+1) )
+                for thisC,thisV in displayedCVs: # this is the current verse
+                    thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
+                    thisVerseData = self.getCachedVerseData( thisVerseKey )
+                    #dPrint( 'Quiet', debuggingThisModule, "tVD for", self.moduleID, thisVerseKey, thisVerseData )
+                    if thisVerseData is None: # We might have a missing or bridged verse
+                        intV = int( thisV )
+                        while intV > 1:
+                            intV -= 1 # Go back looking for bridged verses to display
+                            thisVerseData = self.getCachedVerseData( SimpleVerseKey( BBB, thisC, intV ) )
+                            #dPrint( 'Quiet', debuggingThisModule, "  tVD for", self.moduleID, intV, thisVerseData )
+                            if thisVerseData is not None: # it seems to have worked
+                                break # Might have been nice to check/confirm that it was actually a bridged verse???
+                    self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
+                                        currentVerseFlag=thisC==intC and thisV==intV,
+                                        substituteTrailingSpaces=self.markTrailingSpacesFlag,
+                                        substituteMultipleSpaces=self.markMultipleSpacesFlag )
+                    #dPrint( 'Quiet', debuggingThisModule, 'tVD', repr(thisVerseData) )
+                    if thisVerseData:
+                        lines = thisVerseData.split( '\n' )
+                        if lines[0] and lines[0][0]=='\\' and lines[0][1:] in BibleOrgSysGlobals.USFMParagraphMarkers:
+                            # Assume the first line is just a USFM paragraph marker (with no other info)
+                            #dPrint( 'Quiet', debuggingThisModule, "Move to 2.end after", repr(lines[0]), "for", self.moduleID )
+                            savedCursorPosition = '2.end' # Move the cursor to the end of the SECOND line
 
             elif self._contextViewMode == 'BySection':
                 vPrint( 'Never', debuggingThisModule, 'USFMEditWindow.updateShownBCV', 'BySection2' )
@@ -1346,25 +1453,17 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
                 sectionStart, sectionEnd = findCurrentSection( newVerseKey, self.getNumChapters, self.getNumVerses, self.getCachedVerseData )
                 intC1, intV1 = sectionStart.getChapterNumberInt(), sectionStart.getVerseNumberInt()
                 intC2, intV2 = sectionEnd.getChapterNumberInt(), sectionEnd.getVerseNumberInt()
-                self.bookTextBefore = self.bookTextAfter = ''
-                for thisC in range( -1, self.getNumChapters( BBB )+1 ):
-                    try: numVerses = self.getNumVerses( BBB, thisC )
-                    except KeyError: numVerses = 0
-                    for thisV in range( numVerses+1 ):
-                        thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
-                        thisVerseData = self.getCachedVerseData( thisVerseKey )
-                        if thisC < intC1 or (thisC==intC1 and thisV<intV1):
-                            self.bookTextBefore += thisVerseData if thisVerseData else ''
-                        elif thisC > intC2 or (thisC==intC2 and thisV>intV2):
-                            self.bookTextAfter += thisVerseData if thisVerseData else ''
-                        else: # we're in the section that we're interested in
-                            self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
-                                                    currentVerseFlag=thisC==intC and thisV==intV )
-                            startingFlag = False
+                displayedCVs = self.splitBookText( BBB, (intC1,intV1), (intC2,intV2+1) )
+                for thisC,thisV in displayedCVs: # we're in the section that we're interested in
+                    thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
+                    thisVerseData = self.getCachedVerseData( thisVerseKey )
+                    self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
+                                            currentVerseFlag=thisC==intC and thisV==intV )
+                    startingFlag = False
 
             elif self._contextViewMode == 'ByBook':
                 vPrint( 'Never', debuggingThisModule, 'USFMEditWindow.updateShownBCV', 'ByBook2' )
-                self.bookTextBefore = self.bookTextAfter = ''
+                self.bookTextBuffer.clear() # Nothing before or after
                 BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
                 for thisC in range( -1, self.getNumChapters( BBB ) + 1 ):
                     try: numVerses = self.getNumVerses( BBB, thisC )
@@ -1380,19 +1479,13 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
             elif self._contextViewMode == 'ByChapter':
                 vPrint( 'Never', debuggingThisModule, 'USFMEditWindow.updateShownBCV', 'ByChapter2' )
                 BBB, intC, intV = newVerseKey.getBBB(), newVerseKey.getChapterNumberInt(), newVerseKey.getVerseNumberInt()
-                self.bookTextBefore = self.bookTextAfter = ''
-                for thisC in range( -1, self.getNumChapters( BBB ) + 1 ):
-                    try: numVerses = self.getNumVerses( BBB, thisC )
-                    except KeyError: numVerses = 0
-                    for thisV in range( numVerses + 1 ):
-                        thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
-                        thisVerseData = self.getCachedVerseData( thisVerseKey )
-                        if thisC < intC: self.bookTextBefore += thisVerseData if thisVerseData else ''
-                        elif thisC > intC: self.bookTextAfter += thisVerseData if thisVerseData else ''
-                        else:
-                            self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
-                                                currentVerseFlag=thisC==intC and thisV==intV )
-                            startingFlag = False
+                displayedCVs = self.splitBookText( BBB, (intC,-1), (intC+1,-1) )
+                for thisC,thisV in displayedCVs:
+                    thisVerseKey = SimpleVerseKey( BBB, thisC, thisV )
+                    thisVerseData = self.getCachedVerseData( thisVerseKey )
+                    self.displayAppendVerse( startingFlag, thisVerseKey, thisVerseData,
+                                        currentVerseFlag=thisC==intC and thisV==intV )
+                    startingFlag = False
 
             else:
                 logging.critical( "USFMEditWindow.updateShownBCV: Bad context view mode {}".format( self._contextViewMode ) )
@@ -1402,6 +1495,8 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
 
         self.textBox.edit_reset() # clear undo/redo stks
         self.textBox.edit_modified( tk.FALSE ) # clear modified flag
+        self.usfmTextChecker.clear() # The next check will have to do all the new text
+        self.rebuildVerseLineMap()
         self.loading = False # Turns onTextChange notifications back on
         self.lastCVMark = None
 
@@ -1421,30 +1516,46 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
     # end of USFMEditWindow.updateShownBCV
 
 
-    def getEntireText( self ):
+    def getEntireText( self ) -> str:
         """
         Gets the displayed text and adds it to the surrounding text.
+
+        The book text buffer only joins these again if the displayed text has been changed.
+
+        If we only loaded some chapters of the book,
+            the rest of the book is read from the file.
         """
         #if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
             #dPrint( 'Quiet', debuggingThisModule, "USFMEditWindow.getEntireText()" )
 
-        # Get the text from the edit box and clean it up
-        editBoxText = self.getAllText()
-
-        # Add the stuff that wasn't displayed before and after the currently displayed verses
-        try: entireText = self.bookTextBefore + editBoxText + self.bookTextAfter
-        except TypeError:
-            # Probably self.bookTextBefore and self.bookTextAfter are both None
-            #   Can happen if the book navigated to doesn't actually exist (and isn't created)
-            if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-                assert self.bookTextBefore is None
-                assert self.bookTextAfter is None
-            #dPrint( 'Quiet', debuggingThisModule, "getEntireText", repr(self.bookTextBefore), repr(editBoxText), repr(self.bookTextAfter) )
-            entireText = editBoxText
-        return entireText
+        if self.chapterLoader is None: return self.bookTextBuffer.getText()
+        textBefore, textAfter = self.getTextAroundChapters( self.chapterLoader )
+        return ''.join( (textBefore, self.bookTextBuffer.getText(), textAfter) )
     # end of USFMEditWindow.getEntireText
 
 
+    def getTextAroundChapters( self, chapterLoader:USFMChapterLoader ) -> Tuple[str,str]:
+        """
+        Reads and returns the text of the book before and after the chapters that we loaded.
+
+        If the book file has been changed on disk since the chapters were loaded
+            (e.g., by another program or another window on the same project),
+            the same chapters are found again in the changed file
+            rather than splitting it at the old places.
+
+        Raises FileChangedError if the chapters can't be found in the changed file
+            (or OSError if it can't be read).
+        """
+        fnPrint( debuggingThisModule, "USFMEditWindow.getTextAroundChapters( {} )".format( chapterLoader ) )
+        self.bookWriter.waitUntilFinished() # Make sure that we don't read a file that's still being written
+        try: return chapterLoader.getTextBefore(), chapterLoader.getTextAfter()
+        except FileChangedError as err:
+            logging.warning( "USFMEditWindow.getTextAroundChapters: {}".format( err ) )
+            if not chapterLoader.relocateWindow(): raise
+        return chapterLoader.getTextBefore(), chapterLoader.getTextAfter()
+    # end of USFMEditWindow.getTextAroundChapters
+
+
     def doBibleReplace( self, event=None ):
         """
         """
@@ -1469,6 +1580,7 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
             BiblelatorGlobals.theApp.logUsage( PROGRAM_NAME, debuggingThisModule, ' doBibleReplace {}'.format( self.BibleReplaceOptionsDict ) )
             #self._prepareInternalBible() # Make sure that all books are loaded
             self.doSave() # Make sure that any saves are made to disk
+            self.finishSaving() # and wait until they're written
             # We load and search/replace the actual text files
             self.BibleReplaceOptionsDict, resultSummaryDict = findReplaceText( self.BibleReplaceOptionsDict['givenBible'], self.BibleReplaceOptionsDict, self.findReplaceCallback )
             #dPrint( 'Quiet', debuggingThisModule, "Got findReplaceResults", resultSummaryDict )
@@ -1513,6 +1625,10 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
         Same as TextEditWindowAddon.doSave except
             has a bit more housekeeping to do
         plus we always save with Windows newline endings.
+
+        The text is written to the file in a background thread
+            so the user can keep on editing
+            (and checkSaveResults() finishes off when it's done).
         """
 
         logging.debug( "USFMEditWindow.doSave( {} )".format( event ) )
@@ -1521,25 +1637,115 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
         if self.modified():
             if self.folderpath and self.filename:
                 filepath = os.path.join( self.folderpath, self.filename )
-                self.bookText = self.getEntireText()
+                self.bookText = self.bookTextBuffer.getText() # Only the loaded chapters if we're using self.chapterLoader
+                chapterLoader = self.chapterLoader
+                loadedEntireBook = chapterLoader is None
+                if loadedEntireBook: bookText = self.bookText
+                else: # we need to put the chapters that we didn't load back around our text
+                    self.bookWriter.waitUntilFinished() # Make sure that we don't read a file that's still being written
+                    if not chapterLoader.isWindowCurrent():
+                        showWarning( self, APP_NAME, _("{} has been changed on disk since chapters {} to {} were loaded, so those chapters in it will be replaced by the ones here") \
+                                                .format( chapterLoader.filepath, max( 0, chapterLoader.windowChapters[0] ), chapterLoader.windowChapters[1] ) )
+                    try: textBefore, textAfter = self.getTextAroundChapters( chapterLoader )
+                    except (FileChangedError, OSError) as err: # Never save a book that's been put together wrongly
+                        showError( self, APP_NAME, _("Couldn't save {}: {}").format( self.filename, err ) )
+                        return # and leave it marked as modified
+                    bookText = ''.join( (textBefore, self.bookText, textAfter) )
+                    if os.path.normpath( filepath ) == os.path.normpath( chapterLoader.filepath ):
+                        # Work out where our chapters will be in the saved file
+                        savedWindowStart = chapterLoader.getSavedByteLength( textBefore, newline='\r\n' )
+                        savedWindowEnd = savedWindowStart + chapterLoader.getSavedByteLength( self.bookText, newline='\r\n' )
+                    else: chapterLoader = None # We're not saving into the file that we loaded the chapters from
                 vPrint( 'Quiet', debuggingThisModule, "Saving {} with {} encoding".format( filepath, self.internalBible.encoding ) )
                 logging.debug( "Saving {} with {} encoding".format( filepath, self.internalBible.encoding ) )
-                with open( filepath, mode='wt', encoding=self.internalBible.encoding, newline='\r\n' ) as theFile:
-                    theFile.write( self.bookText )
-                self.rememberFileTimeAndSize()
-                BBB = self.currentVerseKey.getBBB()
-                self.internalBible.bookNeedsReloading[BBB] = True
+                BBB = self.bookTextBBB # Not self.currentVerseKey which has already moved on if we're switching books
+                userName, loggingFolderpath = BiblelatorGlobals.theApp.currentUserName, BiblelatorGlobals.theApp.loggingFolderpath
+                projectName, filename, encoding = self.projectName, self.filename, self.internalBible.encoding
+                emptyFieldIndex = self.getProjectEmptyFieldIndex()
+                if emptyFieldIndex is not None and os.path.normpath( self.folderpath ) != os.path.normpath( emptyFieldIndex.sourceFolder ):
+                    emptyFieldIndex = None # We're not saving into the project folder
+                countWords = needsBibleBookAutocompleteUpdate( self, BBB )
+                if countWords:
+                    oldWordCounts, internalMarkers, minLength = self.autocompleteBookWordCounts.get( BBB ), getInternalMarkers(), self.autocompleteMinLength
+                saveResults = {} # Filled in by afterWrite for checkSaveResults
+                def afterWrite():
+                    """
+                    Called in the background thread after the book has been written.
+
+                    The chapter loader offsets are set first because the file has changed
+                        (and the other steps might fail).
+                    """
+                    if chapterLoader is not None: chapterLoader.setSavedWindow( savedWindowStart, savedWindowEnd )
+                    elif loadedEntireBook: getBookTextCache().updateText( filepath, encoding, bookText ) # So we don't have to read it again
+                    if emptyFieldIndex is not None: emptyFieldIndex.updateBook( BBB, filename, bookText )
+                    if countWords: # Count the words here rather than in the GUI thread
+                        saveResults['WordCounts'] = (oldWordCounts,) + countChangedBookWords( bookText, oldWordCounts, internalMarkers, minLength )
+                    logChangedFile( userName, loggingFolderpath, projectName, BBB, bookText )
+                # end of USFMEditWindow.doSave.afterWrite
+                self.bookWriter.write( filepath, bookText, encoding, newline='\r\n', tag=(BBB,filename,saveResults),
+                                        afterWriteFunction=afterWrite )
                 self.textBox.edit_modified( tk.FALSE ) # clear Tkinter modified flag
                 self.bookTextModified = False
                 #self.internalBible.unloadBooks() # coz they're now out of date
                 #self.internalBible.reloadBook( self.currentVerseKey.getBBB() ) # coz it's now out of date -- what? why?
                 self.cacheBook( BBB ) # Wasted if we're closing the window/program, but important if we're continuing to edit
                 self.refreshTitle()
-                logChangedFile( BiblelatorGlobals.theApp.currentUserName, BiblelatorGlobals.theApp.loggingFolderpath, self.projectName, BBB, self.bookText )
+                if not self.saveInBackground: self.finishSaving()
+                elif self.saveResultsCheckID is None:
+                    self.saveResultsCheckID = self.after( SAVE_RESULTS_CHECK_TIME, self.checkSaveResults )
             else: self.doSaveAs()
     # end of USFMEditWindow.doSave
 
 
+    def checkSaveResults( self ) -> None:
+        """
+        Called (by after()) to finish off any saves that have been written in the background.
+
+        Keeps checking until the background writer is idle.
+        """
+        fnPrint( debuggingThisModule, "USFMEditWindow.checkSaveResults()" )
+
+        self.saveResultsCheckID = None
+        for filepath, (BBB,filename,saveResults), err in self.bookWriter.getResults():
+            if err is None:
+                self.internalBible.bookNeedsReloading[BBB] = True
+                if filepath == self.filepath: self.rememberFileTimeAndSize() # So it doesn't look like someone else changed it
+                if 'WordCounts' in saveResults: # already counted in the background
+                    updateBibleBookAutocompleteWords( self, BBB, *saveResults['WordCounts'] ) # So deleted/changed words are updated
+            else:
+                if BBB == self.bookTextBBB: self.bookTextModified = True # So we'll try to save it again
+                showError( self, APP_NAME, _("Couldn't save {}: {}").format( filename, err ) )
+            self.refreshTitle()
+        if self.bookWriter.isBusy():
+            self.saveResultsCheckID = self.after( SAVE_RESULTS_CHECK_TIME, self.checkSaveResults )
+    # end of USFMEditWindow.checkSaveResults
+
+
+    def finishSaving( self ) -> None:
+        """
+        Waits until any background saves have been written
+            and then finishes them off.
+        """
+        fnPrint( debuggingThisModule, "USFMEditWindow.finishSaving()" )
+
+        self.bookWriter.waitUntilFinished()
+        if self.saveResultsCheckID is not None:
+            self.after_cancel( self.saveResultsCheckID )
+        self.checkSaveResults()
+    # end of USFMEditWindow.finishSaving
+
+
+    def checkForDiskChanges( self, autoloadText:bool=False ) -> None:
+        """
+        Check if the file has changed on disk
+            (but not while we're still saving it ourselves).
+        """
+        if self.bookWriter.isBusy():
+            self.after( CHECK_DISK_CHANGES_TIME, self.checkForDiskChanges, autoloadText ) # Try again later
+        else: TextEditWindowAddon.checkForDiskChanges( self, autoloadText )
+    # end of USFMEditWindow.checkForDiskChanges
+
+
     def startReferenceMode( self ):
         """
         Called from the GUI to duplicate this window into Group B,
@@ -1714,16 +1920,20 @@ class USFMEditWindow( TextEditWindowAddon, InternalBibleResourceWindowAddon, Chi
     ## end of USFMEditWindow.doAbout
 
 
-    #def doClose( self, event=None ):
-        #"""
-        #Called if the window is about to be destroyed.
+    def doClose( self, event=None ):
+        """
+        Called if the window is about to be destroyed.
 
-        #Determines if we want/need to save any changes.
-        #"""
-        #if BibleOrgSysGlobals.debugFlag and debuggingThisModule:
-            #dPrint( 'Quiet', debuggingThisModule, "USFMEditWindow.doClose( {} )".format( event ) )
+        Determines if we want/need to save any changes,
+            and releases our (shared) autocomplete words.
+        """
+        fnPrint( debuggingThisModule, "USFMEditWindow.doClose( {} )".format( event ) )
 
-        #TextEditWindowAddon.doClose( self ) # Make sure the right one is called (not the ChildWindow one)
+        self.saveInBackground = False # Any save must be finished before the window is destroyed
+        TextEditWindowAddon.doClose( self, event ) # Make sure the right one is called (not the ChildWindow one)
+        self.saveInBackground = True # In case we didn't actually close
+        if self not in BiblelatorGlobals.theApp.childWindows: # we really did close
+            self.releaseAutocompleteVocabulary()
     # end of USFMEditWindow.doClose
 # end of USFMEditWindow class
 